@@ -5,6 +5,7 @@ Nunca deben estar hardcodeados en código fuente (ver .gitignore y .env.example)
 """
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
 
 
 class Settings(BaseSettings):
@@ -32,6 +33,9 @@ class Settings(BaseSettings):
     PASSWORD_MAX_LENGTH: int = 72   # Tope de bcrypt (bytes); pasphrase siguen siendo seguros
     # Caducidad de contraseña: 0 = sin caducidad (para uso en producción corporativa, set > 0)
     PASSWORD_EXPIRE_DAYS: int = 0
+    # bcrypt en un pool de procesos (app/core/password_hasher.py)
+    PASSWORD_HASH_WORKERS: Optional[int] = None   # None = uno por núcleo; 0 = en el event loop
+    PASSWORD_HASH_QUEUE_PER_WORKER: int = 8       # cola llena → 503 inmediato (backpressure)
 
     # ── CORS ──────────────────────────────────────────────────────────────
     FRONTEND_URL: str = "http://localhost:5173"
@@ -49,6 +53,57 @@ class Settings(BaseSettings):
     # En desarrollo: /media (proxeado por nginx → MinIO)
     # En producción: puede ser un CDN externo
     MINIO_PUBLIC_BASE: str = "/media"
+
+    # ── Caché de facetas del catálogo (por proceso) ─────────────────────
+    FACETS_CACHE_SIZE: int = 1000     # conjuntos de filtros distintos
+    FACETS_CACHE_TTL: int = 300       # segundos; las escrituras invalidan antes
+
+    # ── Caché de respuestas GET públicas del catálogo (ETag / 304) ──────
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_SIZE: int = 5000                   # entradas
+    RESPONSE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # cuerpos JSON cacheados
+    RESPONSE_CACHE_TTL: int = 600                     # segundos
+
+    # ── Barrido de carritos (app/core/cart_sweeper.py / sweep_carts.py) ───
+    CART_SWEEP_INTERVAL: int = 900        # segundos entre barridos en la app; 0 = solo el worker
+    CART_SWEEP_BATCH: int = 500           # filas por transacción (bloqueos cortos)
+    CART_EXPIRE_HOURS: int = 24           # Cart abierto sin expires_at → expired tras estas horas
+    CART_ITEMS_RETENTION_DAYS: int = 30   # carrito sin ninguna modificación en N días → se purga
+
+    # ── Idempotency-Key (app/core/idempotency.py) ────────────────────────
+    # REDIS_URL vacío = almacén en memoria por proceso (un solo worker).
+    # Con varios workers / réplicas: redis://redis:6379/0
+    REDIS_URL: str = ""
+    IDEMPOTENCY_TTL: int = 24 * 3600      # segundos que se guarda cada respuesta
+    IDEMPOTENCY_MAX_KEYS: int = 10_000    # LRU en memoria
+    IDEMPOTENCY_WAIT_TIMEOUT: int = 30    # espera máxima de un duplicado concurrente
+
+    # ── Revocación de JWT por jti (app/core/revocation.py) ───────────────
+    # Sin REDIS_URL: lista en memoria por proceso. Con REDIS_URL: compartida.
+    REVOCATION_BLOOM: bool = True                 # Bloom local delante de Redis
+    REVOCATION_BLOOM_CAPACITY: int = 100_000      # jti revocados vivos a la vez
+    REVOCATION_BLOOM_ERROR_RATE: float = 0.001    # falsos positivos → consulta a Redis
+    REVOCATION_BLOOM_REBUILD_SECONDS: int = 600   # reconstruye para soltar caducados
+
+    # ── Outbox de eventos de pedidos (app/core/outbox.py / dispatch_outbox.py) ──
+    OUTBOX_DISPATCH_INTERVAL: float = 2.0  # segundos entre sondeos en la app; 0 = solo el worker
+    OUTBOX_BATCH: int = 100                # eventos reclamados por transacción
+    OUTBOX_MAX_ATTEMPTS: int = 8           # después → evento muerto (failed_at)
+    OUTBOX_BACKOFF_BASE: float = 5.0       # reintento n: base · 2^(n-1) s, hasta OUTBOX_BACKOFF_MAX
+    OUTBOX_BACKOFF_MAX: float = 3600.0
+    OUTBOX_RETENTION_DAYS: int = 7         # eventos procesados que se conservan
+    ORDER_EVENTS_WEBHOOK_URL: str = ""     # POST JSON de cada evento (emails, sync de inventario…)
+    ORDER_EVENTS_WEBHOOK_TIMEOUT: float = 5.0
+
+    # ── Particiones mensuales de pedidos (app/core/order_partitions.py) ──
+    ORDER_PARTITIONS_AHEAD: int = 3       # meses futuros con partición ya creada
+    ORDER_ARCHIVE_AFTER_DAYS: int = 365   # meses más antiguos que esto pasan a "fríos"
+    ORDER_ARCHIVE_TABLESPACE: str = ""    # tablespace frío; vacío = solo VACUUM FREEZE
+
+    # ── Exportación analítica (Parquet) — ver export_analytics.py ────────
+    # Conexión de SOLO LECTURA (rol lookaly_ro de docker/init-db.sql)
+    ANALYTICS_DATABASE_URL: str = "postgresql+asyncpg://lookaly_ro:ro_pass_change_in_prod@db:5432/lookaly_db"
+    ANALYTICS_EXPORT_DIR: str = "exports/analytics"
     model_config = {"env_file": ".env", "case_sensitive": True}
 
 
@@ -0,0 +1,228 @@
+"""
+analytics_export.py — Snapshots columnares (Parquet) para analítica / BI.
+
+Los analistas cargan estos archivos localmente (DuckDB, pandas, Polars, Spark)
+en vez de consultar la BD principal:
+
+    <dir>/orders/month=2025-01/data.parquet        pedidos, particionados por mes de created_at
+    <dir>/order_items/month=2025-01/data.parquet   líneas, en el mes de su pedido (+ order_created_at)
+    <dir>/products/data.parquet                    snapshot completo (sin search_document/content_hash)
+    <dir>/prices/data.parquet                      snapshot completo
+    <dir>/_state.json                              marcas de agua de la exportación incremental
+
+  • Lee SIEMPRE con la conexión de solo lectura (rol lookaly_ro,
+    ANALYTICS_DATABASE_URL), en una sola transacción REPEATABLE READ READ ONLY:
+    todas las tablas salen de la misma foto.
+  • Incremental por updated_at: se reescriben solo los meses que tienen algún
+    pedido con updated_at posterior a la última exportación (el mes completo:
+    cada partición es un snapshot, sin duplicados que deduplicar). products y
+    prices se reescriben si cambió alguna fila (updated_at o número de filas).
+  • Streaming: cursor del servidor por bloques → row groups de Parquet (zstd);
+    memoria acotada por ROW_GROUP_SIZE. Cada archivo se escribe a .tmp y se
+    renombra al terminar: un lector nunca ve un archivo a medias.
+
+Uso: ver backend/export_analytics.py.
+"""
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum as PyEnum
+from pathlib import Path
+from typing import Any
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import (
+    Boolean, DateTime, Enum, Float, Integer, Numeric, Select, func, select,
+)
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+from app.models.order import Order, OrderItem
+from app.models.price import Price
+from app.models.product import Product
+
+FETCH_CHUNK = 10_000
+ROW_GROUP_SIZE = 128_000
+_STATE_FILE = "_state.json"
+# Columnas internas que no aportan al análisis
+_EXCLUDED = {"search_document", "content_hash"}
+
+
+@dataclass
+class ExportReport:
+    files: list[tuple[str, int]] = field(default_factory=list)   # (ruta relativa, filas)
+    skipped: list[str] = field(default_factory=list)             # tablas / particiones sin cambios
+
+
+# ── Esquema Arrow a partir del modelo ────────────────────────────────────────
+def _arrow_type(sa_type) -> pa.DataType:
+    if isinstance(sa_type, Enum):
+        return pa.string()
+    if isinstance(sa_type, Boolean):
+        return pa.bool_()
+    if isinstance(sa_type, Integer):
+        return pa.int64()
+    if isinstance(sa_type, Float):
+        return pa.float64()
+    if isinstance(sa_type, Numeric):
+        return pa.decimal128(sa_type.precision or 18, sa_type.scale or 2)
+    if isinstance(sa_type, DateTime):
+        return pa.timestamp("us")
+    return pa.string()
+
+
+def _columns(model) -> list:
+    return [col for col in model.__table__.columns if col.name not in _EXCLUDED]
+
+
+def _plain(value: Any) -> Any:
+    return value.value if isinstance(value, PyEnum) else value
+
+
+async def _write_parquet(conn: AsyncConnection, stmt: Select, schema: pa.Schema, path: Path) -> int:
+    """Vuelca `stmt` a `path` en streaming; reemplazo atómico al terminar."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    rows_written, pending, pending_rows = 0, [], 0
+    writer = pq.ParquetWriter(tmp, schema, compression="zstd")
+    try:
+        result = await conn.stream(stmt.execution_options(yield_per=FETCH_CHUNK))
+        async for rows in result.partitions(FETCH_CHUNK):
+            columns = list(zip(*rows))
+            pending.append(pa.record_batch(
+                [pa.array([_plain(v) for v in values], type=f.type) for values, f in zip(columns, schema)],
+                schema=schema,
+            ))
+            pending_rows += len(rows)
+            if pending_rows >= ROW_GROUP_SIZE:
+                writer.write_table(pa.Table.from_batches(pending, schema=schema))
+                rows_written += pending_rows
+                pending, pending_rows = [], 0
+        if pending:
+            writer.write_table(pa.Table.from_batches(pending, schema=schema))
+            rows_written += pending_rows
+    except BaseException:
+        writer.close()
+        tmp.unlink(missing_ok=True)
+        raise
+    writer.close()
+    os.replace(tmp, path)
+    return rows_written
+
+
+# ── Incremental ──────────────────────────────────────────────────────────────
+def _month_key(conn: AsyncConnection, column):
+    if conn.dialect.name == "postgresql":
+        return func.to_char(column, "YYYY-MM")
+    return func.strftime("%Y-%m", column)
+
+
+def _month_bounds(month: str) -> tuple[datetime, datetime]:
+    year, mon = map(int, month.split("-"))
+    start = datetime(year, mon, 1)
+    return start, datetime(year + mon // 12, mon % 12 + 1, 1)
+
+
+def _load_state(root: Path) -> dict:
+    try:
+        return json.loads((root / _STATE_FILE).read_text())
+    except FileNotFoundError:
+        return {}
+
+
+def _save_state(root: Path, state: dict) -> None:
+    tmp = root / (_STATE_FILE + ".tmp")
+    tmp.write_text(json.dumps(state, indent=2, sort_keys=True))
+    os.replace(tmp, root / _STATE_FILE)
+
+
+class _Exporter:
+    def __init__(self, conn: AsyncConnection, root: Path, state: dict, full: bool) -> None:
+        self.conn = conn
+        self.root = root
+        self.state = state
+        self.full = full
+        self.report = ExportReport()
+
+    def watermark(self, table: str) -> datetime | None:
+        value = None if self.full else self.state.get(table, {}).get("watermark")
+        return datetime.fromisoformat(value) if value else None
+
+    async def scalar(self, stmt):
+        return (await self.conn.execute(stmt)).scalar()
+
+    async def write(self, stmt: Select, schema: pa.Schema, relative: str) -> None:
+        rows = await _write_parquet(self.conn, stmt, schema, self.root / relative)
+        self.report.files.append((relative, rows))
+
+    async def snapshot(self, table: str, model) -> None:
+        """products / prices: un solo archivo, reescrito si algo cambió."""
+        high = await self.scalar(select(func.max(model.updated_at)))
+        count = await self.scalar(select(func.count()).select_from(model))
+        previous = self.state.get(table, {})
+        low = self.watermark(table)
+        if low is not None and count == previous.get("rows") and (high is None or high <= low):
+            self.report.skipped.append(table)
+            return
+        columns = _columns(model)
+        schema = pa.schema([(c.name, _arrow_type(c.type)) for c in columns])
+        await self.write(select(*columns).order_by(*model.__table__.primary_key), schema, f"{table}/data.parquet")
+        self.state[table] = {"watermark": high.isoformat() if high else None, "rows": count}
+
+    async def orders(self) -> None:
+        high = await self.scalar(select(func.max(Order.updated_at)))
+        low = self.watermark("orders")
+        month = _month_key(self.conn, Order.created_at)
+        changed = select(month).distinct().where(Order.created_at.is_not(None))
+        if low is not None:
+            changed = changed.where(Order.updated_at > low)
+        months = sorted(m for m in (await self.conn.execute(changed)).scalars() if m)
+        if not months:
+            self.report.skipped.append("orders")
+
+        order_cols = _columns(Order)
+        item_cols = _columns(OrderItem)
+        order_schema = pa.schema([(c.name, _arrow_type(c.type)) for c in order_cols])
+        item_schema = pa.schema([(c.name, _arrow_type(c.type)) for c in item_cols])
+        for key in months:
+            start, end = _month_bounds(key)
+            in_month = (Order.created_at >= start, Order.created_at < end)
+            await self.write(
+                select(*order_cols).where(*in_month).order_by(Order.created_at, Order.id),
+                order_schema, f"orders/month={key}/data.parquet",
+            )
+            await self.write(
+                select(*item_cols)
+                .where(OrderItem.order_created_at >= start, OrderItem.order_created_at < end)
+                .order_by(OrderItem.order_created_at, OrderItem.order_id, OrderItem.id),
+                item_schema, f"order_items/month={key}/data.parquet",
+            )
+        if high is not None:
+            self.state["orders"] = {"watermark": high.isoformat()}
+
+
+async def export_analytics(url: str, out_dir: str | Path, *, full: bool = False) -> ExportReport:
+    """
+    Exporta orders/order_items (por mes) y products/prices a `out_dir` leyendo
+    de `url` (conexión de solo lectura). `full` ignora las marcas de agua.
+    """
+    root = Path(out_dir)
+    root.mkdir(parents=True, exist_ok=True)
+    state = _load_state(root)
+    engine = create_async_engine(url)
+    try:
+        async with engine.connect() as conn:
+            if conn.dialect.name == "postgresql":
+                conn = await conn.execution_options(
+                    isolation_level="REPEATABLE READ", postgresql_readonly=True,
+                )
+            exporter = _Exporter(conn, root, state, full)
+            await exporter.orders()
+            await exporter.snapshot("products", Product)
+            await exporter.snapshot("prices", Price)
+    finally:
+        await engine.dispose()
+    # La marca de agua se guarda solo si todo terminó bien
+    _save_state(root, state)
+    return exporter.report
@@ -0,0 +1,161 @@
+"""
+cache.py — Caché en memoria con LRU + TTL e invalidación por etiquetas.
+
+Cada entrada lleva etiquetas ("catalog", "product:<id>", …). Cuando una
+transacción que modificó el catálogo hace COMMIT, los listeners de sesión de
+abajo invalidan esas etiquetas en todas las cachés registradas. Un rollback
+no invalida nada.
+
+Etiquetas que generan las escrituras ORM (ver _tags_for):
+    Product       → catalog, product:<id>
+    Price         → catalog, product:<product_id>
+    ProductImage  → catalog, product:<product_id>
+    Brand         → brands
+
+Las escrituras fuera del ORM (SQL masivo) deben marcar sus etiquetas a mano:
+    mark_dirty(session, "catalog")
+
+Carrera lectura/escritura: una request que leyó la BD antes de un commit no
+debe guardar su resultado (ya viejo) después de la invalidación. Por eso set()
+recibe la `generation` observada antes de consultar y descarta el valor si
+hubo invalidaciones entre medias.
+
+La caché es por proceso (cada worker de uvicorn tiene la suya).
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Iterable, NamedTuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models.brand import Brand
+from app.models.price import Price
+from app.models.product import Product
+from app.models.product_image import ProductImage
+
+_caches: list["TaggedCache"] = []
+
+
+class _Entry(NamedTuple):
+    value: Any
+    expires_at: float
+    tags: frozenset[str]
+    size: int
+
+
+class TaggedCache:
+    """
+    LRU acotado a `maxsize` entradas (y opcionalmente a `max_bytes`, sumando el
+    `size` declarado en cada set()), cada una válida `ttl` segundos.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, max_bytes: int | None = None) -> None:
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.generation = 0
+        self.bytes = 0
+        self._data: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._by_tag: dict[str, set[Hashable]] = {}
+        _caches.append(self)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Any | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._delete(key)
+            return None
+        self._data.move_to_end(key)
+        return entry.value
+
+    def set(
+        self, key: Hashable, value: Any, tags: Iterable[str] = (), *,
+        generation: int | None = None, size: int = 0,
+    ) -> None:
+        if generation is not None and generation != self.generation:
+            return  # hubo una invalidación mientras se calculaba: el valor puede estar viejo
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        if key in self._data:
+            self._delete(key)
+        entry = _Entry(value, time.monotonic() + self.ttl, frozenset(tags), size)
+        self._data[key] = entry
+        self.bytes += size
+        for tag in entry.tags:
+            self._by_tag.setdefault(tag, set()).add(key)
+        while len(self._data) > self.maxsize or (self.max_bytes is not None and self.bytes > self.max_bytes):
+            self._delete(next(iter(self._data)))
+
+    def invalidate(self, tags: Iterable[str]) -> None:
+        self.generation += 1
+        for tag in tags:
+            for key in self._by_tag.pop(tag, ()):
+                self._delete(key)
+
+    def clear(self) -> None:
+        self.generation += 1
+        self.bytes = 0
+        self._data.clear()
+        self._by_tag.clear()
+
+    def _delete(self, key: Hashable) -> None:
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return
+        self.bytes -= entry.size
+        for tag in entry.tags:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[tag]
+
+
+def invalidate_tags(tags: Iterable[str]) -> None:
+    """Invalida `tags` en todas las cachés del proceso."""
+    tags = set(tags)
+    if tags:
+        for cache in _caches:
+            cache.invalidate(tags)
+
+
+# ── Invalidación al confirmar escrituras ────────────────────────────────────
+_PENDING_KEY = "cache_tags"
+
+
+def _tags_for(obj: object) -> set[str]:
+    if isinstance(obj, Product):
+        return {"catalog", f"product:{obj.id}"}
+    if isinstance(obj, (Price, ProductImage)):
+        return {"catalog", f"product:{obj.product_id}"}
+    if isinstance(obj, Brand):
+        return {"brands"}
+    return set()
+
+
+def mark_dirty(session: Session, *tags: str) -> None:
+    """Etiquetas a invalidar cuando la sesión haga COMMIT (acepta Session o AsyncSession)."""
+    sync_session = getattr(session, "sync_session", session)
+    sync_session.info.setdefault(_PENDING_KEY, set()).update(tags)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_tags(session: Session, flush_context) -> None:
+    pending = session.info.setdefault(_PENDING_KEY, set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        pending |= _tags_for(obj)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session: Session) -> None:
+    invalidate_tags(session.info.pop(_PENDING_KEY, ()))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_tags(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,312 @@
+"""
+cart_optimizer.py — Reparto más barato de un carrito entre tiendas.
+
+Cada línea del carrito puede comprarse en cualquier tienda que tenga precio y
+disponibilidad (≠ out-of-stock). El costo de un reparto es:
+
+    Σ precio × cantidad  +  Σ envío de cada tienda usada
+
+donde el envío de una tienda es el mayor `Price.shipping` de sus líneas
+(SHIPPING_COST si la tienda no publica envío) y se anula cuando el subtotal de
+esa tienda llega a FREE_SHIPPING_THRESHOLD (pricing.store_shipping: el mismo
+cálculo con el que GET /api/cart cobra el envío). `max_stores` limita cuántas
+tiendas distintas se pueden usar.
+
+Estrategia (siempre responde dentro de BUDGET_MS):
+  • heurística — parte de todas las tiendas y va quitando la que más abarata
+    (o la menos mala mientras se exceda max_stores); luego búsqueda local
+    moviendo líneas sueltas entre tiendas (captura umbrales de envío gratis).
+  • exacta — branch & bound para carritos de hasta EXACT_MAX_LINES líneas,
+    sembrada con el costo de la heurística. Cota: costo acumulado + precio
+    mínimo de las líneas restantes + envíos que ya no pueden anularse (la
+    tienda no alcanza el umbral ni con todo lo que queda). Si se agota el
+    tiempo se devuelve el mejor reparto encontrado con optimal=False.
+
+Módulo puro (sin BD): el router arma las líneas con app/core/pricing.py.
+"""
+import time
+from dataclasses import dataclass, field
+
+from app.core.pricing import FREE_SHIPPING_THRESHOLD, SHIPPING_COST, store_shipping
+
+BUDGET_MS = 50.0
+EXACT_MAX_LINES = 16
+_CHECK_EVERY = 256      # nodos del B&B entre lecturas del reloj
+
+
+@dataclass(frozen=True)
+class Offer:
+    site: str
+    unit_price: float
+    shipping: float | None = None    # envío publicado por la tienda (None: SHIPPING_COST)
+
+
+@dataclass
+class CartLine:
+    id: str
+    quantity: int
+    offers: list[Offer]
+
+
+@dataclass
+class StoreCost:
+    site: str
+    items: int
+    subtotal: float
+    shipping: float
+
+
+@dataclass
+class Plan:
+    assignment: dict[str, Offer] = field(default_factory=dict)   # id de línea → oferta elegida
+    stores: list[StoreCost] = field(default_factory=list)
+    items_total: float = 0.0
+    shipping: float = 0.0
+    total: float = 0.0
+    optimal: bool = False
+    method: str = "heuristic"        # "exact" | "heuristic"
+    unavailable: list[str] = field(default_factory=list)           # líneas sin ninguna oferta
+    elapsed_ms: float = 0.0
+
+
+class InfeasibleCart(Exception):
+    """Ningún conjunto de `max_stores` tiendas cubre todas las líneas."""
+
+
+def _quoted(offer: Offer) -> float:
+    return SHIPPING_COST if offer.shipping is None else offer.shipping
+
+
+def evaluate(lines: list[CartLine], assignment: dict[str, Offer]) -> tuple[float, list[StoreCost]]:
+    """Costo total y desglose por tienda de un reparto completo."""
+    subtotal: dict[str, float] = {}
+    items: dict[str, int] = {}
+    quoted: dict[str, float] = {}
+    for line in lines:
+        offer = assignment[line.id]
+        subtotal[offer.site] = subtotal.get(offer.site, 0.0) + offer.unit_price * line.quantity
+        items[offer.site] = items.get(offer.site, 0) + line.quantity
+        quoted[offer.site] = max(quoted.get(offer.site, 0.0), _quoted(offer))
+    stores = [
+        StoreCost(site, items[site], round(sub, 2), store_shipping(sub, quoted[site]))
+        for site, sub in sorted(subtotal.items())
+    ]
+    return sum(s.subtotal + s.shipping for s in stores), stores
+
+
+# ── Heurística ───────────────────────────────────────────────────────────────
+def _cheapest_within(lines: list[CartLine], sites: set[str]) -> dict[str, Offer] | None:
+    """Cada línea a su oferta más barata dentro de `sites` (offers ya ordenadas)."""
+    assignment = {}
+    for line in lines:
+        offer = next((o for o in line.offers if o.site in sites), None)
+        if offer is None:
+            return None
+        assignment[line.id] = offer
+    return assignment
+
+
+def _drop_stores(lines: list[CartLine], max_stores: int | None, deadline: float) -> dict[str, Offer] | None:
+    sites = {o.site for line in lines for o in line.offers}
+    assignment = _cheapest_within(lines, sites)
+    cost = evaluate(lines, assignment)[0]
+    limit = max_stores or len(sites)
+    while len(sites) > 1:
+        used = {o.site for o in assignment.values()}
+        if used != sites:
+            # Tiendas sin líneas asignadas: fuera sin costo
+            sites = used
+            continue
+        best = None
+        for site in sites:
+            trial = _cheapest_within(lines, sites - {site})
+            if trial is None:
+                continue
+            trial_cost = evaluate(lines, trial)[0]
+            if best is None or trial_cost < best[0]:
+                best = (trial_cost, site, trial)
+        if best is None:
+            break
+        if best[0] < cost or len(sites) > limit:
+            cost, assignment = best[0], best[2]
+            sites = sites - {best[1]}
+        else:
+            break
+        if time.perf_counter() > deadline and len(sites) <= limit:
+            break
+    if len({o.site for o in assignment.values()}) > limit:
+        return None
+    return assignment
+
+
+class _Stores:
+    """Subtotal y envíos publicados por tienda de un reparto: costo incremental O(1)."""
+
+    def __init__(self, lines: list[CartLine], assignment: dict[str, Offer]) -> None:
+        self.subtotal: dict[str, float] = {}
+        self.quotes: dict[str, dict[float, int]] = {}   # tienda → {envío publicado: líneas}
+        self.lines: dict[str, int] = {}
+        for line in lines:
+            self.add(assignment[line.id], line.quantity)
+
+    def add(self, offer: Offer, quantity: int, sign: int = 1) -> None:
+        site, quote = offer.site, _quoted(offer)
+        self.subtotal[site] = self.subtotal.get(site, 0.0) + sign * offer.unit_price * quantity
+        quotes = self.quotes.setdefault(site, {})
+        quotes[quote] = quotes.get(quote, 0) + sign
+        if not quotes[quote]:
+            del quotes[quote]
+        self.lines[site] = self.lines.get(site, 0) + sign
+        if not self.lines[site]:
+            del self.lines[site], self.subtotal[site], self.quotes[site]
+
+    def cost(self, site: str) -> float:
+        if site not in self.lines:
+            return 0.0
+        return self.subtotal[site] + store_shipping(self.subtotal[site], max(self.quotes[site]))
+
+    def move_delta(self, line: CartLine, old: Offer, new: Offer) -> float:
+        before = self.cost(old.site) + self.cost(new.site)
+        self.add(old, line.quantity, -1)
+        self.add(new, line.quantity)
+        after = self.cost(old.site) + self.cost(new.site)
+        self.add(new, line.quantity, -1)
+        self.add(old, line.quantity)
+        return after - before
+
+
+def _local_search(lines: list[CartLine], assignment: dict[str, Offer], max_stores: int | None, deadline: float) -> dict[str, Offer]:
+    """Mueve líneas sueltas de tienda mientras baje el costo (first improvement)."""
+    assignment = dict(assignment)
+    stores = _Stores(lines, assignment)
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for line in lines:
+            current = assignment[line.id]
+            for offer in line.offers:
+                if offer.site == current.site:
+                    continue
+                # Con el límite de tiendas lleno solo se abre una tienda si la actual queda vacía
+                if (max_stores and offer.site not in stores.lines and len(stores.lines) >= max_stores
+                        and stores.lines[current.site] > 1):
+                    continue
+                if stores.move_delta(line, current, offer) < -1e-9:
+                    stores.add(current, line.quantity, -1)
+                    stores.add(offer, line.quantity)
+                    assignment[line.id] = current = offer
+                    improved = True
+            if time.perf_counter() > deadline:
+                break
+    return assignment
+
+
+# ── Branch & bound ───────────────────────────────────────────────────────────
+class _Search:
+    def __init__(self, lines: list[CartLine], max_stores: int | None, best_cost: float, deadline: float) -> None:
+        # Primero las líneas más caras: la cota sube antes
+        self.lines = sorted(lines, key=lambda line: -line.offers[0].unit_price * line.quantity)
+        self.max_stores = max_stores
+        self.best_cost = best_cost
+        self.best: dict[str, Offer] | None = None
+        self.deadline = deadline
+        self.timed_out = False
+        self.nodes = 0
+        n = len(self.lines)
+        # Suma de mínimos y potencial por tienda de las líneas i..n-1
+        self.suffix_min = [0.0] * (n + 1)
+        self.suffix_site: list[dict[str, float]] = [{} for _ in range(n + 1)]
+        for i in range(n - 1, -1, -1):
+            line = self.lines[i]
+            self.suffix_min[i] = self.suffix_min[i + 1] + line.offers[0].unit_price * line.quantity
+            potential = dict(self.suffix_site[i + 1])
+            for offer in line.offers:
+                potential[offer.site] = potential.get(offer.site, 0.0) + offer.unit_price * line.quantity
+            self.suffix_site[i] = potential
+        self.subtotal: dict[str, float] = {}
+        self.quoted: dict[str, float] = {}
+        self.chosen: list[Offer] = []
+
+    def bound(self, i: int, items_cost: float) -> float:
+        fixed_shipping = sum(
+            self.quoted[site]
+            for site, sub in self.subtotal.items()
+            if sub + self.suffix_site[i].get(site, 0.0) < FREE_SHIPPING_THRESHOLD
+        )
+        return items_cost + self.suffix_min[i] + fixed_shipping
+
+    def run(self, i: int = 0, items_cost: float = 0.0) -> None:
+        self.nodes += 1
+        if self.nodes % _CHECK_EVERY == 0 and time.perf_counter() > self.deadline:
+            self.timed_out = True
+        if self.timed_out:
+            return
+        if i == len(self.lines):
+            cost = items_cost + sum(
+                store_shipping(sub, self.quoted[site]) for site, sub in self.subtotal.items()
+            )
+            if cost < self.best_cost - 1e-9:
+                self.best_cost = cost
+                self.best = {line.id: offer for line, offer in zip(self.lines, self.chosen)}
+            return
+        if self.bound(i, items_cost) >= self.best_cost - 1e-9:
+            return
+        line = self.lines[i]
+        full = self.max_stores is not None and len(self.subtotal) >= self.max_stores
+        for offer in line.offers:
+            new_store = offer.site not in self.subtotal
+            if new_store and full:
+                continue
+            amount = offer.unit_price * line.quantity
+            prev_quoted = self.quoted.get(offer.site)
+            self.subtotal[offer.site] = self.subtotal.get(offer.site, 0.0) + amount
+            self.quoted[offer.site] = max(prev_quoted or 0.0, _quoted(offer))
+            self.chosen.append(offer)
+            self.run(i + 1, items_cost + amount)
+            self.chosen.pop()
+            if new_store:
+                del self.subtotal[offer.site]
+                del self.quoted[offer.site]
+            else:
+                self.subtotal[offer.site] -= amount
+                self.quoted[offer.site] = prev_quoted
+
+
+def optimize_cart(lines: list[CartLine], *, max_stores: int | None = None, budget_ms: float = BUDGET_MS) -> Plan:
+    """
+    Reparto más barato de `lines` entre tiendas. Las líneas sin ofertas quedan
+    en Plan.unavailable. Lanza InfeasibleCart si `max_stores` no alcanza.
+    """
+    start = time.perf_counter()
+    deadline = start + budget_ms / 1000
+    plan = Plan(unavailable=[line.id for line in lines if not line.offers])
+    lines = [
+        CartLine(line.id, line.quantity, sorted(line.offers, key=lambda o: (o.unit_price, _quoted(o), o.site)))
+        for line in lines if line.offers
+    ]
+    if not lines:
+        plan.optimal, plan.elapsed_ms = True, (time.perf_counter() - start) * 1000
+        return plan
+
+    assignment = _drop_stores(lines, max_stores, deadline)
+    if assignment is not None:
+        assignment = _local_search(lines, assignment, max_stores, deadline)
+
+    if len(lines) <= EXACT_MAX_LINES:
+        search = _Search(lines, max_stores, evaluate(lines, assignment)[0] if assignment else float("inf"), deadline)
+        search.run()
+        if search.best is not None:
+            assignment = search.best
+        plan.optimal = not search.timed_out
+        plan.method = "exact"
+
+    if assignment is None:
+        raise InfeasibleCart
+    cost, stores = evaluate(lines, assignment)
+    plan.assignment = assignment
+    plan.stores = stores
+    plan.items_total = round(sum(s.subtotal for s in stores), 2)
+    plan.shipping = round(sum(s.shipping for s in stores), 2)
+    plan.total = round(cost, 2)
+    plan.elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
+    return plan
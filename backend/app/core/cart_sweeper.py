@@ -0,0 +1,122 @@
+"""
+cart_sweeper.py — Barrido periódico de carritos abandonados.
+
+Dos pasadas, cada una en lotes de CART_SWEEP_BATCH filas con un COMMIT por lote:
+
+  • carts       — status open cuyo expires_at ya pasó (o, sin expires_at,
+                  creados hace más de CART_EXPIRE_HOURS) → status expired.
+  • cart_items  — líneas de usuarios cuyo carrito completo lleva más de
+                  CART_ITEMS_RETENTION_DAYS sin modificaciones → DELETE.
+                  Solo se purgan carritos enteros: si el usuario tocó alguna
+                  línea dentro del plazo, no se borra ninguna.
+
+Cada lote elige sus filas con SELECT … FOR UPDATE SKIP LOCKED (PostgreSQL):
+las filas que una request está modificando se saltan y quedan para el
+siguiente barrido, y varias instancias pueden barrer a la vez sin pisarse ni
+esperarse. Lotes cortos = bloqueos cortos. En SQLite el FOR UPDATE se omite.
+
+Se ejecuta desde el lifespan de la app (CART_SWEEP_INTERVAL > 0) o con el
+worker dedicado backend/sweep_carts.py.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, delete, exists, or_, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import aliased
+
+from app.config import settings
+from app.models.cart import Cart, CartItem, CartStatusEnum
+
+logger = logging.getLogger("lookaly")
+
+
+@dataclass
+class SweepReport:
+    expired_carts: int = 0
+    purged_items: int = 0
+
+
+def _expired_carts(now: datetime, batch: int):
+    cutoff = now - timedelta(hours=settings.CART_EXPIRE_HOURS)
+    return (
+        select(Cart.id)
+        .where(
+            Cart.status == CartStatusEnum.open,
+            or_(Cart.expires_at < now, and_(Cart.expires_at.is_(None), Cart.created_at < cutoff)),
+        )
+        .limit(batch)
+        .with_for_update(skip_locked=True)
+    )
+
+
+def _stale_items(now: datetime, batch: int):
+    cutoff = now - timedelta(days=settings.CART_ITEMS_RETENTION_DAYS)
+    recent = aliased(CartItem)
+    return (
+        select(CartItem.id)
+        .where(
+            CartItem.updated_at < cutoff,
+            ~exists().where(recent.user_id == CartItem.user_id, recent.updated_at >= cutoff),
+        )
+        .order_by(CartItem.updated_at)
+        .limit(batch)
+        .with_for_update(of=CartItem, skip_locked=True)
+    )
+
+
+async def sweep_carts(
+    session_factory: async_sessionmaker,
+    *,
+    batch: int | None = None,
+    now: datetime | None = None,
+) -> SweepReport:
+    """Una pasada completa (todos los lotes pendientes). Devuelve lo barrido."""
+    batch = batch or settings.CART_SWEEP_BATCH
+    now = now or datetime.utcnow()
+    report = SweepReport()
+
+    while True:
+        async with session_factory() as session:
+            ids = list((await session.execute(_expired_carts(now, batch))).scalars())
+            if ids:
+                await session.execute(
+                    update(Cart).where(Cart.id.in_(ids)).values(status=CartStatusEnum.expired)
+                    .execution_options(synchronize_session=False)
+                )
+            await session.commit()
+        report.expired_carts += len(ids)
+        if len(ids) < batch:
+            break
+
+    while True:
+        async with session_factory() as session:
+            ids = list((await session.execute(_stale_items(now, batch))).scalars())
+            if ids:
+                await session.execute(
+                    delete(CartItem).where(CartItem.id.in_(ids)).execution_options(synchronize_session=False)
+                )
+            await session.commit()
+        report.purged_items += len(ids)
+        if len(ids) < batch:
+            break
+    return report
+
+
+async def run_sweeper(session_factory: async_sessionmaker, interval: float, *, batch: int | None = None) -> None:
+    """Barre cada `interval` segundos hasta que se cancele la tarea."""
+    while True:
+        try:
+            report = await sweep_carts(session_factory, batch=batch)
+            if report.expired_carts or report.purged_items:
+                logger.info(
+                    "cart sweeper: %d carritos expirados, %d líneas purgadas",
+                    report.expired_carts, report.purged_items,
+                )
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("cart sweeper: fallo en el barrido")
+        await asyncio.sleep(interval)
@@ -0,0 +1,442 @@
+"""
+catalog_import.py — Importación / sincronización del catálogo desde CSV (streaming).
+
+Formatos (ver backend/catalog/README.md):
+  products.csv  id,name,brand,category,description,image,rating,reviews
+                (+ opcionales: subcategory, unit_price, stock, sku, weight_g, is_active)
+  prices.csv    product_id,store,price_mxn,shipping_mxn
+                (+ opcionales: availability, url, currency)
+
+  • Streaming: se lee fila a fila (csv sobre el archivo abierto), nunca el
+    archivo completo; las líneas que empiezan con # y las vacías se ignoran.
+  • Validación por lotes con los schemas existentes (ProductCreate / PriceCreate).
+    Una fila inválida se reporta (archivo, línea, error) y no detiene la carga.
+  • Diff por hash de contenido: cada fila importada guarda content_hash (hash de
+    las columnas del CSV ya validadas). Por lote se leen los hashes guardados y
+    cada fila queda como inserted / changed / unchanged; solo se escriben las
+    dos primeras. Las unchanged no tocan updated_at, ni el resumen de precios,
+    ni las cachés: un feed nocturno cuesta lo que realmente cambió.
+    Las ediciones por el ORM (panel) ponen content_hash = "" (ver los modelos),
+    así que la siguiente sincronización las reescribe con lo que diga el feed.
+  • removed: filas de una sincronización previa (content_hash no NULL) que ya
+    no vienen en el archivo. Se reportan siempre; con prune=True se aplican
+    (productos → is_active=False, precios → DELETE). Los productos creados a
+    mano (content_hash NULL) nunca cuentan como removed.
+  • dry_run=True: calcula el mismo diff sin escribir nada y lo lista en `changes`.
+  • Escritura: un INSERT … ON CONFLICT DO UPDATE por lote, ejecutado con la
+    lista de filas (executemany: SQLAlchemy lo agrupa en VALUES multi-fila /
+    pipeline de asyncpg) — products por id, prices por (product_id, site).
+    Si un lote falla en BD (p. ej. sku duplicado) se reintenta fila a fila en
+    SAVEPOINTs para aislar la fila culpable.
+  • Idempotente: reimportar los mismos archivos no escribe nada. Las columnas
+    que no vienen en el CSV no se tocan en productos existentes.
+  • Los productos nuevos sin sku reciben un LOOK-NNNN del asignador
+    (app/core/sku.py, un UPDATE por lote); los LOOK-NNNN del CSV se reclaman.
+  • COMMIT por lote: memoria y locks acotados; si se corta a medias basta con
+    volver a correrlo.
+
+Mantiene lo que el ORM haría fila a fila: search_document, product_price_summaries
+y la invalidación de cachés ("catalog" + product:<id>), solo de lo escrito.
+
+Uso:
+    report = await import_catalog(db, products=open(...), prices=open(...))
+    report = await import_catalog(db, prices=open(...), dry_run=True)
+"""
+import csv
+import hashlib
+import json
+import time
+import uuid
+from datetime import datetime
+from enum import Enum
+from itertools import islice
+from typing import Any, Iterable, Iterator
+
+from pydantic import ValidationError
+from sqlalchemy import select, update, delete, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError, DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import mark_dirty
+from app.core.price_summary import rebuild_price_summaries
+from app.core.sku import allocate_skus, claim_skus
+from app.models.price import Price, AvailabilityEnum
+from app.models.product import Product, CategoryEnum, build_search_document
+from app.schemas.catalog import ImportReportOut, ImportRowError, ImportChange
+from app.schemas.price import PriceCreate
+from app.schemas.product import ProductCreate
+
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+MAX_REPORTED_CHANGES = 1000
+_SCAN_CHUNK = 5000   # filas por consulta al buscar `removed`
+
+_PRODUCT_FIELDS = set(ProductCreate.model_fields)
+_PRODUCT_REQUIRED = {"id", "name", "brand", "category", "description"}
+_PRICE_REQUIRED = {"product_id", "store", "price_mxn"}
+# Columna CSV → campo de PriceCreate
+_PRICE_COLUMNS = {
+    "product_id": "product_id", "store": "site", "price_mxn": "price", "shipping_mxn": "shipping",
+    "availability": "availability", "url": "url", "currency": "currency",
+}
+
+
+class CatalogFormatError(ValueError):
+    """El archivo no tiene el encabezado esperado."""
+
+
+# ── Lectura ──────────────────────────────────────────────────────────────────
+class _DataLines:
+    """Itera las líneas del archivo saltando comentarios (#) y vacías; recuerda la última línea leída."""
+
+    def __init__(self, stream: Iterable[str]) -> None:
+        self._lines = enumerate(stream, 1)
+        self.line = 0
+
+    def __iter__(self) -> "_DataLines":
+        return self
+
+    def __next__(self) -> str:
+        while True:
+            self.line, text = next(self._lines)
+            stripped = text.strip()
+            if stripped and not stripped.startswith("#"):
+                return text
+
+
+def _read_csv(stream: Iterable[str], required: set[str], label: str) -> tuple[list[str], Iterator[tuple[int, dict]]]:
+    """(encabezado, iterador de (línea, fila)) con valores sin espacios y vacíos como None."""
+    lines = _DataLines(stream)
+    reader = csv.DictReader(lines)
+    header = [h.strip() for h in (reader.fieldnames or [])]
+    missing = required - set(header)
+    if missing:
+        raise CatalogFormatError(f"{label}: faltan columnas {', '.join(sorted(missing))}")
+    reader.fieldnames = header
+
+    def rows() -> Iterator[tuple[int, dict]]:
+        for row in reader:
+            yield lines.line, {
+                k: (v.strip() or None) if isinstance(v, str) else v
+                for k, v in row.items() if k
+            }
+    return header, rows()
+
+
+def _batches(rows: Iterator, size: int) -> Iterator[list]:
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def _format_error(exc: Exception) -> str:
+    if isinstance(exc, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(p) for p in err['loc']) or 'fila'}: {err['msg']}" for err in exc.errors()
+        )
+    return str(exc)
+
+
+def _content_hash(values: dict, columns: list[str]) -> str:
+    """Hash estable de las columnas importadas (con sus nombres: otro encabezado = otro contenido)."""
+    def plain(value: Any) -> Any:
+        return value.value if isinstance(value, Enum) else value
+    payload = json.dumps([[c, plain(values[c])] for c in columns], separators=(",", ":"), default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+# ── Upsert ───────────────────────────────────────────────────────────────────
+def _upsert(dialect: str, table, keys: list[str], update_cols: Iterable[str]):
+    """INSERT … ON CONFLICT DO UPDATE; se ejecuta con la lista de filas (executemany)."""
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    stmt = insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=keys, set_={col: stmt.excluded[col] for col in update_cols},
+    )
+
+
+class _Importer:
+    def __init__(self, db: AsyncSession, batch_size: int, dry_run: bool, prune: bool) -> None:
+        self.db = db
+        self.dialect = db.bind.dialect.name
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.prune = prune and not dry_run
+        self.report = ImportReportOut(dry_run=dry_run, prune=self.prune)
+        self.new_products: set[str] = set()   # dry_run: productos que se insertarían
+
+    def error(self, file: str, line: int, message: str) -> None:
+        if len(self.report.errors) < MAX_REPORTED_ERRORS:
+            self.report.errors.append(ImportRowError(file=file, line=line, error=message))
+        else:
+            self.report.errors_truncated = True
+
+    def change(self, file: str, key: str, action: str) -> None:
+        if not self.dry_run:
+            return
+        if len(self.report.changes) < MAX_REPORTED_CHANGES:
+            self.report.changes.append(ImportChange(file=file, key=key, action=action))
+        else:
+            self.report.changes_truncated = True
+
+    def diff(self, file: str, section, valid: dict, stored: dict) -> list[tuple[int, dict, str]]:
+        """Compara el lote con los hashes guardados; devuelve (línea, fila, acción) de lo que hay que escribir."""
+        pending = []
+        for key, (line, values) in valid.items():
+            if key not in stored:
+                action = "inserted"
+            elif stored[key] == values["content_hash"]:
+                section.unchanged += 1
+                continue
+            else:
+                action = "changed"
+            self.change(file, key if isinstance(key, str) else "/".join(key), action)
+            pending.append((line, values, action))
+        return pending
+
+    async def write(self, file: str, section, rows: list[tuple[int, dict, str]], stmt) -> list[dict]:
+        """
+        Upsert del lote en una sola ejecución; si la BD lo rechaza, fila a fila en
+        SAVEPOINTs. Suma inserted/changed y devuelve las filas escritas.
+        """
+        written = rows
+        if not self.dry_run:
+            try:
+                async with self.db.begin_nested():
+                    await self.db.execute(stmt, [values for _, values, _ in rows])
+            except (IntegrityError, DBAPIError):
+                written = []
+                for row in rows:
+                    try:
+                        async with self.db.begin_nested():
+                            await self.db.execute(stmt, [row[1]])
+                        written.append(row)
+                    except (IntegrityError, DBAPIError) as exc:
+                        section.errors += 1
+                        self.error(file, row[0], f"rechazada por la base de datos: {exc.orig or exc}")
+        for _, _, action in written:
+            setattr(section, action, getattr(section, action) + 1)
+        section.upserted += len(written)
+        return [values for _, values, _ in written]
+
+    async def commit(self, product_ids: Iterable[str]) -> None:
+        product_ids = sorted(set(product_ids))
+        if self.dry_run or not product_ids:
+            return
+        await rebuild_price_summaries(self.db, product_ids)
+        mark_dirty(self.db, "catalog", *(f"product:{pid}" for pid in product_ids))
+        await self.db.commit()
+
+    # ── products.csv ─────────────────────────────────────────────────────────
+    async def products(self, stream: Iterable[str]) -> None:
+        header, rows = _read_csv(stream, _PRODUCT_REQUIRED, "products.csv")
+        section = self.report.products
+        columns = [c for c in header if c in _PRODUCT_FIELDS]
+        hashed = ["id", *columns]
+        # Campos que se actualizan en productos existentes: solo los del CSV
+        stmt = _upsert(
+            self.dialect, Product.__table__, ["id"],
+            [*columns, "search_document", "content_hash", "updated_at"],
+        )
+        has_subcategory = "subcategory" in header
+        seen: set[str] = set()
+
+        for batch in _batches(rows, self.batch_size):
+            section.rows += len(batch)
+            valid: dict[str, tuple[int, dict]] = {}   # id → fila (la última gana)
+            for line, row in batch:
+                if row.get("id"):
+                    seen.add(row["id"])   # también las inválidas: no cuentan como removed
+                try:
+                    values = self._product_values(row, columns)
+                    values["content_hash"] = _content_hash(values, hashed)
+                    valid[values["id"]] = (line, values)
+                except (ValidationError, ValueError) as exc:
+                    section.errors += 1
+                    self.error("products", line, _format_error(exc))
+            if not valid:
+                continue
+
+            stored = {
+                pid: (content_hash, subcategory) for pid, content_hash, subcategory in (await self.db.execute(
+                    select(Product.id, Product.content_hash, Product.subcategory)
+                    .where(Product.id.in_(list(valid)))
+                )).all()
+            }
+            pending = self.diff("products", section, valid, {pid: h for pid, (h, _) in stored.items()})
+            if not pending:
+                continue
+            if not self.dry_run:
+                await self.assign_skus(pending)
+            for _, values, _ in pending:
+                # Sin columna subcategory, el documento de búsqueda usa la ya guardada
+                subcategory = values["subcategory"] if has_subcategory else stored.get(values["id"], (None, None))[1]
+                values["search_document"] = build_search_document(
+                    values["name"], values["brand"], subcategory, values["description"],
+                )
+
+            ids = [values["id"] for values in await self.write("products", section, pending, stmt)]
+            if self.dry_run:
+                self.new_products.update(pid for pid in ids if pid not in stored)
+            await self.commit(ids)
+
+        await self.removed_products(seen)
+
+    async def assign_skus(self, pending: list[tuple[int, dict, str]]) -> None:
+        """SKUs del lote: reclama los LOOK-NNNN del CSV y asigna a los productos nuevos sin sku."""
+        await claim_skus(self.db, (values["sku"] for _, values, _ in pending))
+        missing = [values for _, values, action in pending if action == "inserted" and not values["sku"]]
+        for values, sku in zip(missing, await allocate_skus(self.db, len(missing))):
+            values["sku"] = sku
+
+    @staticmethod
+    def _product_values(row: dict, columns: list[str]) -> dict:
+        pid = row.get("id")
+        if not pid or len(pid) > 36 or any(ch.isspace() for ch in pid):
+            raise ValueError("id: obligatorio, sin espacios y de máximo 36 caracteres")
+        data = ProductCreate(**{c: row[c] for c in columns if row.get(c) is not None})
+        values = data.model_dump()
+        values["category"] = CategoryEnum(data.category.value)
+        now = datetime.utcnow()
+        return {"id": pid, **values, "created_at": now, "updated_at": now}
+
+    async def removed_products(self, seen: set[str]) -> None:
+        section, last_id = self.report.products, ""
+        while True:
+            chunk = (await self.db.execute(
+                select(Product.id)
+                .where(Product.content_hash.is_not(None), Product.id > last_id)
+                .order_by(Product.id).limit(_SCAN_CHUNK)
+            )).scalars().all()
+            if not chunk:
+                return
+            last_id = chunk[-1]
+            gone = [pid for pid in chunk if pid not in seen]
+            section.removed += len(gone)
+            for pid in gone:
+                self.change("products", pid, "removed")
+            if self.prune and gone:
+                # Se desactiva (no se borra: pedidos y carritos lo referencian) y
+                # deja de estar gestionado por la sincronización
+                await self.db.execute(
+                    update(Product).where(Product.id.in_(gone))
+                    .values(is_active=False, content_hash=None, updated_at=datetime.utcnow())
+                    .execution_options(synchronize_session=False)
+                )
+                await self.commit(gone)
+
+    # ── prices.csv ───────────────────────────────────────────────────────────
+    async def prices(self, stream: Iterable[str]) -> None:
+        header, rows = _read_csv(stream, _PRICE_REQUIRED, "prices.csv")
+        section = self.report.prices
+        fields = [_PRICE_COLUMNS[c] for c in header if c in _PRICE_COLUMNS]
+        update_cols = [f for f in fields if f not in ("product_id", "site")]
+        stmt = _upsert(
+            self.dialect, Price.__table__, ["product_id", "site"],
+            [*update_cols, "content_hash", "updated_at"],
+        )
+        seen: set[tuple[str, str]] = set()
+
+        for batch in _batches(rows, self.batch_size):
+            section.rows += len(batch)
+            valid: dict[tuple[str, str], tuple[int, dict]] = {}
+            for line, row in batch:
+                if row.get("product_id") and row.get("store"):
+                    seen.add((row["product_id"], row["store"]))
+                try:
+                    values = self._price_values(row, header)
+                    values["content_hash"] = _content_hash(values, fields)
+                    valid[(values["product_id"], values["site"])] = (line, values)
+                except ValidationError as exc:
+                    section.errors += 1
+                    self.error("prices", line, _format_error(exc))
+            if not valid:
+                continue
+
+            # Precios de productos inexistentes: error por fila en vez de romper la FK
+            product_ids = {pid for pid, _ in valid}
+            known = set((await self.db.execute(
+                select(Product.id).where(Product.id.in_(product_ids))
+            )).scalars()) | (self.new_products & product_ids)
+            for key in [k for k in valid if k[0] not in known]:
+                line, _ = valid.pop(key)
+                section.errors += 1
+                self.error("prices", line, f"product_id {key[0]!r} no existe")
+            if not valid:
+                continue
+
+            stored = dict(
+                ((pid, site), content_hash) for pid, site, content_hash in (await self.db.execute(
+                    select(Price.product_id, Price.site, Price.content_hash)
+                    .where(tuple_(Price.product_id, Price.site).in_(list(valid)))
+                )).all()
+            )
+            pending = self.diff("prices", section, valid, stored)
+            if not pending:
+                continue
+            written = await self.write("prices", section, pending, stmt)
+            await self.commit(values["product_id"] for values in written)
+
+        await self.removed_prices(seen)
+
+    @staticmethod
+    def _price_values(row: dict, header: list[str]) -> dict:
+        data = PriceCreate(**{
+            _PRICE_COLUMNS[c]: row[c] for c in header
+            if c in _PRICE_COLUMNS and row.get(c) is not None
+        })
+        values = data.model_dump()
+        values["availability"] = AvailabilityEnum(data.availability.value)
+        return {"id": str(uuid.uuid4()), **values, "updated_at": datetime.utcnow()}
+
+    async def removed_prices(self, seen: set[tuple[str, str]]) -> None:
+        section, last_id = self.report.prices, ""
+        while True:
+            chunk = (await self.db.execute(
+                select(Price.id, Price.product_id, Price.site)
+                .where(Price.content_hash.is_not(None), Price.id > last_id)
+                .order_by(Price.id).limit(_SCAN_CHUNK)
+            )).all()
+            if not chunk:
+                return
+            last_id = chunk[-1].id
+            gone = [row for row in chunk if (row.product_id, row.site) not in seen]
+            section.removed += len(gone)
+            for row in gone:
+                self.change("prices", f"{row.product_id}/{row.site}", "removed")
+            if self.prune and gone:
+                await self.db.execute(delete(Price).where(Price.id.in_([row.id for row in gone])))
+                await self.commit(row.product_id for row in gone)
+
+
+async def import_catalog(
+    db: AsyncSession,
+    *,
+    products: Iterable[str] | None = None,
+    prices: Iterable[str] | None = None,
+    batch_size: int = BATCH_SIZE,
+    dry_run: bool = False,
+    prune: bool = False,
+) -> ImportReportOut:
+    """
+    Sincroniza products.csv y/o prices.csv (iterables de líneas: archivos abiertos
+    en modo texto). Productos primero, para que sus precios encuentren el id.
+
+    dry_run: solo calcula el diff (report.changes); no escribe nada.
+    prune:   aplica los `removed` de cada archivo recibido (un archivo que no se
+             envía no se compara). Conviene correr antes un dry_run.
+
+    Lanza CatalogFormatError si falta alguna columna obligatoria.
+    """
+    started = time.perf_counter()
+    importer = _Importer(db, batch_size, dry_run, prune)
+    try:
+        if products is not None:
+            await importer.products(products)
+        if prices is not None:
+            await importer.prices(prices)
+    finally:
+        if dry_run:
+            await db.rollback()
+    importer.report.seconds = round(time.perf_counter() - started, 3)
+    return importer.report
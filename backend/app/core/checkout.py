@@ -0,0 +1,205 @@
+"""
+checkout.py — Creación de pedidos por conjuntos (sin N+1) con reserva de stock.
+
+Pipeline de POST /api/orders, todo en la transacción de la request:
+
+  1. Precios   — UNA consulta: products + prices de las tiendas pedidas
+                 (+ product_price_summaries para las líneas sin tienda).
+                 El precio lo pone el servidor: el unit_price del cliente se ignora.
+                   • con selected_site → prices.price de esa tienda
+                   • sin tienda        → products.unit_price (precio Lookaly) o,
+                                         si no tiene, el más barato entre tiendas
+  2. Stock     — UN UPDATE condicional para todos los productos:
+                     UPDATE products SET stock = stock - <qty>
+                     WHERE id IN (…) AND stock >= <qty> RETURNING id
+                 (<qty> es un CASE por id). Los que no vuelven no tenían stock:
+                 se lanza OutOfStock y el rollback de la request deshace el resto.
+                 En PostgreSQL el UPDATE bloquea la fila y, si otra compra la
+                 modificó entretanto, re-evalúa `stock >= qty` sobre el valor
+                 ya confirmado (READ COMMITTED): dos compras concurrentes no
+                 pueden vender la misma unidad.
+  3. Inserción — la cabecera y TODAS las líneas en un INSERT multi-fila.
+  4. Rollups   — suma el pedido a sales_daily / orders_daily (app/core/sales_rollup.py).
+  5. Evento    — order.created en el outbox (app/core/outbox.py), misma transacción.
+
+Cancelar un pedido devuelve su stock (release_stock) y reactivarlo lo vuelve a
+reservar con la misma condición.
+"""
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import and_, case, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import outbox, sales_rollup
+from app.core.cache import mark_dirty
+from app.models.order import Order, OrderItem, OrderStatusEnum
+from app.models.price import Price
+from app.models.price_summary import ProductPriceSummary
+from app.models.product import Product
+
+
+class CheckoutError(Exception):
+    """Error de validación del pedido (el router lo traduce a HTTPException)."""
+
+    def __init__(self, status_code: int, detail: str) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class OutOfStock(CheckoutError):
+    def __init__(self, product_ids: list[str]) -> None:
+        super().__init__(409, f"Stock insuficiente para: {', '.join(product_ids)}")
+        self.product_ids = product_ids
+
+
+@dataclass
+class LineRequest:
+    product_id: str
+    quantity: int
+    selected_site: str | None = None
+
+
+def _money(value) -> Decimal:
+    return Decimal(str(value)).quantize(Decimal("0.01"))
+
+
+async def _resolve_lines(db: AsyncSession, lines: list[LineRequest]) -> list[dict]:
+    """Precio y snapshots de cada línea con una sola consulta."""
+    product_ids = {line.product_id for line in lines}
+    sites = {line.selected_site for line in lines if line.selected_site}
+    query = (
+        select(
+            Product.id, Product.name, Product.brand, Product.category, Product.unit_price,
+            ProductPriceSummary.min_price, ProductPriceSummary.cheapest_site,
+            Price.site, Price.price,
+        )
+        .join(ProductPriceSummary, ProductPriceSummary.product_id == Product.id)
+        .outerjoin(Price, and_(Price.product_id == Product.id, Price.site.in_(sites)))
+        .where(Product.id.in_(product_ids), Product.is_active == True)  # noqa: E712
+    )
+    products: dict[str, object] = {}
+    site_prices: dict[tuple[str, str], Decimal] = {}
+    for row in (await db.execute(query)).all():
+        products[row.id] = row
+        if row.site is not None:
+            site_prices[(row.id, row.site)] = row.price
+
+    resolved = []
+    for line in lines:
+        product = products.get(line.product_id)
+        if product is None:
+            raise CheckoutError(404, f"Producto '{line.product_id}' no encontrado o no disponible")
+        if line.selected_site:
+            price, site = site_prices.get((line.product_id, line.selected_site)), line.selected_site
+            if price is None:
+                raise CheckoutError(409, f"'{product.name}' ya no tiene precio en {line.selected_site}")
+        elif product.unit_price is not None:
+            price, site = product.unit_price, None
+        elif product.min_price is not None:
+            price, site = product.min_price, product.cheapest_site
+        else:
+            raise CheckoutError(409, f"'{product.name}' no tiene precio")
+        unit_price = _money(price)
+        resolved.append(dict(
+            product_id=line.product_id,
+            quantity=line.quantity,
+            unit_price=unit_price,
+            subtotal=unit_price * line.quantity,
+            site=site,
+            product_name=product.name,
+            product_brand=product.brand,
+            product_category=product.category.value,
+        ))
+    return resolved
+
+
+def _quantities(lines) -> dict[str, int]:
+    totals: dict[str, int] = {}
+    for line in lines:
+        totals[line["product_id"]] = totals.get(line["product_id"], 0) + line["quantity"]
+    return totals
+
+
+async def reserve_stock(db: AsyncSession, quantities: dict[str, int]) -> None:
+    """Descuenta stock de todos los productos en un UPDATE condicional; OutOfStock si falta."""
+    if not quantities:
+        return
+    qty = case(quantities, value=Product.id)
+    reserved = set((await db.execute(
+        update(Product)
+        .where(Product.id.in_(quantities.keys()), Product.stock >= qty)
+        .values(stock=Product.stock - qty)
+        .returning(Product.id)
+        .execution_options(synchronize_session=False)
+    )).scalars())
+    short = sorted(quantities.keys() - reserved)
+    if short:
+        raise OutOfStock(short)
+    mark_dirty(db, "catalog", *(f"product:{pid}" for pid in quantities))
+
+
+async def release_stock(db: AsyncSession, quantities: dict[str, int]) -> None:
+    """Devuelve stock (pedido cancelado)."""
+    if not quantities:
+        return
+    qty = case(quantities, value=Product.id)
+    await db.execute(
+        update(Product)
+        .where(Product.id.in_(quantities.keys()))
+        .values(stock=Product.stock + qty)
+        .execution_options(synchronize_session=False)
+    )
+    mark_dirty(db, "catalog", *(f"product:{pid}" for pid in quantities))
+
+
+def order_quantities(order: Order) -> dict[str, int]:
+    """Cantidades por producto de un pedido (líneas cuyo producto aún existe)."""
+    return _quantities(
+        {"product_id": item.product_id, "quantity": item.quantity}
+        for item in order.order_items if item.product_id
+    )
+
+
+async def create_order(
+    db: AsyncSession,
+    user_id: str,
+    lines: list[LineRequest],
+    shipping_address: str | None = None,
+) -> dict:
+    """
+    Pedido + líneas + reserva de stock. Devuelve el pedido como dict (mismas
+    claves que OrderOut) sin volver a leerlo de la BD.
+    """
+    resolved = await _resolve_lines(db, lines)
+    await reserve_stock(db, _quantities(resolved))
+
+    now = datetime.utcnow()
+    order = dict(
+        id=str(uuid.uuid4()),
+        user_id=user_id,
+        status=OrderStatusEnum.pending,
+        shipping_address=shipping_address,
+        total=sum((line["subtotal"] for line in resolved), Decimal("0.00")),
+        item_count=len(resolved),
+        created_at=now,
+        paid_at=None,
+        updated_at=now,
+    )
+    items = [
+        dict(id=str(uuid.uuid4()), order_id=order["id"], order_created_at=now, **line)
+        for line in resolved
+    ]
+    await db.execute(insert(Order), [order])
+    await db.execute(insert(OrderItem), items)
+    await sales_rollup.order_created(db, order["id"], now, order["total"])
+    outbox.emit(db, outbox.ORDER_CREATED, order["id"], {
+        "user_id": user_id,
+        "status": order["status"].value,
+        "total": str(order["total"]),
+        "item_count": order["item_count"],
+    })
+    return {**order, "order_items": items}
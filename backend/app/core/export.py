@@ -0,0 +1,123 @@
+"""
+export.py — Exportación en streaming (CSV / NDJSON) de tablas completas.
+
+Para volcados del back-office / BI sin paginar el listado (que recalcula el
+COUNT en cada página):
+
+  • La consulta se recorre con un cursor del servidor (stream + yield_per): la
+    BD entrega bloques de EXPORT_CHUNK filas y cada bloque se escribe al
+    cliente antes de pedir el siguiente. Memoria constante sin importar el
+    tamaño de la tabla.
+  • Conexión propia (no la sesión de la request: FastAPI la cierra antes de
+    enviar el cuerpo) en REPEATABLE READ en PostgreSQL: todo el volcado ve la
+    misma foto aunque haya escrituras mientras tanto.
+  • CSV con encabezado; NDJSON = un objeto JSON por línea.
+
+Uso en un endpoint:
+
+    return export_response(
+        "csv", "lookaly-products",
+        header=["id", "name"], batches=stream_rows(select(Product.id, Product.name)),
+    )
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, AsyncIterator, Literal, Sequence
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+
+from app.database import engine
+
+EXPORT_CHUNK = 1000
+
+ExportFormat = Literal["csv", "ndjson"]
+
+_MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+
+async def stream_rows(stmt: Select, chunk: int = EXPORT_CHUNK) -> AsyncIterator[Sequence]:
+    """Bloques de hasta `chunk` filas leídos con un cursor del servidor."""
+    async with engine.connect() as conn:
+        if conn.dialect.name == "postgresql":
+            conn = await conn.execution_options(isolation_level="REPEATABLE READ")
+        result = await conn.stream(stmt.execution_options(yield_per=chunk))
+        async for rows in result.partitions(chunk):
+            yield rows
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+async def _csv_body(header: list[str], batches: AsyncIterator[Sequence]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(header)
+    yield buffer.getvalue().encode()
+    async for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_value(v) for v in row] for row in rows)
+        yield buffer.getvalue().encode()
+
+
+async def _ndjson_body(batches: AsyncIterator[Sequence[dict]]) -> AsyncIterator[bytes]:
+    async for objects in batches:
+        yield "".join(
+            json.dumps(obj, ensure_ascii=False, default=_json_value) + "\n" for obj in objects
+        ).encode()
+
+
+async def _as_objects(header: list[str], batches: AsyncIterator[Sequence]) -> AsyncIterator[list[dict]]:
+    async for rows in batches:
+        yield [{k: _json_value(v) for k, v in zip(header, row)} for row in rows]
+
+
+def export_response(
+    fmt: ExportFormat,
+    filename: str,
+    *,
+    header: list[str],
+    batches: AsyncIterator[Sequence],
+) -> StreamingResponse:
+    """Respuesta en streaming para filas planas (una fila de la consulta = una fila/objeto)."""
+    body = _csv_body(header, batches) if fmt == "csv" else _ndjson_body(_as_objects(header, batches))
+    return _response(fmt, filename, body)
+
+
+def ndjson_response(filename: str, objects: AsyncIterator[Sequence[dict]]) -> StreamingResponse:
+    """NDJSON de objetos ya armados (p. ej. un pedido con sus líneas anidadas)."""
+    return _response("ndjson", filename, _ndjson_body(objects))
+
+
+def _response(fmt: ExportFormat, filename: str, body: AsyncIterator[bytes]) -> StreamingResponse:
+    stamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+    return StreamingResponse(
+        body,
+        media_type=_MEDIA_TYPES[fmt],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}-{stamp}.{fmt}"',
+            "Cache-Control": "no-store",
+        },
+    )
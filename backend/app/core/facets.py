@@ -0,0 +1,109 @@
+"""
+facets.py — Conteos de facetas del catálogo en una sola consulta.
+
+Para el conjunto de filtros actual cuenta productos por categoría, marca,
+subcategoría, tienda y rango de precio (precio más bajo entre tiendas).
+Los conteos son conjuntivos: cada faceta respeta TODOS los filtros activos.
+
+  PostgreSQL  GROUP BY GROUPING SETS ((category), (brand), (subcategory),
+              (bucket), (site), ()) sobre products ⋈ summary ⟕ prices:
+              una sola pasada; GROUPING(col) indica a qué faceta pertenece
+              cada fila. COUNT(DISTINCT id) porque el join con prices repite
+              el producto una vez por tienda.
+  SQLite      Sin GROUPING SETS: UNION ALL de un GROUP BY por faceta sobre
+              el mismo CTE filtrado (misma sentencia, mismo resultado).
+
+El resultado se cachea por conjunto de filtros normalizado (ver facet_cache en
+routers/products.py) y se invalida con la etiqueta "catalog" (app/core/cache.py).
+"""
+from sqlalchemy import String, case, cast, func, literal, literal_column, null, select, tuple_, union_all
+
+from app.models.price import Price
+from app.models.price_summary import ProductPriceSummary
+from app.models.product import Product
+
+# Rangos de precio: (mínimo incluido, máximo excluido | None = sin tope)
+PRICE_BUCKETS: list[tuple[int, int | None]] = [
+    (0, 200), (200, 500), (500, 1000), (1000, 2000), (2000, None),
+]
+FACETS = ("category", "brand", "subcategory", "price", "store")
+
+
+def bucket_label(low: int, high: int | None) -> str:
+    return f"{low}-{high}" if high is not None else f"{low}+"
+
+
+def _price_bucket():
+    """
+    Etiqueta del rango de min_price; NULL si el producto no tiene precios.
+    Límites y etiquetas van como literales (constantes de este módulo, no input
+    del usuario): PostgreSQL exige que la expresión del SELECT sea idéntica a la
+    del GROUP BY, y con parámetros no podría comprobarlo.
+    """
+    min_price = ProductPriceSummary.min_price
+    whens = [(min_price.is_(None), null())]
+    whens += [
+        (min_price < literal_column(str(high)), literal_column(f"'{bucket_label(low, high)}'", String))
+        for low, high in PRICE_BUCKETS if high is not None
+    ]
+    low, _ = PRICE_BUCKETS[-1]
+    return case(*whens, else_=literal_column(f"'{bucket_label(low, None)}'", String))
+
+
+def _facet_columns() -> dict:
+    return {
+        "category": cast(Product.category, String),
+        "brand": Product.brand,
+        "subcategory": Product.subcategory,
+        "price": _price_bucket(),
+        "store": Price.site,
+    }
+
+
+async def compute_facets(db, catalog_query, dialect: str) -> dict:
+    """
+    `catalog_query` es el SELECT filtrado de _catalog_query (products ⋈ summary).
+    Devuelve {"total": n, "category": {valor: n}, …} con los valores NULL omitidos.
+    """
+    columns = _facet_columns()
+    result: dict = {name: {} for name in FACETS}
+    result["total"] = 0
+
+    if dialect == "postgresql":
+        labelled = [col.label(name) for name, col in columns.items()]
+        grouped = [func.grouping(col).label(f"g_{name}") for name, col in columns.items()]
+        stmt = (
+            catalog_query
+            .with_only_columns(*labelled, *grouped, func.count(Product.id.distinct()))
+            .outerjoin(Price, Price.product_id == Product.id)
+            .group_by(func.grouping_sets(*(tuple_(col) for col in columns.values()), tuple_()))
+        )
+        for row in (await db.execute(stmt)).all():
+            mapping = row._mapping
+            count = row[-1]
+            facet = next((name for name in columns if mapping[f"g_{name}"] == 0), None)
+            if facet is None:
+                result["total"] = count
+            elif mapping[facet] is not None:
+                result[facet][mapping[facet]] = count
+        return result
+
+    rows = (
+        catalog_query
+        .with_only_columns(Product.id, *(col.label(name) for name, col in columns.items()))
+        .outerjoin(Price, Price.product_id == Product.id)
+        .cte("facet_rows")
+    )
+    parts = [
+        select(literal(name).label("facet"), rows.c[name].label("value"), func.count(rows.c.id.distinct()))
+        .where(rows.c[name].is_not(None))
+        .group_by(rows.c[name])
+        for name in columns
+    ]
+    parts.append(select(literal("total"), literal(None, String), func.count(rows.c.id.distinct())))
+    for facet, value, count in (await db.execute(union_all(*parts))).all():
+        if facet == "total":
+            result["total"] = count
+        else:
+            result[facet][value] = count
+    return result
@@ -0,0 +1,251 @@
+"""
+idempotency.py — Cabecera Idempotency-Key para escrituras reintentables.
+
+Los clientes móviles reintentan POST /api/orders tras un timeout y a veces el
+primer intento sí había llegado: pedido duplicado. Con `Idempotency-Key: <uuid>`:
+
+  • Primera petición con esa clave: se ejecuta, se hace COMMIT y se guarda la
+    respuesta (status + cuerpo JSON) durante IDEMPOTENCY_TTL segundos.
+  • Reintentos con la misma clave: se devuelve la respuesta guardada SIN volver
+    a ejecutar la transacción (cabecera Idempotent-Replayed: true).
+  • Duplicado concurrente (la primera sigue en curso): espera a que termine y
+    devuelve su respuesta; si no termina en IDEMPOTENCY_WAIT_TIMEOUT → 409.
+  • Misma clave con otro cuerpo o en otro endpoint → 422.
+  • Si la primera falla (HTTPException, error de BD) no se guarda nada: la
+    transacción se deshizo y el reintento se ejecuta de nuevo.
+
+La clave es por usuario (dos usuarios pueden usar el mismo valor sin verse).
+Sin la cabecera el endpoint funciona igual que antes.
+
+Almacenes (IdempotencyStore):
+  • MemoryIdempotencyStore — LRU acotado a IDEMPOTENCY_MAX_KEYS + TTL, por
+    proceso. Por defecto; suficiente con un solo worker.
+  • RedisIdempotencyStore  — compartido entre workers / réplicas (REDIS_URL).
+    La "reserva" de la clave es un SET NX con caducidad.
+
+Uso en un endpoint:
+
+    @router.post("", response_model=OrderOut, status_code=201)
+    async def create_order(data: OrderCreate, request: Request, db = Depends(get_db), user = Depends(...)):
+        async def build():
+            ...
+            return order
+        return await idempotency.run(request, db, user.id, build, model=OrderOut, status_code=201)
+"""
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, NamedTuple, Protocol
+
+from fastapi import HTTPException, Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+class StoredResponse(NamedTuple):
+    fingerprint: str          # hash de método + ruta + cuerpo de la petición original
+    status_code: int
+    body: bytes
+
+
+class IdempotencyStore(Protocol):
+    async def get(self, key: str) -> StoredResponse | None: ...
+
+    async def claim(self, key: str) -> bool:
+        """Reserva la clave para una petición en curso; False si ya la tiene otra."""
+
+    async def complete(self, key: str, response: StoredResponse) -> None: ...
+
+    async def release(self, key: str) -> None:
+        """Libera la reserva sin guardar respuesta (la petición falló)."""
+
+    async def wait(self, key: str, timeout: float) -> bool:
+        """Espera a que la petición en curso termine; False si se agota el tiempo."""
+
+
+class MemoryIdempotencyStore:
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[str, tuple[StoredResponse, float]] = OrderedDict()
+        self._in_flight: dict[str, asyncio.Event] = {}
+
+    async def get(self, key: str) -> StoredResponse | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[1] < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return entry[0]
+
+    async def claim(self, key: str) -> bool:
+        if key in self._in_flight or await self.get(key) is not None:
+            return False
+        self._in_flight[key] = asyncio.Event()
+        return True
+
+    async def complete(self, key: str, response: StoredResponse) -> None:
+        self._data[key] = (response, time.monotonic() + self.ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+        await self.release(key)
+
+    async def release(self, key: str) -> None:
+        event = self._in_flight.pop(key, None)
+        if event is not None:
+            event.set()
+
+    async def wait(self, key: str, timeout: float) -> bool:
+        event = self._in_flight.get(key)
+        if event is None:
+            return True
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+
+class RedisIdempotencyStore:
+    """Respuestas en `idem:<clave>` (EX ttl) y reserva en `idem-lock:<clave>` (SET NX PX)."""
+
+    _POLL_SECONDS = 0.05
+
+    def __init__(self, url: str, ttl: float, lock_ttl: float) -> None:
+        import redis.asyncio as redis  # solo si se configura REDIS_URL
+
+        self.redis = redis.from_url(url)
+        self.ttl = int(ttl)
+        self.lock_ms = int(lock_ttl * 1000)
+
+    async def get(self, key: str) -> StoredResponse | None:
+        raw = await self.redis.get(f"idem:{key}")
+        if raw is None:
+            return None
+        data = json.loads(raw)
+        return StoredResponse(data["fingerprint"], data["status_code"], data["body"].encode())
+
+    async def claim(self, key: str) -> bool:
+        return bool(await self.redis.set(f"idem-lock:{key}", b"1", nx=True, px=self.lock_ms))
+
+    async def complete(self, key: str, response: StoredResponse) -> None:
+        data = json.dumps({
+            "fingerprint": response.fingerprint,
+            "status_code": response.status_code,
+            "body": response.body.decode(),
+        })
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.set(f"idem:{key}", data, ex=self.ttl)
+            pipe.delete(f"idem-lock:{key}")
+            await pipe.execute()
+
+    async def release(self, key: str) -> None:
+        await self.redis.delete(f"idem-lock:{key}")
+
+    async def wait(self, key: str, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while await self.redis.exists(f"idem-lock:{key}"):
+            if time.monotonic() > deadline:
+                return False
+            await asyncio.sleep(self._POLL_SECONDS)
+        return True
+
+
+class Idempotency:
+    def __init__(self, store: IdempotencyStore, wait_timeout: float) -> None:
+        self.store = store
+        self.wait_timeout = wait_timeout
+        self._adapters: dict[Any, TypeAdapter] = {}
+
+    def _serialize(self, model: Any, value: Any) -> bytes:
+        if model is None:
+            return b""
+        adapter = self._adapters.get(model)
+        if adapter is None:
+            adapter = self._adapters[model] = TypeAdapter(model)
+        return adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+
+    @staticmethod
+    def _response(stored: StoredResponse, replayed: bool) -> Response:
+        headers = {"Idempotent-Replayed": "true"} if replayed else {}
+        if not stored.body:
+            return Response(status_code=stored.status_code, headers=headers)
+        return Response(
+            content=stored.body, status_code=stored.status_code,
+            media_type="application/json", headers=headers,
+        )
+
+    async def run(
+        self,
+        request: Request,
+        db: AsyncSession,
+        user_id: str,
+        build: Callable[[], Awaitable[Any]],
+        *,
+        model: Any = None,
+        status_code: int = 200,
+    ) -> Any:
+        """
+        Ejecuta `build` una sola vez por (usuario, Idempotency-Key). `model` es el
+        response_model del endpoint (None para respuestas sin cuerpo, p. ej. 204).
+        """
+        raw_key = request.headers.get(HEADER)
+        if raw_key is None:
+            return await build()
+        if not raw_key or len(raw_key) > MAX_KEY_LENGTH:
+            raise HTTPException(status_code=400, detail=f"{HEADER} inválida (1–{MAX_KEY_LENGTH} caracteres)")
+
+        key = hashlib.sha256(f"{user_id}\0{raw_key}".encode()).hexdigest()
+        fingerprint = hashlib.sha256(
+            request.method.encode() + b" " + request.url.path.encode() + b"\0" + await request.body()
+        ).hexdigest()
+
+        while True:
+            stored = await self.store.get(key)
+            if stored is not None:
+                if stored.fingerprint != fingerprint:
+                    raise HTTPException(
+                        status_code=422,
+                        detail=f"{HEADER} ya usada con otra petición; genera una clave nueva",
+                    )
+                return self._response(stored, replayed=True)
+            if await self.store.claim(key):
+                break
+            # Duplicado concurrente: esperar a la petición en curso y volver a mirar
+            if not await self.store.wait(key, self.wait_timeout):
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Una petición con la misma {HEADER} sigue en curso; reintenta en unos segundos",
+                )
+
+        try:
+            body = self._serialize(model, await build())
+            # COMMIT antes de guardar: solo se repite lo que de verdad quedó escrito
+            await db.commit()
+        except BaseException:
+            await self.store.release(key)
+            raise
+        stored = StoredResponse(fingerprint, status_code, body)
+        await self.store.complete(key, stored)
+        return self._response(stored, replayed=False)
+
+
+def _make_store() -> IdempotencyStore:
+    if settings.REDIS_URL:
+        return RedisIdempotencyStore(
+            settings.REDIS_URL, ttl=settings.IDEMPOTENCY_TTL, lock_ttl=settings.IDEMPOTENCY_WAIT_TIMEOUT * 2,
+        )
+    return MemoryIdempotencyStore(maxsize=settings.IDEMPOTENCY_MAX_KEYS, ttl=settings.IDEMPOTENCY_TTL)
+
+
+idempotency = Idempotency(_make_store(), wait_timeout=settings.IDEMPOTENCY_WAIT_TIMEOUT)
@@ -0,0 +1,212 @@
+"""
+order_partitions.py — Particiones mensuales de orders / order_items y archivado.
+
+En PostgreSQL ambas tablas están particionadas por RANGE del mes de creación:
+
+    orders       PARTITION BY RANGE (created_at)        → orders_2026_01, …
+    order_items  PARTITION BY RANGE (order_created_at)  → order_items_2026_01, …
+                 (order_created_at = orders.created_at: cada línea vive en el
+                 mismo mes que su pedido; FK compuesta (order_id, order_created_at))
+
+más una partición DEFAULT por tabla como red de seguridad (fechas fuera de las
+particiones creadas). Las lecturas siguen yendo a `orders` / `order_items`:
+_get_order_or_404, my_orders y el listado admin no cambian. Las consultas con
+rango de fechas (export, rollups, listado por created_at) solo tocan los meses
+del rango; el resto baja por los índices de cada partición.
+
+Mantenimiento (lifespan de la app y backend/archive_orders.py):
+
+  • ensure_partitions — crea las particiones del mes actual y de los
+    ORDER_PARTITIONS_AHEAD siguientes (y las DEFAULT) si faltan.
+  • archive_partitions — los meses terminados hace más de
+    ORDER_ARCHIVE_AFTER_DAYS cuyos pedidos están TODOS delivered o cancelled
+    pasan a "fríos": se mueven al tablespace ORDER_ARCHIVE_TABLESPACE (disco
+    barato, si se configura) con sus índices y se congelan con VACUUM (FREEZE)
+    para que autovacuum no vuelva a recorrerlos. Siguen siendo parte de la
+    tabla: las lecturas no cambian. Un mes con pedidos abiertos no se archiva
+    y se informa (blocked) para cerrarlos a mano.
+
+La unidad de archivado es el MES (la partición), no el pedido: mover pedidos
+sueltos a otra tabla rompería la FK compuesta de order_items y obligaría a
+leer de dos sitios. Por eso un solo pedido abierto retiene su mes entero.
+Un mes archivado es de solo lectura: admin_update_order lo rechaza con 409
+(is_archived) para que un cancelado no vuelva a pending, reserve stock y
+despierte la partición congelada.
+
+Copia comprimida fuera de la BD: export_analytics.py ya escribe cada mes de
+pedidos y líneas en Parquet.
+
+Fuera de PostgreSQL (SQLite en desarrollo) las tablas no se particionan y
+todo esto es un no-op.
+"""
+import logging
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+from app.config import settings
+from app.models.order import OrderStatusEnum
+
+logger = logging.getLogger("lookaly")
+
+# tabla → columna de partición
+PARTITIONED_TABLES = {"orders": "created_at", "order_items": "order_created_at"}
+FINAL_STATUSES = (OrderStatusEnum.delivered, OrderStatusEnum.cancelled)
+ARCHIVED_MARK = "lookaly:archived"
+
+
+def add_months(month: date, n: int) -> date:
+    years, index = divmod(month.month - 1 + n, 12)
+    return date(month.year + years, index + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_{month:%Y_%m}"
+
+
+def _quote(conn: AsyncConnection, name: str) -> str:
+    return conn.dialect.identifier_preparer.quote(name)
+
+
+async def is_partitioned(conn: AsyncConnection) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    return bool(await conn.scalar(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('orders'))"
+    )))
+
+
+async def is_archived(db: AsyncSession, created_at: datetime) -> bool:
+    """¿El pedido creado en `created_at` vive en una partición ya archivada?"""
+    if db.bind.dialect.name != "postgresql":
+        return False
+    # to_regclass → NULL si la partición no existe (o la tabla no está particionada)
+    comment = await db.scalar(text(
+        "SELECT obj_description(to_regclass(:name), 'pg_class')"
+    ), {"name": partition_name("orders", created_at.date().replace(day=1))})
+    return (comment or "").startswith(ARCHIVED_MARK)
+
+
+async def _partitions(conn: AsyncConnection, table: str) -> dict[str, str | None]:
+    """Particiones de `table` → comentario (ARCHIVED_MARK si ya está archivada)."""
+    rows = await conn.execute(text(
+        "SELECT c.relname, obj_description(c.oid, 'pg_class') "
+        "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:table)"
+    ), {"table": table})
+    return {name: comment for name, comment in rows.all()}
+
+
+async def ensure_partitions(
+    conn: AsyncConnection,
+    months_ahead: int | None = None,
+    today: date | None = None,
+) -> list[str]:
+    """Crea las particiones mensuales que falten (mes actual + `months_ahead`) y las DEFAULT."""
+    if not await is_partitioned(conn):
+        return []
+    months_ahead = settings.ORDER_PARTITIONS_AHEAD if months_ahead is None else months_ahead
+    first = (today or datetime.utcnow().date()).replace(day=1)
+    created = []
+    for table, key in PARTITIONED_TABLES.items():
+        existing = await _partitions(conn, table)
+        default = f"{table}_default"
+        for n in range(months_ahead + 1):
+            month = add_months(first, n)
+            name = partition_name(table, month)
+            if name in existing:
+                continue
+            bounds = (month, add_months(month, 1))
+            # Filas de ese mes ya en DEFAULT: PostgreSQL no deja crear la partición
+            if default in existing and await conn.scalar(text(
+                f"SELECT EXISTS (SELECT 1 FROM {_quote(conn, default)} WHERE {key} >= :lo AND {key} < :hi)"
+            ), {"lo": bounds[0], "hi": bounds[1]}):
+                logger.warning("%s: hay filas de %s en %s; no se crea la partición", table, f"{month:%Y-%m}", default)
+                continue
+            await conn.execute(text(
+                f"CREATE TABLE {_quote(conn, name)} PARTITION OF {_quote(conn, table)} "
+                f"FOR VALUES FROM ('{bounds[0].isoformat()}') TO ('{bounds[1].isoformat()}')"
+            ))
+            created.append(name)
+        if default not in existing:
+            await conn.execute(text(
+                f"CREATE TABLE {_quote(conn, default)} PARTITION OF {_quote(conn, table)} DEFAULT"
+            ))
+            created.append(default)
+    return created
+
+
+@dataclass
+class ArchiveReport:
+    created: list[str] = field(default_factory=list)      # particiones nuevas
+    archived: list[str] = field(default_factory=list)     # meses "YYYY-MM" archivados
+    blocked: dict[str, int] = field(default_factory=dict)  # mes → pedidos sin cerrar
+
+
+async def _move_to_tablespace(conn: AsyncConnection, name: str, tablespace: str) -> None:
+    quoted_ts = _quote(conn, tablespace)
+    await conn.execute(text(f"ALTER TABLE {_quote(conn, name)} SET TABLESPACE {quoted_ts}"))
+    indexes = (await conn.execute(text(
+        "SELECT indexrelid::regclass::text FROM pg_index WHERE indrelid = to_regclass(:name)"
+    ), {"name": name})).scalars().all()
+    for index in indexes:  # ya viene entrecomillado si hace falta
+        await conn.execute(text(f"ALTER INDEX {index} SET TABLESPACE {quoted_ts}"))
+
+
+async def archive_partitions(
+    engine: AsyncEngine,
+    older_than_days: int | None = None,
+    tablespace: str | None = None,
+    today: date | None = None,
+) -> ArchiveReport:
+    """
+    Crea las particiones que falten y archiva los meses fríos (ver docstring
+    del módulo). Cada mes se archiva en su propia transacción; el VACUUM va
+    después, fuera de transacción (AUTOCOMMIT).
+    """
+    report = ArchiveReport()
+    older_than_days = settings.ORDER_ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    tablespace = settings.ORDER_ARCHIVE_TABLESPACE if tablespace is None else tablespace
+    today = today or datetime.utcnow().date()
+
+    async with engine.begin() as conn:
+        if not await is_partitioned(conn):
+            return report
+        report.created = await ensure_partitions(conn, today=today)
+        partitions = await _partitions(conn, "orders")
+
+    cutoff = today - timedelta(days=older_than_days)
+    final = ", ".join(f"'{status.name}'" for status in FINAL_STATUSES)
+    to_freeze = []
+    for name, comment in sorted(partitions.items()):
+        try:
+            month = datetime.strptime(name, "orders_%Y_%m").date()
+        except ValueError:
+            continue  # orders_default
+        if (comment or "").startswith(ARCHIVED_MARK) or add_months(month, 1) > cutoff:
+            continue
+        async with engine.begin() as conn:
+            open_orders = await conn.scalar(text(
+                f"SELECT count(*) FROM {_quote(conn, name)} WHERE status NOT IN ({final})"
+            ))
+            if open_orders:
+                report.blocked[f"{month:%Y-%m}"] = open_orders
+                continue
+            for table in PARTITIONED_TABLES:
+                part = partition_name(table, month)
+                if tablespace:
+                    await _move_to_tablespace(conn, part, tablespace)
+                await conn.execute(text(
+                    f"COMMENT ON TABLE {_quote(conn, part)} IS '{ARCHIVED_MARK} {today.isoformat()}'"
+                ))
+                to_freeze.append(part)
+        report.archived.append(f"{month:%Y-%m}")
+
+    if to_freeze:
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            for part in to_freeze:
+                await conn.execute(text(f"VACUUM (FREEZE, ANALYZE) {_quote(conn, part)}"))
+    return report
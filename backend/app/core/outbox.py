@@ -0,0 +1,259 @@
+"""
+outbox.py — Transactional outbox de eventos de pedidos y su dispatcher.
+
+Los efectos secundarios de un pedido (emails, sincronizar inventario con
+sistemas externos…) no se hacen dentro de la request: la request solo inserta
+un OutboxEvent en su misma transacción (emit) y responde. Si hace rollback,
+el evento desaparece con ella; si hace commit, el evento queda garantizado.
+
+El dispatcher entrega los eventos en segundo plano:
+
+  • Reclama lotes de OUTBOX_BATCH pendientes con SELECT … FOR UPDATE SKIP
+    LOCKED: varios dispatchers (tarea en la app + worker dispatch_outbox.py,
+    varias réplicas) se reparten la cola sin esperarse ni repetir eventos.
+  • Cada evento corre sus handlers dentro de un SAVEPOINT: si uno falla, lo
+    que escribió en la BD se deshace y el resto del lote sigue.
+  • Fallo → reintento con backoff exponencial (OUTBOX_BACKOFF_BASE · 2^(n-1),
+    tope OUTBOX_BACKOFF_MAX); tras OUTBOX_MAX_ATTEMPTS el evento queda muerto
+    (failed_at) para revisarlo a mano.
+  • Entrega al-menos-una-vez: un handler puede ver el mismo evento dos veces
+    (p. ej. si el proceso muere antes del COMMIT). El webhook manda
+    Idempotency-Key: outbox-<id> para que el receptor deduplique.
+  • Purga los eventos procesados hace más de OUTBOX_RETENTION_DAYS.
+
+Métricas (outbox_metrics, GET /api/orders/admin/events/metrics): pendientes,
+vencidos, muertos y lag = antigüedad del evento pendiente más viejo.
+
+Los rollups de ventas NO van por aquí: son parte de la consistencia del
+pedido y se actualizan en la misma transacción (app/core/sales_rollup.py).
+
+Registrar un handler:
+
+    @outbox.handler(ORDER_STATUS_CHANGED)
+    async def notify_shipped(db: AsyncSession, event: OutboxEvent) -> None:
+        if event.payload["status"] == "shipped":
+            ...
+"""
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable
+
+import httpx
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.models.outbox import OutboxEvent
+
+logger = logging.getLogger("lookaly")
+
+ORDER_CREATED = "order.created"
+ORDER_STATUS_CHANGED = "order.status_changed"
+
+Handler = Callable[[AsyncSession, OutboxEvent], Awaitable[None]]
+_handlers: dict[str, list[Handler]] = {}
+
+_PENDING = (OutboxEvent.processed_at.is_(None), OutboxEvent.failed_at.is_(None))
+
+
+def handler(*topics: str) -> Callable[[Handler], Handler]:
+    """Decorador: registra `fn` para los topics indicados."""
+    def register(fn: Handler) -> Handler:
+        for topic in topics:
+            _handlers.setdefault(topic, []).append(fn)
+        return fn
+    return register
+
+
+def emit(db: AsyncSession, topic: str, aggregate_id: str, payload: dict[str, Any]) -> None:
+    """Encola un evento en la transacción de `db` (se publica solo si hace commit)."""
+    now = datetime.utcnow()
+    db.add(OutboxEvent(
+        topic=topic, aggregate_id=aggregate_id, payload=payload, created_at=now, available_at=now,
+    ))
+
+
+# ── Handlers de pedidos ───────────────────────────────────────────────────────
+
+@handler(ORDER_CREATED, ORDER_STATUS_CHANGED)
+async def log_order_event(db: AsyncSession, event: OutboxEvent) -> None:
+    logger.info("evento %s pedido=%s %s", event.topic, event.aggregate_id, event.payload)
+
+
+_http: httpx.AsyncClient | None = None
+
+
+@handler(ORDER_CREATED, ORDER_STATUS_CHANGED)
+async def post_order_webhook(db: AsyncSession, event: OutboxEvent) -> None:
+    """POST del evento a ORDER_EVENTS_WEBHOOK_URL (emails, sync de inventario…); no-op sin URL."""
+    global _http
+    if not settings.ORDER_EVENTS_WEBHOOK_URL:
+        return
+    if _http is None:
+        _http = httpx.AsyncClient(timeout=settings.ORDER_EVENTS_WEBHOOK_TIMEOUT)
+    response = await _http.post(
+        settings.ORDER_EVENTS_WEBHOOK_URL,
+        json={
+            "id": event.id,
+            "topic": event.topic,
+            "order_id": event.aggregate_id,
+            "payload": event.payload,
+            "created_at": event.created_at.isoformat(),
+        },
+        headers={"Idempotency-Key": f"outbox-{event.id}"},
+    )
+    response.raise_for_status()
+
+
+async def close_http() -> None:
+    global _http
+    if _http is not None:
+        await _http.aclose()
+        _http = None
+
+
+# ── Dispatcher ─────────────────────────────────────────────────────────────────
+
+@dataclass
+class DispatchReport:
+    processed: int = 0
+    retried: int = 0
+    dead: int = 0
+    purged: int = 0
+
+
+@dataclass
+class DispatcherStats:
+    """Contadores del dispatcher de ESTE proceso (la tarea de la app)."""
+    running: bool = False
+    processed: int = 0
+    retried: int = 0
+    dead: int = 0
+    last_run_at: datetime | None = None
+    last_run_ms: float | None = None
+    errors: list[str] = field(default_factory=list)
+
+
+stats = DispatcherStats()
+
+
+def backoff(attempts: int) -> timedelta:
+    return timedelta(seconds=min(settings.OUTBOX_BACKOFF_BASE * 2 ** (attempts - 1), settings.OUTBOX_BACKOFF_MAX))
+
+
+def _claim(now: datetime, batch: int):
+    return (
+        select(OutboxEvent)
+        .where(*_PENDING, OutboxEvent.available_at <= now)
+        .order_by(OutboxEvent.available_at, OutboxEvent.id)
+        .limit(batch)
+        .with_for_update(skip_locked=True)
+    )
+
+
+async def _deliver(session: AsyncSession, event: OutboxEvent, report: DispatchReport) -> None:
+    event.attempts += 1
+    try:
+        async with session.begin_nested():
+            for fn in _handlers.get(event.topic, []):
+                await fn(session, event)
+    except Exception as exc:
+        event.last_error = f"{type(exc).__name__}: {exc}"[:2000]
+        now = datetime.utcnow()
+        if event.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            event.failed_at = now
+            report.dead += 1
+            logger.error("outbox: evento %d (%s) muerto tras %d intentos: %s",
+                         event.id, event.topic, event.attempts, event.last_error)
+        else:
+            event.available_at = now + backoff(event.attempts)
+            report.retried += 1
+        return
+    event.processed_at = datetime.utcnow()
+    report.processed += 1
+
+
+async def dispatch_once(
+    session_factory: async_sessionmaker,
+    *,
+    batch: int | None = None,
+    now: datetime | None = None,
+) -> DispatchReport:
+    """Entrega todos los eventos vencidos (lote a lote, un COMMIT por lote) y purga los viejos."""
+    batch = batch or settings.OUTBOX_BATCH
+    now = now or datetime.utcnow()
+    report = DispatchReport()
+
+    while True:
+        async with session_factory() as session:
+            events = list((await session.execute(_claim(now, batch))).scalars())
+            for event in events:
+                await _deliver(session, event, report)
+            await session.commit()
+        if len(events) < batch:
+            break
+
+    cutoff = now - timedelta(days=settings.OUTBOX_RETENTION_DAYS)
+    while True:
+        async with session_factory() as session:
+            old = (
+                select(OutboxEvent.id).where(OutboxEvent.processed_at < cutoff)
+                .limit(batch).with_for_update(skip_locked=True)
+            )
+            result = await session.execute(
+                delete(OutboxEvent).where(OutboxEvent.id.in_(old)).execution_options(synchronize_session=False)
+            )
+            await session.commit()
+        report.purged += result.rowcount
+        if result.rowcount < batch:
+            break
+    return report
+
+
+async def run_dispatcher(session_factory: async_sessionmaker, interval: float, *, batch: int | None = None) -> None:
+    """Despacha cada `interval` segundos hasta que se cancele la tarea."""
+    stats.running = True
+    try:
+        while True:
+            started = asyncio.get_running_loop().time()
+            try:
+                report = await dispatch_once(session_factory, batch=batch)
+                stats.processed += report.processed
+                stats.retried += report.retried
+                stats.dead += report.dead
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.exception("outbox: fallo en el dispatcher")
+                stats.errors = [*stats.errors[-9:], f"{datetime.utcnow().isoformat()} {type(exc).__name__}: {exc}"]
+            stats.last_run_at = datetime.utcnow()
+            stats.last_run_ms = round((asyncio.get_running_loop().time() - started) * 1000, 1)
+            await asyncio.sleep(interval)
+    finally:
+        stats.running = False
+
+
+async def outbox_metrics(db: AsyncSession, now: datetime | None = None) -> dict[str, Any]:
+    """Estado de la cola (de la BD: vale para todos los dispatchers) + contadores locales."""
+    now = now or datetime.utcnow()
+    pending = (await db.execute(
+        select(
+            func.count(),
+            func.count().filter(OutboxEvent.available_at <= now),
+            func.min(OutboxEvent.created_at),
+        ).where(*_PENDING)
+    )).one()
+    dead = (await db.execute(
+        select(func.count()).where(OutboxEvent.failed_at.is_not(None))
+    )).scalar_one()
+    oldest = pending[2]
+    return {
+        "pending": pending[0],
+        "due": pending[1],
+        "dead": dead,
+        "oldest_pending_at": oldest,
+        "lag_seconds": round((now - oldest).total_seconds(), 3) if oldest else 0.0,
+        "dispatcher": stats,
+    }
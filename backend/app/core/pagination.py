@@ -0,0 +1,154 @@
+"""
+pagination.py — Paginación keyset (cursor) y conteo opcional.
+
+OFFSET (page-1)*size obliga a la BD a recorrer y descartar todas las filas
+anteriores: cuanto más profunda la página, más lenta. Con keyset la página
+siguiente se pide "después de la última clave vista", que un índice compuesto
+(clave de orden, id) resuelve en O(tamaño de página) a cualquier profundidad.
+
+El cursor es opaco para el cliente: base64url de {"s": <orden>, "v": [claves]}.
+Se valida contra el orden pedido para no mezclar cursores de distintos listados.
+
+Uso:
+    keys = [SortKey(Product.rating, desc=True), SortKey(Product.id)]
+    query = query.order_by(*order_by_keys(keys))
+    if cursor:
+        query = query.where(keyset_after(keys, decode_cursor(cursor, "rating", keys)))
+    ...
+    next_cursor = encode_cursor("rating", [último.rating, último.id])
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Literal, NamedTuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_, select, func, true, false, table, column
+from sqlalchemy.ext.asyncio import AsyncSession
+
+CountMode = Literal["exact", "estimated", "none"]
+
+_pg_class = table("pg_class", column("relname"), column("reltuples"))
+
+# Con count=estimated se cuenta como mucho hasta aquí (coste acotado)
+COUNT_ESTIMATE_CAP = 10_000
+
+
+class SortKey(NamedTuple):
+    """Columna de orden. `nullable=True` → los NULL van siempre al final (NULLS LAST)."""
+    column: Any
+    desc: bool = False
+    nullable: bool = False
+
+
+def order_by_keys(keys: list[SortKey]) -> list:
+    clauses = []
+    for key in keys:
+        clause = key.column.desc() if key.desc else key.column.asc()
+        clauses.append(clause.nulls_last() if key.nullable else clause)
+    return clauses
+
+
+def _after(key: SortKey, value):
+    """Filas estrictamente posteriores a `value` en esta columna."""
+    if value is None:
+        # NULLS LAST: después de un NULL no hay valores no nulos
+        return false()
+    after = key.column < value if key.desc else key.column > value
+    return or_(after, key.column.is_(None)) if key.nullable else after
+
+
+def _equal(key: SortKey, value):
+    return key.column.is_(None) if value is None else key.column == value
+
+
+def keyset_after(keys: list[SortKey], values: list) -> Any:
+    """
+    Predicado "(k1, k2, …) > (v1, v2, …)" respetando la dirección de cada clave:
+        k1 > v1  OR  (k1 = v1 AND k2 > v2)  OR  …
+    """
+    branches = []
+    for i, key in enumerate(keys):
+        prefix = [_equal(k, v) for k, v in zip(keys[:i], values[:i])]
+        branches.append(and_(*prefix, _after(key, values[i])))
+    return or_(*branches) if branches else true()
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _decode_value(key: SortKey, raw):
+    if raw is None:
+        return None
+    python_type = key.column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(raw)
+    return python_type(raw)
+
+
+def encode_cursor(sort: str, values: list) -> str:
+    payload = json.dumps({"s": sort, "v": [_encode_value(v) for v in values]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, keys: list[SortKey]) -> list:
+    """Devuelve los valores de clave del cursor o 400 si es inválido / de otro orden."""
+    invalid = HTTPException(status_code=400, detail="Cursor inválido para este listado")
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if payload.get("s") != sort or len(payload.get("v", [])) != len(keys):
+            raise invalid
+        return [_decode_value(k, v) for k, v in zip(keys, payload["v"])]
+    except (ValueError, TypeError, AttributeError, binascii.Error, UnicodeError):
+        raise invalid
+
+
+async def count_rows(
+    db: AsyncSession,
+    query,
+    mode: CountMode,
+    *,
+    estimate_table: str | None = None,
+    filtered: bool = True,
+) -> tuple[int | None, bool]:
+    """
+    Total de filas de `query` según `mode`. Devuelve (total, es_estimado).
+
+      exact      COUNT(*) completo sobre el filtro.
+      estimated  Sin filtros en PostgreSQL: reltuples de `estimate_table` (gratis).
+                 Con filtros: COUNT(*) sobre como mucho COUNT_ESTIMATE_CAP filas,
+                 así el coste queda acotado aunque la tabla tenga millones.
+      none       No cuenta (modo scroll infinito / exportaciones).
+    """
+    if mode == "none":
+        return None, False
+
+    if mode == "estimated":
+        if not filtered and estimate_table and db.bind.dialect.name == "postgresql":
+            estimated = await _pg_reltuples(db, estimate_table)
+            if estimated is not None:
+                return estimated, True
+        capped = query.limit(COUNT_ESTIMATE_CAP + 1).subquery()
+        total = (await db.execute(select(func.count()).select_from(capped))).scalar_one()
+        return min(total, COUNT_ESTIMATE_CAP), total > COUNT_ESTIMATE_CAP
+
+    total = (await db.execute(select(func.count()).select_from(query.subquery()))).scalar_one()
+    return total, False
+
+
+async def _pg_reltuples(db: AsyncSession, table_name: str) -> int | None:
+    """Estimación del planner (pg_class.reltuples); None si la tabla nunca se analizó."""
+    reltuples = (await db.execute(
+        select(_pg_class.c.reltuples).where(_pg_class.c.relname == table_name)
+    )).scalar()
+    if reltuples is None or reltuples < 0:
+        return None
+    return int(reltuples)
@@ -0,0 +1,157 @@
+"""
+password_hasher.py — bcrypt fuera del event loop, en un pool de procesos acotado.
+
+hash_password / verify_password (app/core/security.py) cuestan ~250 ms de CPU
+cada una (12 rounds). Llamadas directamente desde un handler async bloquean el
+event loop: durante una ráfaga de logins TODAS las requests del worker
+(catálogo, carrito…) esperan detrás de bcrypt.
+
+PasswordHasher las ejecuta en un ProcessPoolExecutor de PASSWORD_HASH_WORKERS
+procesos (por defecto uno por núcleo; bcrypt es CPU puro, más procesos que
+núcleos solo añade cambios de contexto):
+
+  • Cola acotada: como mucho workers × PASSWORD_HASH_QUEUE_PER_WORKER
+    operaciones esperando. Si está llena se rechaza al momento con 503 +
+    Retry-After (backpressure) en vez de acumular logins que responderían
+    tarde de todas formas.
+  • Métricas (metrics(), GET /api/auth/admin/password-hasher/metrics):
+    en curso, en cola, pico de cola, rechazadas y latencia p50/p99 (espera
+    en cola + cómputo).
+  • PASSWORD_HASH_WORKERS=0: modo en línea (bcrypt en el propio event loop,
+    el comportamiento anterior); útil en scripts y para comparar en
+    benchmarks/bench_login_burst.py.
+
+El pool se arranca en el lifespan de la app (start) y, si no, en el primer uso
+(scripts, benchmarks). Los procesos hijos se crean con "spawn": hacer fork de
+un proceso con event loop e hilos vivos no es seguro.
+
+Uso en un endpoint:
+
+    hashed = await password_hasher.hash(data.password)
+    ok = await password_hasher.verify(form.password, user.hashed_password)
+"""
+import asyncio
+import math
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from fastapi import HTTPException, status
+
+from app.config import settings
+from app.core.security import hash_password, verify_password
+
+T = TypeVar("T")
+
+_LATENCY_SAMPLES = 1000  # ventana de latencias para p50/p99
+
+
+def _percentile(samples: list[float], pct: float) -> float | None:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))], 2)
+
+
+class PasswordHasher:
+    def __init__(self, workers: int | None = None, queue_per_worker: int | None = None) -> None:
+        self._executor: ProcessPoolExecutor | None = None
+        self.configure(workers, queue_per_worker)
+
+    def configure(self, workers: int | None = None, queue_per_worker: int | None = None) -> None:
+        """Fija el tamaño del pool y de la cola (None = settings). Solo con el pool parado."""
+        if self._executor is not None:
+            raise RuntimeError("PasswordHasher ya arrancado: llama a shutdown() antes de reconfigurar")
+        if workers is None:
+            workers = settings.PASSWORD_HASH_WORKERS
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        if queue_per_worker is None:
+            queue_per_worker = settings.PASSWORD_HASH_QUEUE_PER_WORKER
+        self.queue_max = self.workers * queue_per_worker
+        self.in_flight = 0
+        self.peak_queued = 0
+        self.completed = 0
+        self.rejected = 0
+        self._latencies: deque[float] = deque(maxlen=_LATENCY_SAMPLES)
+
+    @property
+    def inline(self) -> bool:
+        return self.workers <= 0
+
+    @property
+    def queued(self) -> int:
+        return max(0, self.in_flight - self.workers)
+
+    async def start(self) -> None:
+        """Crea el pool y arranca todos sus procesos (el primer login no paga el spawn)."""
+        if self.inline or self._executor is not None:
+            return
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+        )
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._executor, os.getpid) for _ in range(self.workers)))
+
+    async def shutdown(self) -> None:
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+
+    def _retry_after(self) -> int:
+        """Segundos estimados hasta que se vacíe la cola actual."""
+        p50 = _percentile(list(self._latencies), 50) or 250.0
+        return max(1, math.ceil(self.queued * p50 / 1000 / self.workers))
+
+    async def _run(self, fn: Callable[..., T], *args: Any) -> T:
+        if self.inline:
+            started = time.perf_counter()
+            result = fn(*args)
+            self._latencies.append((time.perf_counter() - started) * 1000)
+            self.completed += 1
+            return result
+
+        if self.queued >= self.queue_max:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Servicio saturado, inténtalo de nuevo en unos segundos",
+                headers={"Retry-After": str(self._retry_after())},
+            )
+        if self._executor is None:
+            await self.start()
+        self.in_flight += 1
+        self.peak_queued = max(self.peak_queued, self.queued)
+        started = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.in_flight -= 1
+            self._latencies.append((time.perf_counter() - started) * 1000)
+            self.completed += 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, plain: str, hashed: str) -> bool:
+        return await self._run(verify_password, plain, hashed)
+
+    def metrics(self) -> dict[str, Any]:
+        samples = list(self._latencies)
+        return {
+            "workers": self.workers,
+            "running": self.inline or self._executor is not None,
+            "queue_max": self.queue_max,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "peak_queued": self.peak_queued,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "latency_p50_ms": _percentile(samples, 50),
+            "latency_p99_ms": _percentile(samples, 99),
+        }
+
+
+password_hasher = PasswordHasher()
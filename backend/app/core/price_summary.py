@@ -0,0 +1,136 @@
+"""
+price_summary.py — Mantenimiento del agregado de precios por producto.
+
+La tabla product_price_summaries guarda, por producto:
+  • min_price / max_price   — rango de precios entre tiendas (NULL sin precios)
+  • cheapest_site           — tienda con el precio más bajo
+  • in_stock_stores         — tiendas con disponibilidad (≠ out-of-stock)
+  • store_count             — número total de tiendas
+
+Todo producto tiene SIEMPRE su fila (se inserta junto con el producto, ver
+models/price_summary.py), así el listado hace un INNER JOIN y PostgreSQL puede
+recorrer el índice (min_price, product_id) para ordenar por precio con LIMIT.
+
+Uso:
+    from app.core.price_summary import refresh_price_summary
+
+    # Después de crear / editar / eliminar un Price (misma transacción):
+    await refresh_price_summary(db, price.product_id)
+
+Para cargas masivas o migraciones: rebuild_price_summaries(db[, product_ids]).
+"""
+from typing import Iterable
+
+from sqlalchemy import select, func, case, delete, insert, exists
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.models.product import Product
+from app.models.price import Price, AvailabilityEnum
+from app.models.price_summary import ProductPriceSummary
+
+_REBUILD_CHUNK = 500
+
+
+def _summary_source():
+    """
+    SELECT product_id, min, max, cheapest_site, in_stock_stores, store_count
+    por producto (products LEFT JOIN prices). cheapest_site es una subconsulta
+    correlacionada servida por el índice de prices.product_id.
+    """
+    cheapest_price = aliased(Price)
+    cheapest = (
+        select(cheapest_price.site)
+        .where(cheapest_price.product_id == Product.id)
+        .order_by(cheapest_price.price, cheapest_price.site)
+        .limit(1)
+        .scalar_subquery()
+    )
+    in_stock = func.sum(case((Price.availability != AvailabilityEnum.out_of_stock, 1), else_=0))
+    return (
+        select(
+            Product.id,
+            func.min(Price.price),
+            func.max(Price.price),
+            cheapest,
+            func.coalesce(in_stock, 0),
+            func.count(Price.id),
+        )
+        .select_from(Product)
+        .outerjoin(Price, Price.product_id == Product.id)
+        .group_by(Product.id)
+    )
+
+
+async def refresh_price_summary(db: AsyncSession, product_id: str) -> None:
+    """
+    Recalcula el agregado de un producto a partir de sus filas en `prices`.
+    Una sola consulta agregada (indexada por prices.product_id) + upsert ORM.
+
+    Bloquea la fila del producto (FOR UPDATE) para que dos escrituras de precio
+    concurrentes sobre el mismo producto no se pisen el agregado.
+    """
+    await db.execute(select(Product.id).where(Product.id == product_id).with_for_update())
+    row = (await db.execute(
+        _summary_source().where(Product.id == product_id)
+    )).one_or_none()
+    if row is None:  # el producto ya no existe; la FK se encarga del resumen
+        return
+
+    _, min_price, max_price, cheapest_site, in_stock_stores, store_count = row
+    summary = await db.get(ProductPriceSummary, product_id)
+    if summary is None:
+        summary = ProductPriceSummary(product_id=product_id)
+        db.add(summary)
+    summary.min_price = min_price
+    summary.max_price = max_price
+    summary.cheapest_site = cheapest_site
+    summary.in_stock_stores = int(in_stock_stores or 0)
+    summary.store_count = int(store_count or 0)
+
+
+async def rebuild_price_summaries(db: AsyncSession, product_ids: Iterable[str] | None = None) -> None:
+    """
+    Reconstruye el agregado de forma set-based (DELETE + INSERT … SELECT … GROUP BY).
+    Sin `product_ids` recalcula todo el catálogo.
+    """
+    if product_ids is None:
+        await _rebuild(db, None)
+        return
+    ids = list(product_ids)
+    # Por bloques: mantiene el IN (...) dentro del límite de parámetros del driver
+    for i in range(0, len(ids), _REBUILD_CHUNK):
+        await _rebuild(db, ids[i:i + _REBUILD_CHUNK])
+
+
+async def _rebuild(db: AsyncSession, ids: list[str] | None) -> None:
+    purge = delete(ProductPriceSummary)
+    source = _summary_source().add_columns(func.current_timestamp())
+    if ids is not None:
+        purge = purge.where(ProductPriceSummary.product_id.in_(ids))
+        source = source.where(Product.id.in_(ids))
+
+    await db.execute(purge)
+    await db.execute(
+        insert(ProductPriceSummary).from_select(
+            ["product_id", "min_price", "max_price", "cheapest_site",
+             "in_stock_stores", "store_count", "updated_at"],
+            source,
+        )
+    )
+
+
+async def ensure_price_summaries(db: AsyncSession) -> int:
+    """
+    Arranque: crea el resumen de los productos que no lo tengan
+    (BD previa a esta versión o filas insertadas fuera del ORM).
+    Devuelve cuántos productos se reconstruyeron.
+    """
+    missing = (await db.execute(
+        select(Product.id).where(
+            ~exists().where(ProductPriceSummary.product_id == Product.id)
+        )
+    )).scalars().all()
+    if missing:
+        await rebuild_price_summaries(db, missing)
+    return len(missing)
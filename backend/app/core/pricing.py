@@ -0,0 +1,240 @@
+"""
+pricing.py — Motor de precios del carrito.
+
+Resuelve en UNA consulta agregada, por línea (product_id, selected_site):
+  • precio unitario   — prices.price de esa tienda (índice único uq_prices_product_site);
+                        si la tienda ya no tiene precio, el de la tienda más barata
+                        (product_price_summaries.cheapest_site) y `site` indica cuál
+  • envío de la tienda — prices.shipping (informativo, por tienda)
+  • totales           — subtotal / piezas del carrito y por tienda con funciones
+                        de ventana (SUM ... OVER), sin un segundo viaje a la BD
+
+Nada de grafos ORM: ni Product, ni prices, ni images; solo columnas.
+El envío se cobra POR TIENDA (cada una envía su parte), con el mismo modelo
+que POST /api/cart/optimize (app/core/cart_optimizer.py), para que el total
+del carrito y el del reparto óptimo sean comparables (store_shipping):
+el mayor envío publicado entre sus líneas (SHIPPING_COST si no publica),
+gratis cuando el subtotal de ESA tienda llega a FREE_SHIPPING_THRESHOLD.
+
+Uso:
+    from app.core.pricing import price_cart
+
+    pricing = await price_cart(db, current_user.id)
+    pricing.subtotal, pricing.shipping, pricing.lines[0].unit_price
+"""
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any
+
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.models.cart import CartItem
+from app.models.price import AvailabilityEnum, Price
+from app.models.price_summary import ProductPriceSummary
+from app.models.product import Product
+from app.models.product_image import ProductImage
+
+FREE_SHIPPING_THRESHOLD = 2500.0
+SHIPPING_COST = 150.0
+
+
+@dataclass
+class PricedLine:
+    id: str
+    product_id: str
+    selected_site: str
+    quantity: int
+    name: str
+    brand: str
+    sku: str | None
+    primary_image: str
+    is_active: bool
+    site: str | None              # tienda de la que sale el precio (None: sin precio)
+    unit_price: float | None
+    availability: str | None
+    store_shipping: float | None
+    line_total: float
+
+
+@dataclass
+class PricedStore:
+    site: str
+    items: int
+    subtotal: float
+    shipping: float | None        # envío publicado por la tienda (máximo entre sus líneas; SHIPPING_COST si alguna no publica)
+
+    @property
+    def shipping_charged(self) -> float:
+        return store_shipping(self.subtotal, self.shipping)
+
+    @property
+    def free_shipping_remaining(self) -> float:
+        if self.shipping_charged == 0:
+            return 0.0
+        return round(FREE_SHIPPING_THRESHOLD - self.subtotal, 2)
+
+
+@dataclass
+class CartPricing:
+    lines: list[PricedLine] = field(default_factory=list)
+    stores: list[PricedStore] = field(default_factory=list)
+    total_items: int = 0
+    subtotal: float = 0.0
+
+    @property
+    def shipping(self) -> float:
+        return round(sum(store.shipping_charged for store in self.stores), 2)
+
+    @property
+    def total(self) -> float:
+        return round(self.subtotal + self.shipping, 2)
+
+    @property
+    def free_shipping_remaining(self) -> float:
+        """Lo que falta gastar, sumando las tiendas que aún cobran envío."""
+        return round(sum(store.free_shipping_remaining for store in self.stores), 2)
+
+
+def store_shipping(subtotal: float, quoted: float | None) -> float:
+    """Envío de una tienda con `subtotal` y envío publicado `quoted` (None: SHIPPING_COST)."""
+    if subtotal <= 0 or subtotal >= FREE_SHIPPING_THRESHOLD:
+        return 0.0
+    return SHIPPING_COST if quoted is None else quoted
+
+
+def _float(value: Any) -> float | None:
+    return float(value) if isinstance(value, Decimal) else value
+
+
+# Imagen principal con la misma prioridad que Product.primary_image
+_primary_image = (
+    select(ProductImage.url)
+    .where(ProductImage.product_id == CartItem.product_id)
+    .order_by(ProductImage.is_primary.desc(), ProductImage.sort_order)
+    .limit(1)
+    .correlate(CartItem)
+    .scalar_subquery()
+)
+
+
+def _cart_pricing_query(user_id: str):
+    # Precio de la tienda elegida; si ya no existe, el de la más barata
+    cheapest = aliased(Price)
+    found = Price.id.is_not(None)
+
+    def pick(column: str):
+        return case((found, getattr(Price, column)), else_=getattr(cheapest, column))
+
+    unit_price, site, shipping = pick("price"), pick("site"), pick("shipping")
+    line_total = func.coalesce(unit_price * CartItem.quantity, 0)
+    return (
+        select(
+            CartItem.id, CartItem.product_id, CartItem.selected_site, CartItem.quantity,
+            Product.name, Product.brand, Product.sku, Product.is_active,
+            func.coalesce(_primary_image, Product.image).label("primary_image"),
+            site.label("site"),
+            unit_price.label("unit_price"),
+            pick("availability").label("availability"),
+            shipping.label("store_shipping"),
+            line_total.label("line_total"),
+            func.sum(line_total).over().label("cart_subtotal"),
+            func.sum(CartItem.quantity).over().label("cart_items"),
+            func.sum(line_total).over(partition_by=site).label("store_subtotal"),
+            func.sum(CartItem.quantity).over(partition_by=site).label("store_items"),
+            # Línea sin envío publicado = SHIPPING_COST, igual que el optimizador
+            func.max(func.coalesce(shipping, SHIPPING_COST)).over(partition_by=site).label("store_max_shipping"),
+        )
+        .join(Product, Product.id == CartItem.product_id)
+        .join(ProductPriceSummary, ProductPriceSummary.product_id == CartItem.product_id)
+        .outerjoin(Price, and_(Price.product_id == CartItem.product_id, Price.site == CartItem.selected_site))
+        .outerjoin(cheapest, and_(
+            cheapest.product_id == CartItem.product_id, cheapest.site == ProductPriceSummary.cheapest_site,
+        ))
+        .where(CartItem.user_id == user_id)
+        .order_by(CartItem.id)
+    )
+
+
+async def price_cart(db: AsyncSession, user_id: str) -> CartPricing:
+    """Líneas con precio resuelto + totales del carrito de `user_id` (una consulta)."""
+    rows = (await db.execute(_cart_pricing_query(user_id))).all()
+    pricing = CartPricing()
+    stores: dict[str, PricedStore] = {}
+    for row in rows:
+        pricing.lines.append(PricedLine(
+            id=row.id,
+            product_id=row.product_id,
+            selected_site=row.selected_site,
+            quantity=row.quantity,
+            name=row.name,
+            brand=row.brand,
+            sku=row.sku,
+            primary_image=row.primary_image or "",
+            is_active=row.is_active,
+            site=row.site,
+            unit_price=_float(row.unit_price),
+            availability=row.availability.value if row.availability is not None else None,
+            store_shipping=_float(row.store_shipping),
+            line_total=round(float(row.line_total), 2),
+        ))
+        if row.site is not None and row.site not in stores:
+            stores[row.site] = PricedStore(
+                site=row.site,
+                items=int(row.store_items),
+                subtotal=round(float(row.store_subtotal), 2),
+                shipping=_float(row.store_max_shipping),
+            )
+    if rows:
+        pricing.subtotal = round(float(rows[0].cart_subtotal), 2)
+        pricing.total_items = int(rows[0].cart_items)
+    pricing.stores = list(stores.values())
+    return pricing
+
+
+@dataclass
+class StoreOffer:
+    site: str
+    unit_price: float
+    shipping: float | None
+    in_stock: bool
+
+
+@dataclass
+class OfferedLine:
+    id: str
+    product_id: str
+    selected_site: str
+    quantity: int
+    offers: list[StoreOffer] = field(default_factory=list)
+
+
+async def cart_offers(db: AsyncSession, user_id: str) -> list[OfferedLine]:
+    """
+    Todas las ofertas (precio por tienda) de cada línea del carrito en una
+    consulta sin ORM: entrada de app/core/cart_optimizer.py. Incluye las
+    agotadas para poder valorar la selección actual.
+    """
+    rows = (await db.execute(
+        select(
+            CartItem.id, CartItem.product_id, CartItem.selected_site, CartItem.quantity,
+            Price.site, Price.price, Price.shipping, Price.availability,
+        )
+        .outerjoin(Price, Price.product_id == CartItem.product_id)
+        .where(CartItem.user_id == user_id)
+        .order_by(CartItem.id)
+    )).all()
+    lines: dict[str, OfferedLine] = {}
+    for row in rows:
+        line = lines.get(row.id)
+        if line is None:
+            line = lines[row.id] = OfferedLine(row.id, row.product_id, row.selected_site, row.quantity)
+        if row.site is not None:
+            line.offers.append(StoreOffer(
+                site=row.site,
+                unit_price=float(row.price),
+                shipping=_float(row.shipping),
+                in_stock=row.availability != AvailabilityEnum.out_of_stock,
+            ))
+    return list(lines.values())
@@ -0,0 +1,109 @@
+"""
+response_cache.py — Caché de respuestas GET públicas del catálogo con ETag / 304.
+
+El catálogo cambia pocas veces por hora pero cada GET consultaba PostgreSQL y
+re-serializaba con Pydantic. Aquí se guarda el CUERPO JSON ya serializado:
+
+  • Clave: ruta + query string normalizada (parámetros ordenados por nombre, vacíos fuera).
+  • ETag fuerte = hash del cuerpo. Con If-None-Match coincidente → 304 sin cuerpo
+    (también en un MISS: el cliente no vuelve a descargar lo que ya tiene).
+  • Memoria acotada: LRU por entradas y por bytes + TTL (ver TaggedCache).
+  • Invalidación por etiquetas (catalog, product:<id>, brands) al hacer COMMIT
+    las escrituras de productos, precios, imágenes y marcas (app/core/cache.py).
+
+Uso en un endpoint:
+
+    @router.get("/{product_id}", response_model=ProductOut)
+    async def get_product(product_id: str, request: Request, db = Depends(get_db)):
+        async def build():
+            ...
+            return product
+        return await response_cache.serve(
+            request, build, model=ProductOut, tags=(f"product:{product_id}",),
+        )
+
+Las excepciones de build() (p. ej. 404) se propagan y no se cachean.
+"""
+import hashlib
+from typing import Any, Awaitable, Callable, Iterable, NamedTuple
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+from app.config import settings
+from app.core.cache import TaggedCache
+
+_CACHE_CONTROL = "public, no-cache"  # el navegador guarda pero revalida (If-None-Match)
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in candidates
+
+
+class ResponseCache:
+    def __init__(self, maxsize: int, max_bytes: int, ttl: float, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self.store = TaggedCache(maxsize=maxsize, ttl=ttl, max_bytes=max_bytes)
+        self._adapters: dict[Any, TypeAdapter] = {}
+
+    @staticmethod
+    def key(request: Request) -> tuple:
+        # Orden estable por nombre: los valores repetidos (?ids=b&ids=a) conservan su orden
+        params = sorted(
+            ((k, v) for k, v in request.query_params.multi_items() if v != ""),
+            key=lambda kv: kv[0],
+        )
+        return request.url.path, tuple(params)
+
+    def _serialize(self, model: Any, value: Any) -> bytes:
+        adapter = self._adapters.get(model)
+        if adapter is None:
+            adapter = self._adapters[model] = TypeAdapter(model)
+        validated = adapter.validate_python(value, from_attributes=True)
+        return adapter.dump_json(validated)
+
+    async def serve(
+        self,
+        request: Request,
+        build: Callable[[], Awaitable[Any]],
+        *,
+        model: Any,
+        tags: Iterable[str],
+    ) -> Response:
+        key = self.key(request)
+        cached = self.store.get(key) if self.enabled else None
+        status = "HIT"
+        if cached is None:
+            status = "MISS"
+            generation = self.store.generation
+            body = self._serialize(model, await build())
+            cached = CachedResponse(body, _etag(body))
+            if self.enabled:
+                self.store.set(key, cached, tags, generation=generation, size=len(body))
+
+        headers = {"ETag": cached.etag, "Cache-Control": _CACHE_CONTROL, "X-Cache": status}
+        if _etag_matches(request.headers.get("if-none-match"), cached.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=cached.body, media_type="application/json", headers=headers)
+
+
+response_cache = ResponseCache(
+    maxsize=settings.RESPONSE_CACHE_SIZE,
+    max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+    ttl=settings.RESPONSE_CACHE_TTL,
+    enabled=settings.RESPONSE_CACHE_ENABLED,
+)
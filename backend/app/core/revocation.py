@@ -0,0 +1,249 @@
+"""
+revocation.py — Lista de denegación de JWT por jti, acotada por la caducidad.
+
+Cada token (access y refresh) lleva un `jti` aleatorio. Revocarlo (logout,
+rotación del refresh) guarda SOLO ese jti hasta el `exp` del token: pasado
+el exp el token ya no valida por sí mismo y la entrada sobra. La lista no
+crece sin límite y no guarda tokens completos.
+
+Almacenes (RevocationStore):
+  • MemoryRevocationStore — dict jti → exp por proceso, con purga de los
+    caducados. Por defecto; suficiente con un solo worker.
+  • RedisRevocationStore  — `revoked:<jti>` con EX = vida restante del token,
+    compartido entre workers / réplicas (REDIS_URL, el mismo que
+    Idempotency-Key). Cada revocación se publica además en el canal
+    `revoked` para los filtros Bloom de los demás procesos.
+
+Filtro Bloom (REVOCATION_BLOOM, solo con Redis): casi ningún token está
+revocado, así que la comprobación de cada request pregunta primero a un
+Bloom en memoria; si dice "no está", es seguro (un Bloom no da falsos
+negativos) y no hay viaje a Redis. Solo los positivos (revocados de verdad o
+falsos positivos, REVOCATION_BLOOM_ERROR_RATE) consultan Redis.
+
+Para que el Bloom no mienta, start() se suscribe al canal ANTES de cargar los
+jti vivos (SCAN), y cada REVOCATION_BLOOM_REBUILD_SECONDS se reconstruye
+desde Redis para soltar los caducados (un Bloom no admite borrados). Mientras
+el Bloom no está al día (arranque, conexión de pub/sub caída, scripts sin
+lifespan) todas las comprobaciones van a Redis. Entre la revocación en un
+worker y su llegada por pub/sub a otro pasan milisegundos.
+"""
+import asyncio
+import hashlib
+import heapq
+import logging
+import math
+import time
+from typing import AsyncIterator, Protocol
+
+from app.config import settings
+
+logger = logging.getLogger("lookaly")
+
+CHANNEL = "revoked"
+
+
+class RevocationStore(Protocol):
+    async def add(self, jti: str, expires_at: float) -> None:
+        """Revoca `jti` hasta `expires_at` (epoch en segundos, el exp del token)."""
+
+    async def contains(self, jti: str) -> bool: ...
+
+    async def live(self) -> AsyncIterator[str]:
+        """Todos los jti revocados aún no caducados (para reconstruir el Bloom)."""
+
+
+class MemoryRevocationStore:
+    def __init__(self) -> None:
+        self._expires: dict[str, float] = {}
+        self._heap: list[tuple[float, str]] = []  # (exp, jti) para purgar en orden
+
+    def _purge(self, now: float) -> None:
+        while self._heap and self._heap[0][0] <= now:
+            exp, jti = heapq.heappop(self._heap)
+            if self._expires.get(jti) == exp:
+                del self._expires[jti]
+
+    async def add(self, jti: str, expires_at: float) -> None:
+        now = time.time()
+        self._purge(now)
+        if expires_at > now:
+            self._expires[jti] = expires_at
+            heapq.heappush(self._heap, (expires_at, jti))
+
+    async def contains(self, jti: str) -> bool:
+        expires_at = self._expires.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    async def live(self) -> AsyncIterator[str]:
+        self._purge(time.time())
+        for jti in list(self._expires):
+            yield jti
+
+
+class RedisRevocationStore:
+    def __init__(self, url: str) -> None:
+        import redis.asyncio as redis  # solo si se configura REDIS_URL
+
+        self.redis = redis.from_url(url)
+
+    async def add(self, jti: str, expires_at: float) -> None:
+        ttl = math.ceil(expires_at - time.time())
+        if ttl <= 0:
+            return
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.set(f"revoked:{jti}", b"1", ex=ttl)
+            pipe.publish(CHANNEL, jti)
+            await pipe.execute()
+
+    async def contains(self, jti: str) -> bool:
+        return bool(await self.redis.exists(f"revoked:{jti}"))
+
+    async def live(self) -> AsyncIterator[str]:
+        async for key in self.redis.scan_iter(match="revoked:*", count=1000):
+            yield key.decode().removeprefix("revoked:")
+
+    async def subscribe(self) -> AsyncIterator[str]:
+        """jti revocados por cualquier proceso, desde el momento de la suscripción."""
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(CHANNEL)
+        try:
+            yield ""  # suscrito: el llamador ya puede cargar los jti vivos
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    yield message["data"].decode()
+        finally:
+            await pubsub.aclose()
+
+
+class BloomFilter:
+    """Bloom de `capacity` elementos con tasa de falsos positivos `error_rate`."""
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> list[int]:
+        # Doble hashing (Kirsch–Mitzenmacher): k posiciones con un solo digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class TokenRevocation:
+    def __init__(
+        self,
+        store: RevocationStore,
+        *,
+        bloom_capacity: int | None = None,
+        bloom_error_rate: float = 0.001,
+        rebuild_seconds: float = 600,
+    ) -> None:
+        self.store = store
+        self.bloom_capacity = bloom_capacity        # None = sin Bloom
+        self.bloom_error_rate = bloom_error_rate
+        self.rebuild_seconds = rebuild_seconds
+        self._bloom: BloomFilter | None = None       # None = no está al día: ir al almacén
+        self._next: BloomFilter | None = None        # Bloom en reconstrucción
+        self._task: asyncio.Task | None = None
+        self._rebuilding = asyncio.Lock()
+
+    async def revoke(self, jti: str, expires_at: float) -> None:
+        await self.store.add(jti, expires_at)
+        self._remember(jti)
+
+    async def is_revoked(self, jti: str) -> bool:
+        if self._bloom is not None and jti not in self._bloom:
+            return False
+        return await self.store.contains(jti)
+
+    # ── Bloom ──────────────────────────────────────────────────────────────────
+
+    def _remember(self, jti: str) -> None:
+        for bloom in (self._bloom, self._next):
+            if bloom is not None:
+                bloom.add(jti)
+
+    async def _rebuild(self) -> None:
+        """Bloom nuevo desde los jti vivos; lo que llegue entretanto va a los dos."""
+        async with self._rebuilding:
+            self._next = BloomFilter(self.bloom_capacity, self.bloom_error_rate)
+            try:
+                async for jti in self.store.live():
+                    self._next.add(jti)
+                self._bloom = self._next
+            finally:
+                self._next = None
+        if self._bloom.count > self.bloom_capacity:
+            logger.warning("revocación: %d jti vivos > REVOCATION_BLOOM_CAPACITY=%d; "
+                           "sube la capacidad o habrá más consultas a Redis", self._bloom.count, self.bloom_capacity)
+
+    async def _follow(self) -> None:
+        """Sigue el canal de revocaciones; si se cae, desactiva el Bloom y reintenta."""
+        while True:
+            try:
+                async for jti in self.store.subscribe():
+                    if jti:
+                        self._remember(jti)
+                    else:  # recién suscritos: ya no se pierde nada, cargar los vivos
+                        await self._rebuild()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("revocación: suscripción a Redis caída; se consulta Redis en cada request")
+            self._bloom = None
+            await asyncio.sleep(1)
+
+    async def _refresh(self) -> None:
+        """Reconstrucción periódica aunque no haya revocaciones nuevas (suelta caducados)."""
+        while True:
+            await asyncio.sleep(self.rebuild_seconds)
+            if self._bloom is None:
+                continue
+            try:
+                await self._rebuild()
+            except Exception:
+                logger.exception("revocación: no se pudo reconstruir el Bloom")
+
+    async def _run(self) -> None:
+        await asyncio.gather(self._follow(), self._refresh())
+
+    async def start(self) -> None:
+        if self.bloom_capacity is None or not hasattr(self.store, "subscribe") or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._bloom = None
+
+
+def _make_revocation() -> TokenRevocation:
+    if settings.REDIS_URL:
+        return TokenRevocation(
+            RedisRevocationStore(settings.REDIS_URL),
+            bloom_capacity=settings.REVOCATION_BLOOM_CAPACITY if settings.REVOCATION_BLOOM else None,
+            bloom_error_rate=settings.REVOCATION_BLOOM_ERROR_RATE,
+            rebuild_seconds=settings.REVOCATION_BLOOM_REBUILD_SECONDS,
+        )
+    # En memoria la consulta ya es un dict: el Bloom no ahorraría nada
+    return TokenRevocation(MemoryRevocationStore())
+
+
+revocation = _make_revocation()
@@ -0,0 +1,280 @@
+"""
+sales_rollup.py — Rollups de ventas para la pestaña "resumen" del analista.
+
+Dos tablas agregadas (app/models/sales_rollup.py) que se mantienen al vuelo,
+en la misma transacción que el cambio del pedido:
+
+  • sales_daily   — día × marca × categoría × tienda × status:
+                    líneas, piezas y revenue (suma de order_items.subtotal)
+  • orders_daily  — día × status: nº de pedidos y suma de orders.total
+
+El día es la fecha UTC de orders.created_at y no cambia nunca; lo único que
+mueve un pedido entre filas es su status. Por eso bastan dos operaciones:
+
+  • order_created        — suma el pedido nuevo bajo 'pending'
+  • order_status_changed — lo resta del status viejo y lo suma al nuevo
+
+Cada una es un INSERT … SELECT … GROUP BY sobre las líneas de ESE pedido con
+ON CONFLICT DO UPDATE SET x = x + excluded.x: un único viaje por tabla y sin
+leer nada del histórico. Los incrementos son atómicos por fila, así que dos
+pedidos concurrentes del mismo día no se pisan.
+
+GET /api/orders/admin/stats (stats) solo lee los rollups: el coste depende
+del nº de días × combinaciones del rango, no del nº de pedidos.
+rebuild_rollups reconstruye un rango desde orders/order_items (backfill
+inicial o reparación); ver backend/backfill_rollups.py.
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Literal
+
+from sqlalchemy import Date, Enum as SAEnum, cast, delete, func, literal, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.order import Order, OrderItem, OrderStatusEnum
+from app.models.product import Product
+from app.models.sales_rollup import OrdersDaily, SalesDaily
+
+Dimension = Literal["day", "brand", "category", "site", "status"]
+DIMENSIONS: tuple[Dimension, ...] = ("day", "brand", "category", "site", "status")
+
+_SALES_MEASURES = ("lines", "units", "revenue")
+_ORDERS_MEASURES = ("orders", "revenue")
+
+
+def _upsert(db: AsyncSession, model, measures: tuple[str, ...]):
+    """INSERT … ON CONFLICT (PK) DO UPDATE que suma las medidas."""
+    insert = postgresql.insert if db.bind.dialect.name == "postgresql" else sqlite.insert
+    table = model.__table__
+    stmt = insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[col.name for col in table.primary_key],
+        set_={name: table.c[name] + stmt.excluded[name] for name in measures},
+    )
+
+
+def _status(value: OrderStatusEnum):
+    # Literal tipado: se guarda por NAME igual que la columna
+    return literal(value, SAEnum(OrderStatusEnum))
+
+
+def _order_day(db: AsyncSession):
+    """Fecha (sin hora) de orders.created_at en SQL."""
+    if db.bind.dialect.name == "postgresql":
+        return cast(Order.created_at, Date)
+    return func.date(Order.created_at)
+
+
+# ── Mantenimiento incremental ─────────────────────────────────────────────────
+
+async def _apply(
+    db: AsyncSession, order_id: str, created_at: datetime, total, status: OrderStatusEnum, sign: int,
+) -> None:
+    """Suma (sign=1) o resta (sign=-1) un pedido de las filas de `status`."""
+    day = created_at.date()
+    sales = (
+        select(
+            literal(day).label("day"),
+            func.coalesce(OrderItem.product_brand, "").label("brand"),
+            func.coalesce(OrderItem.product_category, "").label("category"),
+            func.coalesce(OrderItem.site, "").label("site"),
+            _status(status).label("status"),
+            (func.count() * sign).label("lines"),
+            (func.sum(OrderItem.quantity) * sign).label("units"),
+            (func.sum(OrderItem.subtotal) * sign).label("revenue"),
+        )
+        # order_created_at: la consulta solo toca la partición del mes del pedido
+        .where(OrderItem.order_id == order_id, OrderItem.order_created_at == created_at)
+        .group_by(OrderItem.product_brand, OrderItem.product_category, OrderItem.site)
+    )
+    await db.execute(_upsert(db, SalesDaily, _SALES_MEASURES).from_select(
+        ["day", "brand", "category", "site", "status", *_SALES_MEASURES], sales,
+    ))
+    await db.execute(_upsert(db, OrdersDaily, _ORDERS_MEASURES).values(
+        day=day, status=status, orders=sign, revenue=Decimal(str(total)) * sign,
+    ))
+
+
+async def order_created(db: AsyncSession, order_id: str, created_at: datetime, total) -> None:
+    """Pedido nuevo (status pending) con sus líneas ya insertadas."""
+    await _apply(db, order_id, created_at, total, OrderStatusEnum.pending, 1)
+
+
+async def order_status_changed(
+    db: AsyncSession,
+    order_id: str,
+    created_at: datetime,
+    total,
+    old: OrderStatusEnum,
+    new: OrderStatusEnum,
+) -> None:
+    """Mueve el pedido de las filas de `old` a las de `new` (no-op si son iguales)."""
+    if old == new:
+        return
+    await _apply(db, order_id, created_at, total, old, -1)
+    await _apply(db, order_id, created_at, total, new, 1)
+    day = created_at.date()
+    # Las combinaciones que se quedaron a cero no aportan nada al resumen
+    await db.execute(delete(SalesDaily).where(
+        SalesDaily.day == day, SalesDaily.status == old, SalesDaily.lines <= 0,
+    ))
+    await db.execute(delete(OrdersDaily).where(
+        OrdersDaily.day == day, OrdersDaily.status == old, OrdersDaily.orders <= 0,
+    ))
+
+
+# ── Backfill ───────────────────────────────────────────────────────────────────
+
+@dataclass
+class RebuildReport:
+    sales_rows: int = 0
+    orders_rows: int = 0
+
+
+async def rebuild_rollups(
+    db: AsyncSession, since: date | None = None, until: date | None = None,
+) -> RebuildReport:
+    """
+    Recalcula los rollups de los días [since, until] (ambos inclusive; None =
+    sin límite) desde orders/order_items: borra esas filas y las vuelve a
+    agregar con dos INSERT … SELECT … GROUP BY.
+    """
+    order_range, item_range = [], []
+    if since is not None:
+        start = datetime.combine(since, time.min)
+        order_range.append(Order.created_at >= start)
+        item_range.append(OrderItem.order_created_at >= start)
+    if until is not None:
+        end = datetime.combine(until + timedelta(days=1), time.min)
+        order_range.append(Order.created_at < end)
+        item_range.append(OrderItem.order_created_at < end)
+
+    for model in (SalesDaily, OrdersDaily):
+        stmt = delete(model)
+        if since is not None:
+            stmt = stmt.where(model.day >= since)
+        if until is not None:
+            stmt = stmt.where(model.day <= until)
+        await db.execute(stmt)
+
+    day = _order_day(db)
+    dims = (
+        day,
+        func.coalesce(OrderItem.product_brand, ""),
+        func.coalesce(OrderItem.product_category, ""),
+        func.coalesce(OrderItem.site, ""),
+        Order.status,
+    )
+    sales = (
+        select(*dims, func.count(), func.sum(OrderItem.quantity), func.sum(OrderItem.subtotal))
+        .join(Order, (Order.id == OrderItem.order_id) & (Order.created_at == OrderItem.order_created_at))
+        .where(*order_range, *item_range)
+        .group_by(*dims)
+    )
+    result = await db.execute(_upsert(db, SalesDaily, _SALES_MEASURES).from_select(
+        ["day", "brand", "category", "site", "status", *_SALES_MEASURES], sales,
+    ))
+    report = RebuildReport(sales_rows=result.rowcount)
+
+    orders = (
+        select(day, Order.status, func.count(), func.sum(Order.total))
+        .where(*order_range)
+        .group_by(day, Order.status)
+    )
+    result = await db.execute(_upsert(db, OrdersDaily, _ORDERS_MEASURES).from_select(
+        ["day", "status", *_ORDERS_MEASURES], orders,
+    ))
+    report.orders_rows = result.rowcount
+    return report
+
+
+async def backfill_item_categories(db: AsyncSession) -> int:
+    """Rellena order_items.product_category de líneas anteriores al snapshot."""
+    result = await db.execute(
+        update(OrderItem)
+        .where(OrderItem.product_category.is_(None), OrderItem.product_id.is_not(None))
+        .values(product_category=select(Product.category)
+                .where(Product.id == OrderItem.product_id)
+                .scalar_subquery())
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+# ── Lectura ────────────────────────────────────────────────────────────────────
+
+@dataclass
+class StatsFilters:
+    statuses: list[OrderStatusEnum] | None = None
+    brand: str | None = None
+    category: str | None = None
+    site: str | None = None
+
+
+async def stats(
+    db: AsyncSession,
+    since: date,
+    until: date,
+    group_by: list[Dimension],
+    filters: StatsFilters,
+) -> tuple[list[dict], dict]:
+    """
+    Agregado de sales_daily en [since, until] por las dimensiones pedidas.
+    `orders` (nº de pedidos) solo se puede contar agrupando/filtrando por día
+    y status: un pedido tiene líneas de varias marcas y tiendas. En el resto
+    de casos vale None.
+    Devuelve (filas, totales).
+    """
+    group_by = [dim for dim in DIMENSIONS if dim in group_by]
+    with_orders = (
+        set(group_by) <= {"day", "status"}
+        and filters.brand is None and filters.category is None and filters.site is None
+    )
+
+    def query(model, measures):
+        dims = [getattr(model, dim) for dim in group_by]
+        stmt = (
+            select(*dims, *(func.sum(getattr(model, m)).label(m) for m in measures))
+            .where(model.day >= since, model.day <= until)
+            .group_by(*dims)
+            .order_by(*dims)
+        )
+        if filters.statuses:
+            stmt = stmt.where(model.status.in_(filters.statuses))
+        for dim in ("brand", "category", "site"):
+            value = getattr(filters, dim)
+            if value is not None:
+                stmt = stmt.where(getattr(model, dim) == value)
+        return stmt
+
+    def key(row) -> tuple:
+        return tuple(row[:len(group_by)])
+
+    rows: dict[tuple, dict] = {}
+    for row in (await db.execute(query(SalesDaily, _SALES_MEASURES))).all():
+        values = dict(zip(group_by, key(row)))
+        if "status" in values:
+            values["status"] = values["status"].value
+        rows[key(row)] = {
+            **values,
+            "orders": None,
+            "lines": int(row.lines),
+            "units": int(row.units),
+            "revenue": round(float(row.revenue), 2),
+        }
+
+    totals = {
+        "orders": None,
+        "lines": sum(r["lines"] for r in rows.values()),
+        "units": sum(r["units"] for r in rows.values()),
+        "revenue": round(sum(r["revenue"] for r in rows.values()), 2),
+    }
+    if with_orders:
+        totals["orders"] = 0
+        for row in (await db.execute(query(OrdersDaily, ("orders",)))).all():
+            if key(row) in rows:
+                rows[key(row)]["orders"] = int(row.orders)
+            totals["orders"] += int(row.orders)
+    return list(rows.values()), totals
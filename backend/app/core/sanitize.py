@@ -11,6 +11,7 @@ Uso:
     clean_body = sanitize_dict(request_body)
 """
 import re
+import unicodedata
 from typing import Any
 
 # Patrón que detecta tags HTML (<script>, <img onerror=...>, etc.)
@@ -58,3 +59,20 @@ def sanitize_dict(data: dict[str, Any]) -> dict[str, Any]:
         else:
             result[key] = val
     return result
+
+
+# ─── Normalización para búsqueda ──────────────────────────────────────────────
+# Minúsculas + sin acentos/diacríticos ("Máscara de Pestañas" → "mascara de pestanas")
+# para que la búsqueda no dependa de cómo escribe el usuario ni de cómo se capturó
+# el producto. Se usa tanto al construir products.search_document como al normalizar
+# el texto de búsqueda.
+_NON_WORD_RE = re.compile(r"[^\w]+")
+
+
+def fold_text(value: str | None) -> str:
+    """Minúsculas, sin diacríticos y con un solo espacio entre palabras."""
+    if not value:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", value.lower())
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _NON_WORD_RE.sub(" ", stripped).strip()
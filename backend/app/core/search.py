@@ -0,0 +1,100 @@
+"""
+search.py — Búsqueda de productos (full-text en español + trigramas).
+
+products.search_document guarda nombre + marca + subcategoría + descripción
+normalizados con fold_text() (minúsculas, sin acentos). Sobre él:
+
+  PostgreSQL
+    • Full-text:  to_tsvector('spanish', doc) @@ plainto_tsquery('spanish', q)
+                  → stemming ("cremas" encuentra "crema"), índice GIN.
+    • Trigramas:  q <% doc (pg_trgm, word_similarity) → tolera errores de
+                  tecleo ("protectr solar", "crema hidratnte"), índice GIN trgm.
+    • Relevancia: ts_rank + word_similarity.
+
+  SQLite (desarrollo / tests locales)
+    Sin FTS ni pg_trgm: cada palabra debe aparecer en el documento por su raíz
+    (su prefijo: "protectr" → "prot" sigue encontrando "protector",
+    "delinador" → "deli" encuentra "delineador"). La relevancia premia palabras exactas y coincidencias tempranas
+    (el documento empieza por el nombre).
+
+Uso:
+    query = query.where(search_filter(q, dialect))
+    keys  = [SortKey(search_rank(q, dialect), desc=True), SortKey(Product.id)]
+"""
+from sqlalchemy import select, update, bindparam, and_, case, func, literal, Float, true
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.sanitize import fold_text
+from app.models.product import Product, SEARCH_TS_CONFIG, build_search_document
+
+_BACKFILL_BATCH = 1000
+
+
+def _document_vector():
+    # Misma expresión que el índice ix_products_search_fts
+    return func.to_tsvector(SEARCH_TS_CONFIG, Product.search_document)
+
+
+def _stem(token: str) -> str:
+    """Raíz aproximada para el fallback sin trigramas."""
+    return token[:max(4, len(token) // 2)]
+
+
+def search_filter(q: str, dialect: str):
+    """Predicado WHERE para el texto de búsqueda `q` según el dialecto."""
+    folded = fold_text(q)
+    if not folded:
+        return true()
+
+    if dialect == "postgresql":
+        fts = _document_vector().op("@@")(func.plainto_tsquery(SEARCH_TS_CONFIG, folded))
+        fuzzy = literal(folded).op("<%")(Product.search_document)
+        return fts | fuzzy
+
+    return and_(*(Product.search_document.contains(_stem(t)) for t in folded.split()))
+
+
+def search_rank(q: str, dialect: str):
+    """Expresión de relevancia (mayor = mejor) para ORDER BY / cursor."""
+    folded = fold_text(q)
+    if dialect == "postgresql":
+        return (
+            func.ts_rank(_document_vector(), func.plainto_tsquery(SEARCH_TS_CONFIG, folded))
+            + func.word_similarity(folded, Product.search_document)
+        ).cast(Float)
+
+    score = literal(0.0, Float)
+    for token in folded.split():
+        score = score + case((Product.search_document.contains(token), 1.0), else_=0.0)
+        # instr() ≥ 1 porque search_filter ya exige la raíz en el documento
+        score = score + 1.0 / func.max(func.instr(Product.search_document, _stem(token)), 1)
+    return score.cast(Float)
+
+
+async def ensure_search_documents(db: AsyncSession) -> int:
+    """
+    Arranque: rellena search_document de los productos que lo tengan vacío
+    (BD previa a esta versión o filas insertadas fuera del ORM), por lotes.
+    Devuelve cuántos productos se actualizaron.
+    """
+    stmt = (
+        update(Product.__table__)
+        .where(Product.__table__.c.id == bindparam("pid"))
+        .values(search_document=bindparam("doc"))
+    )
+    done, last_id = 0, ""
+    while True:
+        rows = (await db.execute(
+            select(Product.id, Product.name, Product.brand, Product.subcategory, Product.description)
+            .where(Product.search_document == "", Product.id > last_id)
+            .order_by(Product.id)
+            .limit(_BACKFILL_BATCH)
+        )).all()
+        if not rows:
+            return done
+        await db.execute(stmt, [
+            {"pid": pid, "doc": build_search_document(name, brand, sub, desc)}
+            for pid, name, brand, sub, desc in rows
+        ])
+        done += len(rows)
+        last_id = rows[-1][0]
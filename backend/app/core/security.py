@@ -11,16 +11,21 @@ Implementa las siguientes prácticas de seguridad:
     No se almacena por separado; la función verify() lo extrae del hash.
   • Work factor (rounds): 12 (por defecto en passlib)
     — cada incremento duplica el tiempo de cómputo, dificultando fuerza bruta.
+  • Los endpoints async NO llaman a hash_password / verify_password directamente
+    (~250 ms de CPU bloquearían el event loop): usan app/core/password_hasher.py.
 
   3.4 – Tokens JWT de vida corta + Refresh Token
   ─────────────────────────────────────────────────
   • Access token: expira en ACCESS_TOKEN_EXPIRE_MINUTES (default 30 min)
   • Refresh token: vida larga (REFRESH_TOKEN_EXPIRE_DAYS), firmado con clave diferente
-  • Revocación: set en memoria _revoked_tokens (en prod: Redis + lista de denegación)
+  • Revocación por jti hasta el exp del token (app/core/revocation.py): en memoria
+    por proceso, o en Redis compartido entre workers con un Bloom local delante
   • HttpOnly cookies: helper set_auth_cookies() para endpoints que las requieran
 """
 from datetime import datetime, timezone, timedelta
 from typing import Optional
+import hashlib
+import uuid
 import bcrypt
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, Response, status
@@ -29,6 +34,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from app.config import settings
+from app.core.revocation import revocation
 from app.database import get_db
 from app.models.user import User
 from app.schemas.user import TokenData
@@ -40,10 +46,6 @@ _BCRYPT_ROUNDS = 12
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
-# ─── Revocación de tokens en memoria ─────────────────────────────────────────
-# En producción, usar Redis con TTL igual a la vida del token.
-_revoked_tokens: set[str] = set()
-
 
 def hash_password(password: str) -> str:
     """
@@ -69,6 +71,7 @@ def _make_jwt(data: dict, expires_delta: timedelta, token_type: str) -> str:
     payload = data.copy()
     payload["exp"] = datetime.now(timezone.utc) + expires_delta
     payload["type"] = token_type  # distingue access vs refresh
+    payload["jti"] = uuid.uuid4().hex  # identificador para revocarlo
     return jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 
@@ -89,13 +92,23 @@ def create_refresh_token(data: dict) -> str:
     return _make_jwt(data, timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS), "refresh")
 
 
-def revoke_token(token: str) -> None:
-    """Agrega el token a la lista de denegación (logout / rotación)."""
-    _revoked_tokens.add(token)
+def decode_token(token: str) -> dict:
+    """Valida firma y exp; lanza JWTError si el token no es válido."""
+    return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+
+
+def _token_id(token: str, payload: dict) -> str:
+    # Tokens emitidos antes de llevar jti: se identifican por el hash del token
+    return payload.get("jti") or hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+async def revoke_token(token: str, payload: dict) -> None:
+    """Agrega el token a la lista de denegación (logout / rotación) hasta su exp."""
+    await revocation.revoke(_token_id(token, payload), float(payload["exp"]))
 
 
-def is_token_revoked(token: str) -> bool:
-    return token in _revoked_tokens
+async def is_token_revoked(token: str, payload: dict) -> bool:
+    return await revocation.is_revoked(_token_id(token, payload))
 
 
 # ─── Cookies HttpOnly ─────────────────────────────────────────────────────────
@@ -146,11 +159,8 @@ async def get_current_user(
         detail="No se pudo validar las credenciales",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    # Verificar si el token fue revocado (logout)
-    if is_token_revoked(token):
-        raise credentials_exc
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = decode_token(token)
         # Verificar que sea un access token (no un refresh reutilizado maliciosamente)
         if payload.get("type") != "access":
             raise credentials_exc
@@ -160,6 +170,9 @@ async def get_current_user(
         token_data = TokenData(user_id=user_id)
     except JWTError:
         raise credentials_exc
+    # Verificar si el token fue revocado (logout)
+    if await is_token_revoked(token, payload):
+        raise credentials_exc
 
     result = await db.execute(select(User).where(User.id == token_data.user_id))
     user = result.scalar_one_or_none()
@@ -0,0 +1,132 @@
+"""
+sku.py — Asignación de SKUs LOOK-NNNN en tiempo constante y segura en concurrencia.
+
+  • sku_counters: siguiente número por prefijo. Pedir N números es un solo
+    UPDATE … SET next_value = next_value + N RETURNING next_value: la fila queda
+    bloqueada hasta el COMMIT, así que dos altas concurrentes nunca reciben el
+    mismo número (y no se escanea el catálogo).
+  • sku_free_numbers: números liberados al eliminar productos (o al cambiarles
+    el SKU). Se reutilizan primero, el más bajo antes, como hacía el cálculo
+    de huecos anterior. En PostgreSQL se toman con FOR UPDATE SKIP LOCKED:
+    dos altas concurrentes toman huecos distintos sin esperarse.
+  • Un SKU LOOK-NNNN escrito a mano se "reclama" (claim_skus): sale de la lista
+    libre y el contador salta por encima, para que nunca se vuelva a asignar.
+
+Uso:
+    payload["sku"] = (await allocate_skus(db))[0]
+    await release_sku(db, product.sku)      # al eliminar
+"""
+import re
+from typing import Iterable
+
+from sqlalchemy import select, update, delete, case
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.product import Product
+from app.models.sku import SkuCounter, SkuFreeNumber
+
+SKU_PREFIX = "LOOK"
+_SKU_RE = re.compile(rf"^{SKU_PREFIX}-(\d+)$")
+
+
+def format_sku(number: int) -> str:
+    return f"{SKU_PREFIX}-{number:04d}"
+
+
+def parse_sku(sku: str | None) -> int | None:
+    """Número de un SKU LOOK-NNNN; None si el SKU tiene otro formato."""
+    match = _SKU_RE.match(sku or "")
+    return int(match.group(1)) if match else None
+
+
+def _insert_ignore(db: AsyncSession, table):
+    insert = postgresql.insert if db.bind.dialect.name == "postgresql" else sqlite.insert
+    return insert(table).on_conflict_do_nothing()
+
+
+async def allocate_skus(db: AsyncSession, count: int = 1) -> list[str]:
+    """`count` SKUs nuevos: primero huecos liberados, luego el contador."""
+    if count <= 0:
+        return []
+    free = list((await db.execute(
+        select(SkuFreeNumber.number)
+        .where(SkuFreeNumber.prefix == SKU_PREFIX)
+        .order_by(SkuFreeNumber.number)
+        .limit(count)
+        .with_for_update(skip_locked=True)
+    )).scalars())
+    if free:
+        await db.execute(
+            delete(SkuFreeNumber).where(SkuFreeNumber.prefix == SKU_PREFIX, SkuFreeNumber.number.in_(free))
+        )
+
+    missing = count - len(free)
+    numbers = free
+    if missing:
+        end = await _advance(db, missing)
+        if end is None:  # BD sin contador (arranque aún no corrió ensure_sku_counter)
+            await ensure_sku_counter(db)
+            return [format_sku(n) for n in free] + await allocate_skus(db, missing)
+        numbers = free + list(range(end - missing, end))
+    return [format_sku(n) for n in numbers]
+
+
+async def _advance(db: AsyncSession, count: int) -> int | None:
+    return (await db.execute(
+        update(SkuCounter)
+        .where(SkuCounter.prefix == SKU_PREFIX)
+        .values(next_value=SkuCounter.next_value + count)
+        .returning(SkuCounter.next_value)
+        .execution_options(synchronize_session=False)
+    )).scalar_one_or_none()
+
+
+async def claim_skus(db: AsyncSession, skus: Iterable[str | None]) -> None:
+    """SKUs LOOK-NNNN fijados a mano: que el asignador no los vuelva a entregar."""
+    numbers = {n for n in map(parse_sku, skus) if n is not None}
+    if not numbers:
+        return
+    top = max(numbers) + 1
+    await db.execute(
+        update(SkuCounter)
+        .where(SkuCounter.prefix == SKU_PREFIX)
+        .values(next_value=case((SkuCounter.next_value < top, top), else_=SkuCounter.next_value))
+        .execution_options(synchronize_session=False)
+    )
+    await db.execute(
+        delete(SkuFreeNumber).where(SkuFreeNumber.prefix == SKU_PREFIX, SkuFreeNumber.number.in_(numbers))
+    )
+
+
+async def release_sku(db: AsyncSession, sku: str | None) -> None:
+    """Devuelve el número de un SKU LOOK-NNNN a la lista libre (producto eliminado)."""
+    number = parse_sku(sku)
+    if number is not None:
+        await db.execute(_insert_ignore(db, SkuFreeNumber.__table__).values(prefix=SKU_PREFIX, number=number))
+
+
+async def ensure_sku_counter(db: AsyncSession) -> bool:
+    """
+    Arranque: crea el contador a partir de los SKUs existentes (una sola vez:
+    recorre el catálogo) y registra los huecos como números libres.
+    Devuelve True si lo creó.
+    """
+    if await db.get(SkuCounter, SKU_PREFIX) is not None:
+        return False
+    used = {
+        n for n in map(parse_sku, (await db.execute(
+            select(Product.sku).where(Product.sku.like(f"{SKU_PREFIX}-%"))
+        )).scalars()) if n is not None
+    }
+    top = max(used, default=0)
+    try:
+        async with db.begin_nested():
+            await db.execute(SkuCounter.__table__.insert().values(prefix=SKU_PREFIX, next_value=top + 1))
+            gaps = [{"prefix": SKU_PREFIX, "number": n} for n in range(1, top) if n not in used]
+            if gaps:
+                await db.execute(_insert_ignore(db, SkuFreeNumber.__table__), gaps)
+    except IntegrityError:
+        return False  # otro proceso lo creó al mismo tiempo
+    return True
@@ -0,0 +1,313 @@
+"""
+suggest.py — Autocompletado (typeahead) desde un índice de prefijos en memoria.
+
+GET /api/products/suggest?q=… no toca la BD: busca en arreglos ordenados de
+términos normalizados (fold_text) con bisect y devuelve los más populares.
+
+  • Términos: el nombre normalizado y cada "cola" a partir de una palabra
+    ("protector solar fps 50", "solar fps 50", …), así "sol" también encuentra
+    "Protector Solar".
+  • Peso: productos → reviews (+ rating como desempate);
+          marcas    → número de productos activos con esa marca.
+  • Top-N por prefijo cacheado y mantenido en cada escritura (no se invalida
+    todo el caché), así el camino caliente es un dict lookup.
+
+Ciclo de vida:
+  • lifespan (main.py) → await suggest_index.load(session)
+  • Escrituras ORM de Product / Brand: los listeners de sesión de abajo las
+    recogen en after_flush y las aplican en after_commit (un rollback las
+    descarta), así el índice nunca ve cambios no confirmados.
+
+El índice vive en cada proceso: con varios workers de uvicorn cada uno tiene
+el suyo. Escrituras fuera del ORM (SQL directo, otro servicio) se reflejan
+al reiniciar.
+"""
+import heapq
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import NamedTuple
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.sanitize import fold_text
+from app.models.brand import Brand
+from app.models.product import Product
+
+MAX_SUGGESTIONS = 20
+_MAX_WORDS = 8           # colas indexadas por etiqueta (nombres muy largos)
+_CACHE_MAX = 20_000      # prefijos cacheados; al llenarse se vacía
+_CACHE_DEPTH = 2 * MAX_SUGGESTIONS  # claves guardadas por prefijo (margen para bajas)
+
+
+class Suggestion(NamedTuple):
+    key: str
+    label: str
+    weight: float
+
+
+class PrefixIndex:
+    """
+    Arreglo ordenado de (término, clave) + top por prefijo cacheado.
+
+    Cada prefijo consultado guarda sus mejores claves (hasta _CACHE_DEPTH) y si
+    la lista es completa (no hay más coincidencias). Las escrituras mantienen
+    esas listas en lugar de vaciarlas: insertar coloca la clave en su puesto,
+    eliminar la quita; solo si una lista incompleta baja de MAX_SUGGESTIONS se
+    descarta y se recalcula en la siguiente consulta.
+    """
+
+    def __init__(self) -> None:
+        self._terms: list[tuple[str, str]] = []
+        self._entries: dict[str, Suggestion] = {}
+        self._cache: dict[str, tuple[list[str], bool]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _terms_for(label: str) -> set[str]:
+        words = fold_text(label).split()[:_MAX_WORDS]
+        return {" ".join(words[i:]) for i in range(len(words))}
+
+    @staticmethod
+    def _prefixes(terms: set[str]) -> set[str]:
+        return {term[:i] for term in terms for i in range(1, len(term) + 1)}
+
+    def _rank(self, key: str) -> tuple[float, str]:
+        entry = self._entries[key]
+        return -entry.weight, entry.label
+
+    def bulk_load(self, entries: list[Suggestion]) -> None:
+        self._entries = {e.key: e for e in entries}
+        self._terms = sorted((t, e.key) for e in entries for t in self._terms_for(e.label))
+        self._cache.clear()
+
+    def get(self, key: str) -> Suggestion | None:
+        return self._entries.get(key)
+
+    def put(self, key: str, label: str, weight: float) -> None:
+        old = self._entries.get(key)
+        terms = self._terms_for(label)
+        if old is not None:
+            old_terms = self._terms_for(old.label)
+            self._withdraw(key, old_terms)
+            for term in old_terms - terms:
+                self._remove_term(term, key)
+            added = terms - old_terms
+        else:
+            added = terms
+        for term in added:
+            insort(self._terms, (term, key))
+        self._entries[key] = Suggestion(key, label, weight)
+        self._offer(key, terms)
+
+    def discard(self, key: str) -> None:
+        old = self._entries.get(key)
+        if old is None:
+            return
+        terms = self._terms_for(old.label)
+        self._withdraw(key, terms)
+        for term in terms:
+            self._remove_term(term, key)
+        del self._entries[key]
+
+    def top(self, prefix: str, limit: int) -> list[Suggestion]:
+        """Las `limit` etiquetas de mayor peso con algún término que empieza por `prefix` (normalizado)."""
+        cached = self._cache.get(prefix)
+        if cached is None:
+            lo = bisect_left(self._terms, (prefix,))
+            hi = bisect_left(self._terms, (prefix + "\uffff",))
+            matches = {key for _, key in self._terms[lo:hi]}
+            keys = heapq.nsmallest(_CACHE_DEPTH, matches, key=self._rank)
+            if len(self._cache) >= _CACHE_MAX:
+                self._cache.clear()
+            cached = self._cache[prefix] = (keys, len(matches) <= _CACHE_DEPTH)
+        return [self._entries[k] for k in cached[0][:limit]]
+
+    # ── Mantenimiento de términos y caché ────────────────────────────────────
+    def _remove_term(self, term: str, key: str) -> None:
+        i = bisect_left(self._terms, (term, key))
+        if i < len(self._terms) and self._terms[i] == (term, key):
+            del self._terms[i]
+
+    def _withdraw(self, key: str, terms: set[str]) -> None:
+        """Quita `key` de las listas cacheadas de sus prefijos."""
+        for prefix in self._prefixes(terms):
+            cached = self._cache.get(prefix)
+            if cached is None or key not in cached[0]:
+                continue
+            keys, complete = cached
+            keys.remove(key)
+            if not complete and len(keys) < MAX_SUGGESTIONS:
+                del self._cache[prefix]
+
+    def _offer(self, key: str, terms: set[str]) -> None:
+        """Coloca `key` (ya con su peso nuevo) en las listas cacheadas de sus prefijos."""
+        rank = self._rank(key)
+        for prefix in self._prefixes(terms):
+            cached = self._cache.get(prefix)
+            if cached is None:
+                continue
+            keys, complete = cached
+            # En una lista incompleta solo entra si supera a la última:
+            # por debajo puede haber coincidencias no cacheadas con más peso.
+            if not complete and (not keys or rank > self._rank(keys[-1])):
+                continue
+            i = 0
+            while i < len(keys) and self._rank(keys[i]) < rank:
+                i += 1
+            keys.insert(i, key)
+            if len(keys) > _CACHE_DEPTH:
+                keys.pop()
+                self._cache[prefix] = (keys, False)
+
+
+class _ProductSnapshot(NamedTuple):
+    id: str
+    name: str
+    brand: str
+    weight: float
+    is_active: bool
+
+
+def _weight(reviews: int | None, rating: float | None) -> float:
+    return float(reviews or 0) + float(rating or 0) / 10
+
+
+def _snapshot(product: Product) -> _ProductSnapshot:
+    return _ProductSnapshot(
+        product.id, product.name, product.brand,
+        _weight(product.reviews, product.rating), bool(product.is_active),
+    )
+
+
+class SuggestIndex:
+    """Índices de productos y marcas + conteo de productos activos por marca."""
+
+    def __init__(self) -> None:
+        self.products = PrefixIndex()
+        self.brands = PrefixIndex()
+        self.loaded = False
+        self._indexed: dict[str, _ProductSnapshot] = {}  # id → último estado indexado
+        self._brand_counts: Counter[str] = Counter()
+        self._brand_labels: dict[str, str] = {}          # marca normalizada → nombre en la tabla brands
+
+    async def load(self, db: AsyncSession) -> None:
+        """Construye ambos índices desde la BD (arranque)."""
+        rows = (await db.execute(
+            select(Product.id, Product.name, Product.brand, Product.reviews, Product.rating, Product.is_active)
+        )).all()
+        brand_names = (await db.execute(select(Brand.name))).scalars().all()
+
+        self._indexed = {
+            pid: _ProductSnapshot(pid, name, brand, _weight(reviews, rating), bool(active))
+            for pid, name, brand, reviews, rating, active in rows
+        }
+        self._brand_labels = {fold_text(name): name for name in brand_names}
+        self._brand_counts = Counter()
+        fallback_labels: dict[str, str] = {}
+        for snap in self._indexed.values():
+            if snap.is_active:
+                self._brand_counts[fold_text(snap.brand)] += 1
+                fallback_labels.setdefault(fold_text(snap.brand), snap.brand)
+
+        self.products.bulk_load([
+            Suggestion(s.id, s.name, s.weight) for s in self._indexed.values() if s.is_active
+        ])
+        self.brands.bulk_load([
+            Suggestion(key, self._brand_labels.get(key) or fallback_labels[key], self._brand_counts[key])
+            for key in set(self._brand_labels) | set(self._brand_counts)
+        ])
+        self.loaded = True
+
+    # ── Actualización incremental ────────────────────────────────────────────
+    def upsert_product(self, snap: _ProductSnapshot) -> None:
+        old = self._indexed.get(snap.id)
+        if old is not None and old.is_active:
+            self._adjust_brand(old.brand, -1)
+        self._indexed[snap.id] = snap
+        if snap.is_active:
+            self.products.put(snap.id, snap.name, snap.weight)
+            self._adjust_brand(snap.brand, +1)
+        else:
+            self.products.discard(snap.id)
+
+    def remove_product(self, product_id: str) -> None:
+        old = self._indexed.pop(product_id, None)
+        self.products.discard(product_id)
+        if old is not None and old.is_active:
+            self._adjust_brand(old.brand, -1)
+
+    def upsert_brand(self, name: str) -> None:
+        key = fold_text(name)
+        self._brand_labels[key] = name
+        self.brands.put(key, name, self._brand_counts[key])
+
+    def remove_brand(self, name: str) -> None:
+        key = fold_text(name)
+        self._brand_labels.pop(key, None)
+        self._refresh_brand(key, fallback=None)
+
+    def _adjust_brand(self, brand: str, delta: int) -> None:
+        key = fold_text(brand)
+        self._brand_counts[key] += delta
+        if self._brand_counts[key] <= 0:
+            del self._brand_counts[key]
+        self._refresh_brand(key, fallback=brand)
+
+    def _refresh_brand(self, key: str, fallback: str | None) -> None:
+        count = self._brand_counts.get(key, 0)
+        current = self.brands.get(key)
+        label = self._brand_labels.get(key) or (current.label if current else fallback)
+        if key in self._brand_labels or count > 0:
+            self.brands.put(key, label, count)
+        else:
+            self.brands.discard(key)
+
+    def apply(self, change: tuple) -> None:
+        kind, payload = change
+        if kind == "product":
+            self.upsert_product(payload)
+        elif kind == "product_deleted":
+            self.remove_product(payload)
+        elif kind == "brand":
+            self.upsert_brand(payload)
+        elif kind == "brand_deleted":
+            self.remove_brand(payload)
+
+
+suggest_index = SuggestIndex()
+
+
+# ── Sincronización con las escrituras ORM ───────────────────────────────────
+_PENDING_KEY = "suggest_pending"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session: Session, flush_context) -> None:
+    pending = session.info.setdefault(_PENDING_KEY, [])
+    for obj in (*session.new, *session.dirty):
+        if isinstance(obj, Product):
+            pending.append(("product", _snapshot(obj)))
+        elif isinstance(obj, Brand):
+            pending.append(("brand", obj.name))
+    for obj in session.deleted:
+        if isinstance(obj, Product):
+            pending.append(("product_deleted", obj.id))
+        elif isinstance(obj, Brand):
+            pending.append(("brand_deleted", obj.name))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_changes(session: Session) -> None:
+    changes = session.info.pop(_PENDING_KEY, [])
+    if suggest_index.loaded:
+        for change in changes:
+            suggest_index.apply(change)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
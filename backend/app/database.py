@@ -34,5 +34,5 @@ async def get_db() -> AsyncSession:  # type: ignore[override]
 async def create_tables() -> None:
     """Crear todas las tablas al iniciar (dev). En producción usa Alembic o migrate-v2.sql."""
     async with engine.begin() as conn:
-        from app.models import product, product_image, user, price, cart, order, brand  # noqa: F401
+        from app.models import product, product_image, user, price, price_summary, cart, order, brand, sku, sales_rollup, outbox  # noqa: F401
         await conn.run_sync(Base.metadata.create_all)
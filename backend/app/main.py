@@ -7,15 +7,26 @@ from contextlib import asynccontextmanager
 from pathlib import Path
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
+import asyncio
+import contextlib
 import logging
 
 from app.config import settings
-from app.database import create_tables
+from app.database import create_tables, AsyncSessionLocal, engine
 from app.routers import products, auth, prices, cart, users
 from app.routers import twofa, oauth as oauth_router
 from app.routers import product_images, orders, brands
 from app.core.limiter import limiter
 from app.core import storage  # MinIO
+from app.core.price_summary import ensure_price_summaries
+from app.core.search import ensure_search_documents
+from app.core.suggest import suggest_index
+from app.core.sku import ensure_sku_counter
+from app.core.cart_sweeper import run_sweeper
+from app.core.order_partitions import ensure_partitions
+from app.core import outbox
+from app.core.password_hasher import password_hasher
+from app.core.revocation import revocation
 
 logger = logging.getLogger("lookaly")
 
@@ -24,13 +35,53 @@ logger = logging.getLogger("lookaly")
 async def lifespan(app: FastAPI):
     # Startup: crear tablas si no existen
     await create_tables()
+    # Particiones mensuales de pedidos (PostgreSQL): mes actual + ORDER_PARTITIONS_AHEAD
+    async with engine.begin() as conn:
+        if created := await ensure_partitions(conn):
+            logger.info("particiones de pedidos creadas: %s", ", ".join(created))
+    # Productos sin fila en product_price_summaries (BD previa): reconstruir su agregado
+    async with AsyncSessionLocal() as session:
+        if rebuilt := await ensure_price_summaries(session):
+            await session.commit()
+            logger.info("product_price_summaries: %d productos reconstruidos", rebuilt)
+        # Documento de búsqueda vacío (BD previa o inserciones fuera del ORM)
+        if filled := await ensure_search_documents(session):
+            await session.commit()
+            logger.info("search_document: %d productos indexados", filled)
+        # Contador de SKUs LOOK-NNNN (una vez: desde los SKUs existentes)
+        if await ensure_sku_counter(session):
+            await session.commit()
+            logger.info("sku_counters: contador inicializado")
+        # Índice de autocompletado en memoria (lo mantienen los listeners de sesión)
+        await suggest_index.load(session)
+        logger.info("suggest: %d productos, %d marcas", len(suggest_index.products), len(suggest_index.brands))
+    # Pool de procesos de bcrypt (login / registro fuera del event loop)
+    await password_hasher.start()
+    # Bloom de tokens revocados (solo con REDIS_URL): suscripción + carga inicial
+    await revocation.start()
     # Inicializar MinIO: crear bucket si no existe y aplicar política pública
     await storage.init_storage()
     # Crear el directorio de imágenes si no existe (fallback dev)
     images_dir = Path(__file__).parent.parent / "static" / "images" / "products"
     images_dir.mkdir(parents=True, exist_ok=True)
+    # Barrido de carritos abandonados (o con el worker sweep_carts.py)
+    sweeper = None
+    if settings.CART_SWEEP_INTERVAL > 0:
+        sweeper = asyncio.create_task(run_sweeper(AsyncSessionLocal, settings.CART_SWEEP_INTERVAL))
+    # Dispatcher del outbox de pedidos (o con el worker dispatch_outbox.py)
+    dispatcher = None
+    if settings.OUTBOX_DISPATCH_INTERVAL > 0:
+        dispatcher = asyncio.create_task(outbox.run_dispatcher(AsyncSessionLocal, settings.OUTBOX_DISPATCH_INTERVAL))
     yield
-    # Shutdown: nada por ahora
+    # Shutdown
+    for task in (sweeper, dispatcher):
+        if task is not None:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+    await outbox.close_http()
+    await password_hasher.shutdown()
+    await revocation.stop()
 
 
 app = FastAPI(
@@ -51,7 +102,8 @@ app.add_middleware(
     allow_origins=[settings.FRONTEND_URL],
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-    allow_headers=["Authorization", "Content-Type", "Accept"],
+    allow_headers=["Authorization", "Content-Type", "Accept", "Idempotency-Key"],
+    expose_headers=["Idempotent-Replayed"],
 )
 
 
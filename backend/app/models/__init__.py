@@ -2,8 +2,12 @@ from app.models.product import Product
 from app.models.product_image import ProductImage
 from app.models.user import User
 from app.models.price import Price
+from app.models.price_summary import ProductPriceSummary
 from app.models.cart import Cart, CartItem
 from app.models.order import Order, OrderItem
 from app.models.brand import Brand
+from app.models.sku import SkuCounter, SkuFreeNumber
+from app.models.sales_rollup import SalesDaily, OrdersDaily
+from app.models.outbox import OutboxEvent
 
-__all__ = ["Product", "ProductImage", "User", "Price", "Cart", "CartItem", "Order", "OrderItem", "Brand"]
+__all__ = ["Product", "ProductImage", "User", "Price", "ProductPriceSummary", "Cart", "CartItem", "Order", "OrderItem", "Brand", "SkuCounter", "SkuFreeNumber", "SalesDaily", "OrdersDaily", "OutboxEvent"]
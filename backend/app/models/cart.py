@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import String, Integer, Enum as SAEnum, ForeignKey, DateTime
+from sqlalchemy import String, Integer, Enum as SAEnum, ForeignKey, DateTime, Index, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
 import enum
@@ -38,6 +38,11 @@ class Cart(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
 
+    __table_args__ = (
+        # Barrido de expiración (app/core/cart_sweeper.py): status = open por antigüedad
+        Index("ix_carts_status_expires_at", "status", "expires_at"),
+    )
+
     def __repr__(self) -> str:
         return f"<Cart user={self.user_id} status={self.status}>"
 
@@ -54,10 +59,20 @@ class CartItem(Base):
     product_id: Mapped[str] = mapped_column(String(36), ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
     quantity: Mapped[int] = mapped_column(Integer, default=1)
     selected_site: Mapped[str] = mapped_column(String(100), nullable=False)
+    # Última modificación de la línea: el barrido purga carritos sin actividad
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     user: Mapped["User"] = relationship("User", back_populates="cart_items")
     product: Mapped["Product"] = relationship("Product", back_populates="cart_items", lazy="selectin")
 
+    __table_args__ = (
+        # Una línea por (usuario, producto, tienda): clave del upsert de POST /api/cart/batch
+        UniqueConstraint("user_id", "product_id", "selected_site", name="uq_cart_items_user_product_site"),
+        # Barrido: líneas viejas por antigüedad + "¿el usuario tiene alguna línea reciente?"
+        Index("ix_cart_items_updated_at", "updated_at"),
+        Index("ix_cart_items_user_updated_at", "user_id", "updated_at"),
+    )
+
     def __repr__(self) -> str:
         return f"<CartItem user={self.user_id} product={self.product_id} qty={self.quantity}>"
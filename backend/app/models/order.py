@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 from typing import Optional, TYPE_CHECKING
-from sqlalchemy import String, Integer, Numeric, Text, Enum as SAEnum, ForeignKey, DateTime
+from sqlalchemy import String, Integer, Numeric, Text, Enum as SAEnum, ForeignKey, ForeignKeyConstraint, DateTime, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
 import enum
@@ -19,27 +19,33 @@ class OrderStatusEnum(str, enum.Enum):
 
 
 class Order(Base):
-    """Cabecera de pedido — un registro por compra."""
+    """
+    Cabecera de pedido — un registro por compra.
+
+    En PostgreSQL la tabla está particionada por mes de created_at (RANGE; ver
+    app/core/order_partitions.py), por eso created_at forma parte de la PK.
+    """
     __tablename__ = "orders"
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id: Mapped[str] = mapped_column(
         String(36),
         ForeignKey("users.id", ondelete="SET NULL"),
         nullable=True,   # nullable para no perder historial si se borra el usuario
-        index=True,
     )
     status: Mapped[OrderStatusEnum] = mapped_column(
         SAEnum(OrderStatusEnum),
         default=OrderStatusEnum.pending,
         nullable=False,
-        index=True,
     )
     shipping_address: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     # Total calculado al cierre — snapshot para historial exacto
     total: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False, default=0.0)
+    # Nº de líneas (fijo desde el checkout) — el listado admin no carga order_items
+    item_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
 
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime, primary_key=True, default=datetime.utcnow)
     paid_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -55,6 +61,15 @@ class Order(Base):
         return f"<Order {self.id} status={self.status} total={self.total}>"
 
 
+# Listado admin: ORDER BY created_at DESC, id DESC (recorrido hacia atrás) + keyset.
+# Un índice por filtro con la clave de orden detrás: WHERE status = … / user_id = …
+# + rango de fechas + keyset se resuelven con un solo recorrido del índice, sin sort.
+# (También sirven las búsquedas solo por status / user_id: son su prefijo.)
+Index("ix_orders_created_at_id", Order.created_at, Order.id)
+Index("ix_orders_status_created_at_id", Order.status, Order.created_at, Order.id)
+Index("ix_orders_user_created_at_id", Order.user_id, Order.created_at, Order.id)
+
+
 class OrderItem(Base):
     """
     Línea de detalle de un pedido.
@@ -62,16 +77,20 @@ class OrderItem(Base):
     unit_price es un SNAPSHOT del precio al momento de la compra —
     aunque el precio del producto cambie después, el historial permanece exacto.
     subtotal = quantity × unit_price (calculado y guardado para historial).
+    order_created_at copia orders.created_at: clave de partición (mismo mes
+    que su pedido) y segunda columna de la FK compuesta.
     """
     __tablename__ = "order_items"
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["order_id", "order_created_at"], ["orders.id", "orders.created_at"],
+            name="fk_order_items_order", ondelete="CASCADE",
+        ),
+        {"postgresql_partition_by": "RANGE (order_created_at)"},
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    order_id: Mapped[str] = mapped_column(
-        String(36),
-        ForeignKey("orders.id", ondelete="CASCADE"),
-        nullable=False,
-        index=True,
-    )
+    order_id: Mapped[str] = mapped_column(String(36), nullable=False, index=True)
     product_id: Mapped[Optional[str]] = mapped_column(
         String(36),
         ForeignKey("products.id", ondelete="SET NULL"),
@@ -81,9 +100,13 @@ class OrderItem(Base):
     unit_price: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)   # snapshot
     subtotal: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)     # qty * unit_price
 
-    # Snapshot del nombre/marca por si el producto se elimina
+    # Snapshot del nombre/marca/categoría por si el producto se elimina
     product_name: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     product_brand: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    product_category: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
+    # Tienda cuyo precio se cobró (None: precio propio de Lookaly)
+    site: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    order_created_at: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
 
     # Relationships
     order: Mapped["Order"] = relationship("Order", back_populates="order_items")
@@ -0,0 +1,46 @@
+from datetime import datetime
+from typing import Any, Optional
+from sqlalchemy import BigInteger, Integer, String, Text, DateTime, JSON, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+
+class OutboxEvent(Base):
+    """
+    Evento de dominio pendiente de publicar (transactional outbox).
+
+    Se inserta en la MISMA transacción que el cambio que lo origina (pedido
+    creado, cambio de status…): si la request hace rollback, el evento no
+    existe; si hace commit, el dispatcher (app/core/outbox.py) lo entregará
+    tarde o temprano aunque el proceso muera justo después.
+
+    Estados: pendiente (processed_at y failed_at NULL) → procesado, o muerto
+    (failed_at) tras OUTBOX_MAX_ATTEMPTS intentos fallidos.
+    """
+    __tablename__ = "outbox_events"
+
+    # BIGSERIAL en PostgreSQL; en SQLite solo INTEGER PRIMARY KEY es autoincremental
+    id: Mapped[int] = mapped_column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    topic: Mapped[str] = mapped_column(String(64), nullable=False)            # p. ej. order.created
+    aggregate_id: Mapped[str] = mapped_column(String(36), nullable=False)     # id del pedido
+    payload: Mapped[dict[str, Any]] = mapped_column(JSON, nullable=False, default=dict)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+    available_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)  # próximo intento
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    processed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    failed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<OutboxEvent {self.id} {self.topic} {self.aggregate_id}>"
+
+
+# Cola de pendientes: índice parcial pequeño (solo lo no procesado) en orden de entrega
+_pending = OutboxEvent.processed_at.is_(None) & OutboxEvent.failed_at.is_(None)
+Index(
+    "ix_outbox_events_pending", OutboxEvent.available_at, OutboxEvent.id,
+    postgresql_where=_pending, sqlite_where=_pending,
+)
+# Purga de procesados antiguos
+Index("ix_outbox_events_processed_at", OutboxEvent.processed_at)
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import String, Float, Numeric, Enum as SAEnum, ForeignKey, DateTime
+from sqlalchemy import String, Float, Numeric, Enum as SAEnum, ForeignKey, DateTime, UniqueConstraint, event
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
 import enum
@@ -28,9 +28,22 @@ class Price(Base):
     url: Mapped[str] = mapped_column(String(512), nullable=False, default="#")
     shipping: Mapped[float | None] = mapped_column(Numeric(10, 2), nullable=True)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Hash del contenido importado (ver Product.content_hash)
+    content_hash: Mapped[str | None] = mapped_column(String(32), nullable=True)
 
     # Relationship
     product: Mapped["Product"] = relationship("Product", back_populates="prices")
 
+    __table_args__ = (
+        # Un precio por tienda y producto: clave del upsert del importador de catálogo
+        UniqueConstraint("product_id", "site", name="uq_prices_product_site"),
+    )
+
     def __repr__(self) -> str:
         return f"<Price {self.site}: {self.price} {self.currency}>"
+
+
+@event.listens_for(Price, "before_update")
+def _mark_edited(mapper, connection, target: Price) -> None:
+    if target.content_hash:
+        target.content_hash = ""
@@ -0,0 +1,65 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import String, Integer, Numeric, ForeignKey, DateTime, Index, event, insert
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+from app.models.product import Product
+
+
+class ProductPriceSummary(Base):
+    """
+    Agregado de precios por producto (1:1 con products).
+
+    Se recalcula cada vez que se crea, edita o elimina un Price
+    (ver app/core/price_summary.py), de modo que el listado puede ordenar
+    por precio y filtrar por rango / disponibilidad en UNA consulta indexada
+    sin cargar todas las filas de `prices`.
+
+    Cada producto tiene siempre su fila (vacía si no tiene precios): se inserta
+    en el mismo flush que el producto (listener after_insert más abajo).
+    No tiene relación ORM con Product a propósito: el borrado del producto
+    lo resuelve la FK (ON DELETE CASCADE) y el listado hace un join explícito.
+    """
+    __tablename__ = "product_price_summaries"
+
+    product_id: Mapped[str] = mapped_column(
+        String(36),
+        ForeignKey("products.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    min_price: Mapped[Optional[float]] = mapped_column(Numeric(10, 2), nullable=True)
+    max_price: Mapped[Optional[float]] = mapped_column(Numeric(10, 2), nullable=True)
+    cheapest_site: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    # Tiendas con availability distinta de out-of-stock
+    in_stock_stores: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    store_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # (min_price, product_id): orden por precio + desempate estable
+        Index("ix_product_price_summaries_min_price", "min_price", "product_id"),
+        Index("ix_product_price_summaries_max_price", "max_price"),
+        Index("ix_product_price_summaries_in_stock", "in_stock_stores", "min_price"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<ProductPriceSummary product={self.product_id} min={self.min_price}>"
+
+
+# sort=price_desc (NULLS LAST): PostgreSQL necesita un índice con ese orden exacto.
+# SQLite no admite NULLS LAST en CREATE INDEX → solo se crea en PostgreSQL.
+Index(
+    "ix_product_price_summaries_min_price_desc",
+    ProductPriceSummary.min_price.desc().nulls_last(),
+    ProductPriceSummary.product_id.desc(),
+).ddl_if(dialect="postgresql")
+
+
+@event.listens_for(Product, "after_insert")
+def _create_empty_summary(mapper, connection, target: Product) -> None:
+    """Fila de resumen vacía para cada producto nuevo insertado vía ORM."""
+    connection.execute(
+        insert(ProductPriceSummary.__table__).values(
+            product_id=target.id, in_stock_stores=0, store_count=0, updated_at=datetime.utcnow(),
+        )
+    )
@@ -1,9 +1,13 @@
 import uuid
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import String, Text, Float, Integer, Numeric, Boolean, Enum as SAEnum, DateTime
+from sqlalchemy import (
+    String, Text, Float, Integer, Numeric, Boolean, Enum as SAEnum, DateTime, Index,
+    DDL, event, literal_column,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
+from app.core.sanitize import fold_text
 import enum
 
 
@@ -40,6 +44,16 @@ class Product(Base):
     rating: Mapped[float] = mapped_column(Float, default=0.0)
     reviews: Mapped[int] = mapped_column(Integer, default=0)
 
+    # Documento de búsqueda: nombre + marca + subcategoría + descripción,
+    # normalizado (minúsculas, sin acentos). Lo mantiene el ORM (listeners abajo);
+    # las cargas con Core deben usar build_search_document().
+    search_document: Mapped[str] = mapped_column(Text, nullable=False, default="")
+
+    # Hash del contenido importado por la sincronización de catálogo
+    # (app/core/catalog_import.py). NULL = producto creado a mano; "" = editado
+    # fuera de la sincronización (la siguiente lo reescribe).
+    content_hash: Mapped[Optional[str]] = mapped_column(String(32), nullable=True)
+
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -61,3 +75,59 @@ class Product(Base):
 
     def __repr__(self) -> str:
         return f"<Product {self.name} ({self.brand})>"
+
+
+# ── Índices compuestos para los órdenes del listado (paginación keyset) ─────
+# (clave de orden, id) → ORDER BY … LIMIT y "después del cursor" sin recorrer
+# las páginas anteriores. created_at se recorre hacia atrás para sort=newest.
+Index("ix_products_rating_id", Product.rating.desc(), Product.id)
+Index("ix_products_name_id", Product.name, Product.id)
+Index("ix_products_created_at_id", Product.created_at, Product.id)
+
+
+# ── Búsqueda (ver app/core/search.py) ───────────────────────────────────────
+def build_search_document(name: str | None, brand: str | None,
+                          subcategory: str | None, description: str | None) -> str:
+    """Texto que indexan el full-text (español) y los trigramas."""
+    return fold_text(" ".join(filter(None, (name, brand, subcategory, description))))
+
+
+@event.listens_for(Product, "before_insert")
+@event.listens_for(Product, "before_update")
+def _refresh_search_document(mapper, connection, target: Product) -> None:
+    target.search_document = build_search_document(
+        target.name, target.brand, target.subcategory, target.description
+    )
+
+
+@event.listens_for(Product, "before_update")
+def _mark_edited(mapper, connection, target: Product) -> None:
+    if target.content_hash:
+        target.content_hash = ""
+
+
+# Índices solo PostgreSQL: full-text en español + trigramas (pg_trgm) para
+# búsqueda difusa y para que brand/subcategory ILIKE '%x%' no hagan seq scan.
+# SQLite (tests locales) no los crea y la búsqueda usa el fallback de search.py.
+# Configuración de texto literal (no parámetro): la expresión de las consultas
+# debe ser idéntica a la del índice para que el planner lo use.
+SEARCH_TS_CONFIG = literal_column("'spanish'")
+
+event.listen(
+    Base.metadata, "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+event.listen(
+    Product.__table__, "after_create",
+    DDL(
+        "CREATE INDEX IF NOT EXISTS ix_products_search_fts "
+        "ON products USING gin (to_tsvector('spanish', search_document))"
+    ).execute_if(dialect="postgresql"),
+)
+for _col in ("search_document", "brand", "subcategory"):
+    Index(
+        f"ix_products_{_col}_trgm",
+        getattr(Product, _col),
+        postgresql_using="gin",
+        postgresql_ops={_col: "gin_trgm_ops"},
+    ).ddl_if(dialect="postgresql")
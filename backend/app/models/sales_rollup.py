@@ -0,0 +1,39 @@
+from datetime import date
+from decimal import Decimal
+from sqlalchemy import String, Integer, Numeric, Date, Enum as SAEnum
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+from app.models.order import OrderStatusEnum
+
+
+class SalesDaily(Base):
+    """
+    Rollup de ventas: líneas de pedido agregadas por día × marca × categoría ×
+    tienda × status. Lo mantiene app/core/sales_rollup.py al crear pedidos y al
+    cambiar su status; backfill_rollups.py lo reconstruye desde order_items.
+
+    Las dimensiones no admiten NULL (son PK): '' = sin marca / sin categoría /
+    precio propio de Lookaly.
+    """
+    __tablename__ = "sales_daily"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    brand: Mapped[str] = mapped_column(String(100), primary_key=True)
+    category: Mapped[str] = mapped_column(String(50), primary_key=True)
+    site: Mapped[str] = mapped_column(String(100), primary_key=True)
+    status: Mapped[OrderStatusEnum] = mapped_column(SAEnum(OrderStatusEnum), primary_key=True)
+
+    lines: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    units: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    revenue: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False, default=0)
+
+
+class OrdersDaily(Base):
+    """Rollup de pedidos por día × status (nº de pedidos y suma de orders.total)."""
+    __tablename__ = "orders_daily"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    status: Mapped[OrderStatusEnum] = mapped_column(SAEnum(OrderStatusEnum), primary_key=True)
+
+    orders: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    revenue: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False, default=0)
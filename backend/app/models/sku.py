@@ -0,0 +1,22 @@
+from sqlalchemy import String, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+
+class SkuCounter(Base):
+    """
+    Siguiente número de SKU a asignar por prefijo (LOOK → LOOK-0001, LOOK-0002…).
+    Una fila por prefijo; se incrementa con UPDATE … RETURNING (ver app/core/sku.py).
+    """
+    __tablename__ = "sku_counters"
+
+    prefix: Mapped[str] = mapped_column(String(20), primary_key=True)
+    next_value: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+
+
+class SkuFreeNumber(Base):
+    """Números liberados al eliminar productos: se reutilizan antes que el contador."""
+    __tablename__ = "sku_free_numbers"
+
+    prefix: Mapped[str] = mapped_column(String(20), primary_key=True)
+    number: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -1,7 +1,9 @@
 """
-Router de autenticación — endpoints: /register, /login, /refresh, /logout, /me
+Router de autenticación — endpoints: /register, /login, /refresh, /logout, /me,
+/admin/password-hasher/metrics
 
-3.2  Contraseñas: hash bcrypt con salt único, nunca texto plano.
+3.2  Contraseñas: hash bcrypt con salt único, nunca texto plano. bcrypt corre en
+     un pool de procesos acotado (app/core/password_hasher.py): 503 si se satura.
 3.4  Tokens: access de vida corta (30 min) + refresh de vida larga (7 días).
      HttpOnly cookies opcionales (pasar use_cookies=true).
 3.5  Errores: mensajes genéricos para no revelar información sensible.
@@ -12,18 +14,18 @@ from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response,
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from jose import JWTError, jwt
+from jose import JWTError
 
 from app.database import get_db
 from app.models.user import User
-from app.schemas.user import UserCreate, UserOut, Token
+from app.schemas.user import UserCreate, UserOut, Token, PasswordHasherMetricsOut
 from app.core.security import (
-    hash_password, verify_password,
     create_access_token, create_refresh_token,
-    revoke_token, is_token_revoked,
+    decode_token, revoke_token, is_token_revoked,
     set_auth_cookies, clear_auth_cookies,
-    get_current_user, oauth2_scheme,
+    get_current_user, get_current_admin, oauth2_scheme,
 )
+from app.core.password_hasher import password_hasher
 from app.core.sanitize import sanitize_str
 from app.config import settings
 from app.core.limiter import limiter  # 4.2: rate limiting anti fuerza bruta
@@ -51,7 +53,7 @@ async def register(request: Request, data: UserCreate, db: AsyncSession = Depend
     user = User(
         email=clean_email,
         name=clean_name,
-        hashed_password=hash_password(data.password),  # bcrypt + salt único automático
+        hashed_password=await password_hasher.hash(data.password),  # bcrypt + salt único (pool de procesos)
         password_changed_at=datetime.utcnow(),          # para política de caducidad
     )
     db.add(user)
@@ -81,7 +83,11 @@ async def login(
     user = result.scalar_one_or_none()
 
     # Mensaje único — no revela si el email existe (evita user enumeration)
-    if not user or not user.hashed_password or not verify_password(form_data.password, user.hashed_password):
+    # bcrypt corre en el pool de procesos: el event loop sigue atendiendo otras requests
+    if (
+        not user or not user.hashed_password
+        or not await password_hasher.verify(form_data.password, user.hashed_password)
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email o contraseña incorrectos",
@@ -131,10 +137,8 @@ async def refresh_token_endpoint(
     - Rota el refresh token: invalida el anterior, emite uno nuevo
     """
     credentials_exc = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token inválido o expirado")
-    if is_token_revoked(refresh_token):
-        raise credentials_exc
     try:
-        payload = jwt.decode(refresh_token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = decode_token(refresh_token)
         if payload.get("type") != "refresh":
             raise credentials_exc
         user_id: str = payload.get("sub")
@@ -142,13 +146,15 @@ async def refresh_token_endpoint(
             raise credentials_exc
     except JWTError:
         raise credentials_exc
+    if await is_token_revoked(refresh_token, payload):
+        raise credentials_exc
 
     result = await db.execute(select(User).where(User.id == user_id))
     user = result.scalar_one_or_none()
     if not user or not user.is_active:
         raise credentials_exc
 
-    revoke_token(refresh_token)  # rotación: invalida el refresh token usado
+    await revoke_token(refresh_token, payload)  # rotación: invalida el refresh token usado
     new_access = create_access_token({"sub": user.id})
     new_refresh = create_refresh_token({"sub": user.id})
 
@@ -166,14 +172,20 @@ async def logout(
     current_user: User = Depends(get_current_user),
 ):
     """
-    Invalida el access token (lista de revocados in-memory).
-    En producción: Redis con TTL = vida restante del token.
+    Invalida el access token: su jti queda revocado hasta que caduque
+    (app/core/revocation.py; compartido entre workers con REDIS_URL).
     Limpia las cookies HttpOnly si se usaron.
     """
-    revoke_token(token)
+    await revoke_token(token, decode_token(token))
     clear_auth_cookies(response)
 
 
 @router.get("/me", response_model=UserOut)
 async def get_me(current_user: User = Depends(get_current_user)):
     return current_user
+
+
+@router.get("/admin/password-hasher/metrics", response_model=PasswordHasherMetricsOut)
+async def password_hasher_metrics(_: User = Depends(get_current_admin)):
+    """Pool de bcrypt de ESTE worker: cola, rechazos (503) y latencia de hash/verify."""
+    return password_hasher.metrics()
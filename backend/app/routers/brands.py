@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
@@ -6,6 +6,7 @@ from app.database import get_db
 from app.models.brand import Brand
 from app.schemas.brand import BrandCreate, BrandOut
 from app.core.security import get_current_admin, require_role
+from app.core.response_cache import response_cache
 
 _can_manage = require_role('gestor_inventario')
 
@@ -13,10 +14,13 @@ router = APIRouter()
 
 
 @router.get("", response_model=list[BrandOut])
-async def list_brands(db: AsyncSession = Depends(get_db)):
-    """Lista todas las marcas ordenadas alfabéticamente. Pública."""
-    result = await db.execute(select(Brand).order_by(Brand.name))
-    return result.scalars().all()
+async def list_brands(request: Request, db: AsyncSession = Depends(get_db)):
+    """Lista todas las marcas ordenadas alfabéticamente. Pública (cacheada con ETag)."""
+    async def build():
+        result = await db.execute(select(Brand).order_by(Brand.name))
+        return result.scalars().all()
+
+    return await response_cache.serve(request, build, model=list[BrandOut], tags=("brands",))
 
 
 @router.post("", response_model=BrandOut, status_code=status.HTTP_201_CREATED,
@@ -1,131 +1,350 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import uuid
+from datetime import datetime
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update, delete, case
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import selectinload
 
 from app.database import get_db
 from app.models.cart import CartItem
-from app.models.price import Price
-from app.schemas.cart import CartItemCreate, CartItemUpdate, CartItemOut, CartOut
+from app.models.product import Product
+from app.schemas.cart import (
+    CartItemCreate, CartItemUpdate, CartItemOut, CartOut, CartLineOut, CartStoreOut, CartSlimOut,
+    CartOptimizeIn, CartPlanOut, CartPlanLineOut, CartPlanStoreOut, CartBatchIn, CartUpdateOp,
+)
+from app.core.pricing import CartPricing, price_cart, cart_offers
+from app.core.cart_optimizer import (
+    CartLine as OptimizerLine, Offer, InfeasibleCart, evaluate, optimize_cart,
+)
 from app.core.security import get_current_user
+from app.core.idempotency import idempotency
 from app.models.user import User
 
 router = APIRouter()
 
-FREE_SHIPPING_THRESHOLD = 2500.0
-SHIPPING_COST = 150.0
-
-
-def _calculate_cart(items: list[CartItem]) -> CartOut:
-    cart_items_out = []
-    subtotal = 0.0
 
-    for item in items:
-        price_entry = next(
-            (p for p in item.product.prices if p.site == item.selected_site),
-            item.product.prices[0] if item.product.prices else None,
-        )
-        item_price = price_entry.price if price_entry else 0.0
-        subtotal += item_price * item.quantity
-        cart_items_out.append(item)
-
-    shipping = 0.0 if subtotal >= FREE_SHIPPING_THRESHOLD else (SHIPPING_COST if subtotal > 0 else 0.0)
-
-    return CartOut(
-        items=cart_items_out,
-        total_items=sum(i.quantity for i in items),
-        subtotal=subtotal,
-        shipping=shipping,
-        total=subtotal + shipping,
+def _slim_cart(pricing: CartPricing) -> CartSlimOut:
+    return CartSlimOut(
+        items=[CartLineOut.model_validate(line) for line in pricing.lines],
+        stores=[CartStoreOut.model_validate(store) for store in pricing.stores],
+        total_items=pricing.total_items,
+        subtotal=pricing.subtotal,
+        shipping=pricing.shipping,
+        total=pricing.total,
+        free_shipping_remaining=pricing.free_shipping_remaining,
     )
 
 
-@router.get("", response_model=CartOut)
+@router.get("", response_model=CartOut | CartSlimOut)
 async def get_cart(
+    view: Literal["full", "slim"] = Query("full", description="slim: líneas ligeras con precio resuelto (CartLineOut)"),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
+    """
+    Carrito del usuario con totales. Precios, envío y umbral de envío gratis se
+    resuelven en una sola consulta agregada (app/core/pricing.py). Dos vistas:
+      • full  — CartItemOut con el ProductOut completo por línea (compatibilidad).
+      • slim  — CartSlimOut: nombre, imagen, precio de la tienda y subtotal por
+                tienda; sin cargar productos, precios ni imágenes como ORM.
+    """
+    pricing = await price_cart(db, current_user.id)
+    if view == "slim":
+        return _slim_cart(pricing)
+
+    totals = dict(
+        total_items=pricing.total_items,
+        subtotal=pricing.subtotal,
+        shipping=pricing.shipping,
+        total=pricing.total,
+    )
     result = await db.execute(
         select(CartItem)
-        .options(selectinload(CartItem.product).selectinload("prices"))
+        .options(selectinload(CartItem.product).selectinload(Product.prices))
         .where(CartItem.user_id == current_user.id)
+        .order_by(CartItem.id)
     )
-    items = result.scalars().all()
-    return _calculate_cart(items)
+    return CartOut(items=result.scalars().all(), **totals)
+
+
+@router.post("/optimize", response_model=CartPlanOut)
+async def optimize_cart_stores(
+    data: CartOptimizeIn,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    ¿Cuál es la forma más barata de comprar todo el carrito? Reparte las líneas
+    entre las tiendas con stock minimizando precio + envío por tienda (con su
+    umbral de envío gratis), opcionalmente con un máximo de tiendas distintas.
+    Exacto en carritos pequeños, heurístico en grandes; responde en ~50 ms
+    (app/core/cart_optimizer.py). No modifica el carrito.
+    """
+    offered = await cart_offers(db, current_user.id)
+    if not offered:
+        raise HTTPException(status_code=400, detail="Tu carrito está vacío")
+
+    lines = [
+        OptimizerLine(line.id, line.quantity, [
+            Offer(o.site, o.unit_price, o.shipping) for o in line.offers if o.in_stock
+        ])
+        for line in offered
+    ]
+    try:
+        plan = optimize_cart(lines, max_stores=data.max_stores)
+    except InfeasibleCart:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Ninguna combinación de {data.max_stores} tienda(s) tiene stock de todo el carrito",
+        )
+
+    # Costo de la selección actual con el mismo cálculo (sobre las mismas líneas)
+    current = {}
+    for line in offered:
+        if line.id in plan.assignment:
+            offer = next((o for o in line.offers if o.site == line.selected_site), None)
+            if offer is None:
+                current = None
+                break
+            current[line.id] = Offer(offer.site, offer.unit_price, offer.shipping)
+    current_total = None
+    if current is not None:
+        current_total = round(evaluate([line for line in lines if line.id in current], current)[0], 2)
+
+    plan_lines = []
+    for line in offered:
+        offer = plan.assignment.get(line.id)
+        if offer is None:
+            continue
+        plan_lines.append(CartPlanLineOut(
+            id=line.id,
+            product_id=line.product_id,
+            quantity=line.quantity,
+            selected_site=line.selected_site,
+            site=offer.site,
+            unit_price=offer.unit_price,
+            line_total=round(offer.unit_price * line.quantity, 2),
+            changed=offer.site != line.selected_site,
+        ))
+    return CartPlanOut(
+        lines=plan_lines,
+        stores=[CartPlanStoreOut.model_validate(store) for store in plan.stores],
+        items_total=plan.items_total,
+        shipping=plan.shipping,
+        total=plan.total,
+        current_total=current_total,
+        savings=round(current_total - plan.total, 2) if current_total is not None else None,
+        optimal=plan.optimal,
+        method=plan.method,
+        unavailable=plan.unavailable,
+        elapsed_ms=plan.elapsed_ms,
+    )
+
+
+def _upsert_lines(db: AsyncSession):
+    """INSERT … ON CONFLICT (user_id, product_id, selected_site) que suma la cantidad."""
+    insert = postgresql.insert if db.bind.dialect.name == "postgresql" else sqlite.insert
+    stmt = insert(CartItem.__table__)
+    return stmt.on_conflict_do_update(
+        index_elements=["user_id", "product_id", "selected_site"],
+        set_={"quantity": CartItem.__table__.c.quantity + stmt.excluded.quantity, "updated_at": stmt.excluded.updated_at},
+    )
+
+
+@router.post("/batch", response_model=CartSlimOut)
+async def cart_batch(
+    data: CartBatchIn,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Varias operaciones sobre el carrito en UNA transacción (p. ej. fusionar el
+    carrito de invitado al iniciar sesión) y el carrito recalculado (vista slim).
+
+    Se aplican por conjuntos, no paso a paso:
+      • remove — borra la línea; gana sobre cualquier update de la misma línea.
+      • update — cantidad y/o tienda; si una línea se repite, gana el último.
+      • add    — suma a la línea (producto, tienda) o la crea; adds repetidos se suman.
+    Orden: un DELETE, un UPDATE (CASE por id) y un INSERT … ON CONFLICT.
+    Todo o nada: si falta una línea o un producto no se aplica ninguna operación.
+    """
+    async def build():
+        removes: set[str] = set()
+        updates: dict[str, CartUpdateOp] = {}
+        adds: dict[tuple[str, str], int] = {}
+        for op in data.operations:
+            if op.op == "remove":
+                removes.add(op.id)
+            elif op.op == "update":
+                updates[op.id] = op
+            else:
+                key = (op.product_id, op.selected_site)
+                adds[key] = adds.get(key, 0) + op.quantity
+
+        ids = removes | updates.keys()
+        if ids:
+            owned = set((await db.execute(
+                select(CartItem.id).where(CartItem.user_id == current_user.id, CartItem.id.in_(ids))
+            )).scalars())
+            missing = sorted(ids - owned)
+            if missing:
+                raise HTTPException(status_code=404, detail=f"Item no encontrado en tu carrito: {', '.join(missing)}")
+        if adds:
+            product_ids = {product_id for product_id, _ in adds}
+            found = set((await db.execute(
+                select(Product.id).where(Product.id.in_(product_ids), Product.is_active == True)  # noqa: E712
+            )).scalars())
+            missing = sorted(product_ids - found)
+            if missing:
+                raise HTTPException(status_code=404, detail=f"Producto '{missing[0]}' no encontrado o no disponible")
+
+        for item_id in removes:
+            updates.pop(item_id, None)
+        try:
+            if removes:
+                await db.execute(
+                    delete(CartItem)
+                    .where(CartItem.user_id == current_user.id, CartItem.id.in_(removes))
+                    .execution_options(synchronize_session=False)
+                )
+            quantities = {i: op.quantity for i, op in updates.items() if op.quantity is not None}
+            sites = {i: op.selected_site for i, op in updates.items() if op.selected_site}
+            values = {}
+            if quantities:
+                values["quantity"] = case(quantities, value=CartItem.id, else_=CartItem.quantity)
+            if sites:
+                values["selected_site"] = case(sites, value=CartItem.id, else_=CartItem.selected_site)
+            if values:
+                await db.execute(
+                    update(CartItem)
+                    .where(CartItem.user_id == current_user.id, CartItem.id.in_(quantities.keys() | sites.keys()))
+                    .values(**values)
+                    .execution_options(synchronize_session=False)
+                )
+            if adds:
+                now = datetime.utcnow()
+                await db.execute(_upsert_lines(db), [
+                    {
+                        "id": str(uuid.uuid4()), "user_id": current_user.id,
+                        "product_id": product_id, "selected_site": site, "quantity": quantity,
+                        "updated_at": now,
+                    }
+                    for (product_id, site), quantity in adds.items()
+                ])
+        except IntegrityError:
+            # Un update movió una línea a una (producto, tienda) que ya está en el carrito
+            raise HTTPException(status_code=409, detail="Ya tienes ese producto de esa tienda en tu carrito")
+
+        return _slim_cart(await price_cart(db, current_user.id))
+
+    return await idempotency.run(request, db, current_user.id, build, model=CartSlimOut)
 
 
 @router.post("/items", response_model=CartItemOut, status_code=status.HTTP_201_CREATED)
 async def add_to_cart(
     data: CartItemCreate,
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    # Si ya existe en carrito, incrementar cantidad
-    result = await db.execute(
-        select(CartItem).where(
-            CartItem.user_id == current_user.id,
-            CartItem.product_id == data.product_id,
-            CartItem.selected_site == data.selected_site,
+    async def build():
+        # Si ya existe en carrito, incrementar cantidad
+        result = await db.execute(
+            select(CartItem).where(
+                CartItem.user_id == current_user.id,
+                CartItem.product_id == data.product_id,
+                CartItem.selected_site == data.selected_site,
+            )
         )
-    )
-    existing = result.scalar_one_or_none()
-    if existing:
-        existing.quantity += data.quantity
+        existing = result.scalar_one_or_none()
+        if existing:
+            existing.quantity += data.quantity
+            await db.flush()
+            await db.refresh(existing)
+            return existing
+
+        item = CartItem(user_id=current_user.id, **data.model_dump())
+        db.add(item)
         await db.flush()
-        await db.refresh(existing)
-        return existing
+        await db.refresh(item)
+        return item
 
-    item = CartItem(user_id=current_user.id, **data.model_dump())
-    db.add(item)
-    await db.flush()
-    await db.refresh(item)
-    return item
+    return await idempotency.run(
+        request, db, current_user.id, build, model=CartItemOut, status_code=status.HTTP_201_CREATED,
+    )
 
 
 @router.patch("/items/{item_id}", response_model=CartItemOut)
 async def update_cart_item(
     item_id: str,
     data: CartItemUpdate,
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    result = await db.execute(
-        select(CartItem).where(CartItem.id == item_id, CartItem.user_id == current_user.id)
-    )
-    item = result.scalar_one_or_none()
-    if not item:
-        raise HTTPException(status_code=404, detail="Item no encontrado en tu carrito")
+    async def build():
+        result = await db.execute(
+            select(CartItem).where(CartItem.id == item_id, CartItem.user_id == current_user.id)
+        )
+        item = result.scalar_one_or_none()
+        if not item:
+            raise HTTPException(status_code=404, detail="Item no encontrado en tu carrito")
+
+        if data.quantity < 1:
+            raise HTTPException(status_code=400, detail="La cantidad debe ser al menos 1")
 
-    if data.quantity < 1:
-        raise HTTPException(status_code=400, detail="La cantidad debe ser al menos 1")
+        item.quantity = data.quantity
+        if data.selected_site:
+            item.selected_site = data.selected_site
+        try:
+            await db.flush()
+        except IntegrityError:
+            raise HTTPException(status_code=409, detail="Ya tienes ese producto de esa tienda en tu carrito")
+        return item
 
-    item.quantity = data.quantity
-    if data.selected_site:
-        item.selected_site = data.selected_site
-    return item
+    return await idempotency.run(request, db, current_user.id, build, model=CartItemOut)
 
 
 @router.delete("/items/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def remove_cart_item(
     item_id: str,
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    result = await db.execute(
-        select(CartItem).where(CartItem.id == item_id, CartItem.user_id == current_user.id)
+    async def build():
+        result = await db.execute(
+            select(CartItem).where(CartItem.id == item_id, CartItem.user_id == current_user.id)
+        )
+        item = result.scalar_one_or_none()
+        if not item:
+            raise HTTPException(status_code=404, detail="Item no encontrado en tu carrito")
+        await db.delete(item)
+
+    return await idempotency.run(
+        request, db, current_user.id, build, model=None, status_code=status.HTTP_204_NO_CONTENT,
     )
-    item = result.scalar_one_or_none()
-    if not item:
-        raise HTTPException(status_code=404, detail="Item no encontrado en tu carrito")
-    await db.delete(item)
 
 
 @router.delete("", status_code=status.HTTP_204_NO_CONTENT)
 async def clear_cart(
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    result = await db.execute(select(CartItem).where(CartItem.user_id == current_user.id))
-    items = result.scalars().all()
-    for item in items:
-        await db.delete(item)
+    """Vacía el carrito: un solo DELETE por conjunto."""
+    async def build():
+        await db.execute(
+            delete(CartItem)
+            .where(CartItem.user_id == current_user.id)
+            .execution_options(synchronize_session=False)
+        )
+
+    return await idempotency.run(
+        request, db, current_user.id, build, model=None, status_code=status.HTTP_204_NO_CONTENT,
+    )
@@ -21,7 +21,8 @@ from sqlalchemy import select
 from app.config import settings
 from app.database import get_db
 from app.models.user import User
-from app.core.security import hash_password, create_access_token
+from app.core.security import create_access_token
+from app.core.password_hasher import password_hasher
 
 router = APIRouter()
 
@@ -100,7 +101,7 @@ async def google_callback(
             email=google_email,
             name=google_name,
             google_id=google_id,
-            hashed_password=hash_password(secrets.token_hex(32)),  # hash inutilizable
+            hashed_password=await password_hasher.hash(secrets.token_hex(32)),  # hash inutilizable
             is_active=True,
             password_changed_at=datetime.utcnow(),
         )
@@ -7,31 +7,53 @@ Endpoints de usuario:
   GET   /api/orders/{id}     — detalle de un pedido
 
 Endpoints de admin:
-  GET    /api/orders/admin/all        — todos los pedidos
-  PATCH  /api/orders/admin/{id}       — cambiar status, marcar pagado, etc.
+  GET    /api/orders/admin/all        — todos los pedidos (view=summary: sin líneas)
+  GET    /api/orders/admin/{id}/items — líneas de un pedido (expansión del listado)
+  GET    /api/orders/admin/export     — volcado completo en streaming (CSV / NDJSON)
+  GET    /api/orders/admin/stats      — resumen de ventas desde los rollups (analista)
+  GET    /api/orders/admin/events/metrics — cola del outbox de eventos (lag, pendientes)
+  PATCH  /api/orders/admin/{id}       — cambiar status, marcar pagado, etc. (409 si el mes está archivado)
 """
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select
+from typing import AsyncIterator, Literal
 from sqlalchemy.orm import selectinload
-from datetime import datetime
-import uuid
+from datetime import date, datetime, timedelta
 
 from app.database import get_db
-from app.models.order import Order, OrderItem
-from app.models.cart import CartItem
-from app.models.product import Product
-from app.schemas.order import OrderCreate, OrderUpdate, OrderOut, OrderListOut
-from app.core.security import get_current_user, get_current_admin
+from app.models.order import Order, OrderItem, OrderStatusEnum
+from app.schemas.order import (
+    OrderCreate, OrderUpdate, OrderOut, OrderItemOut, OrderListOut, OrderSummaryListOut, SalesStatsOut,
+    OutboxMetricsOut,
+)
+from app.core.security import get_current_user, get_current_admin, require_role
+from app.core import checkout, order_partitions, outbox, sales_rollup
+from app.core.sales_rollup import Dimension, StatsFilters
+from app.core.checkout import CheckoutError, LineRequest
+from app.core.idempotency import idempotency
+from app.core.export import ExportFormat, export_response, ndjson_response, stream_rows
+from app.core.pagination import (
+    SortKey, CountMode, order_by_keys, keyset_after, encode_cursor, decode_cursor, count_rows,
+)
 from app.models.user import User
 
 router = APIRouter()
 
 
-async def _get_order_or_404(order_id: str, db: AsyncSession, user_id: str | None = None) -> Order:
+async def _get_order_or_404(
+    order_id: str, db: AsyncSession, user_id: str | None = None, *, lock: bool = False,
+) -> Order:
+    """
+    lock=True: SELECT … FOR UPDATE del pedido hasta el COMMIT. Lo usa quien
+    decide según el status leído (devolver/reservar stock, rollups, outbox):
+    dos PATCH concurrentes se serializan y el segundo ve el status nuevo.
+    """
     query = select(Order).options(selectinload(Order.order_items)).where(Order.id == order_id)
     if user_id:
         query = query.where(Order.user_id == user_id)
+    if lock:
+        query = query.with_for_update(of=Order).execution_options(populate_existing=True)
     result = await db.execute(query)
     order = result.scalar_one_or_none()
     if not order:
@@ -44,60 +66,30 @@ async def _get_order_or_404(order_id: str, db: AsyncSession, user_id: str | None
 @router.post("", response_model=OrderOut, status_code=status.HTTP_201_CREATED)
 async def create_order(
     data: OrderCreate,
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
-    Crea un pedido con los items indicados.
-    Hace snapshot del nombre, marca y precio al momento de la compra.
+    Crea un pedido con los items indicados (app/core/checkout.py): precios
+    resueltos por el servidor en una consulta, reserva de stock con un UPDATE
+    condicional (409 si algún producto no alcanza) e inserción multi-fila.
+    Hace snapshot del nombre, marca, categoría, tienda y precio al momento de la compra.
+    Con Idempotency-Key un reintento devuelve el mismo pedido sin crear otro.
     """
-    if not data.items:
-        raise HTTPException(status_code=400, detail="El pedido debe tener al menos un producto")
+    async def build():
+        lines = [
+            LineRequest(item.product_id, item.quantity, item.selected_site)
+            for item in data.items
+        ]
+        try:
+            return await checkout.create_order(db, current_user.id, lines, data.shipping_address)
+        except CheckoutError as exc:
+            raise HTTPException(status_code=exc.status_code, detail=exc.detail)
 
-    order_id = str(uuid.uuid4())
-    total = 0.0
-    order_items = []
-
-    for item_data in data.items:
-        # Verificar que el producto existe y está activo
-        result = await db.execute(
-            select(Product).where(Product.id == item_data.product_id, Product.is_active == True)  # noqa: E712
-        )
-        product = result.scalar_one_or_none()
-        if not product:
-            raise HTTPException(
-                status_code=404,
-                detail=f"Producto '{item_data.product_id}' no encontrado o no disponible",
-            )
-
-        subtotal = round(item_data.unit_price * item_data.quantity, 2)
-        total += subtotal
-
-        order_items.append(OrderItem(
-            id=str(uuid.uuid4()),
-            order_id=order_id,
-            product_id=product.id,
-            quantity=item_data.quantity,
-            unit_price=item_data.unit_price,
-            subtotal=subtotal,
-            # Snapshots — inmutables aunque el producto cambie
-            product_name=product.name,
-            product_brand=product.brand,
-        ))
-
-    order = Order(
-        id=order_id,
-        user_id=current_user.id,
-        shipping_address=data.shipping_address,
-        total=round(total, 2),
+    return await idempotency.run(
+        request, db, current_user.id, build, model=OrderOut, status_code=status.HTTP_201_CREATED,
     )
-    db.add(order)
-    for oi in order_items:
-        db.add(oi)
-
-    await db.flush()
-    await db.refresh(order)
-    return order
 
 
 @router.get("", response_model=list[OrderOut])
@@ -127,28 +119,214 @@ async def get_order(
 
 # ── Endpoints de admin ─────────────────────────────────────────────────────────
 
-@router.get("/admin/all", response_model=OrderListOut)
+# Orden del listado admin: más recientes primero, id desempata (keyset)
+_ADMIN_SORT_KEYS = [SortKey(Order.created_at, desc=True), SortKey(Order.id, desc=True)]
+
+
+# Columnas del listado admin en modo summary (sin order_items)
+_SUMMARY_COLUMNS = (
+    Order.id, Order.user_id, Order.status, Order.shipping_address, Order.total,
+    Order.item_count, Order.created_at, Order.paid_at, Order.updated_at,
+)
+
+
+@router.get("/admin/all", response_model=OrderListOut | OrderSummaryListOut)
 async def admin_list_orders(
     page: int = Query(1, ge=1),
     size: int = Query(20, ge=1, le=100),
-    status_filter: str | None = Query(None, alias="status"),
+    status_filter: OrderStatusEnum | None = Query(None, alias="status"),
+    user_id: str | None = Query(None),
+    since: datetime | None = Query(None, description="created_at >= since"),
+    until: datetime | None = Query(None, description="created_at < until"),
+    view: Literal["full", "summary"] = Query("full", description="summary: sin líneas, con item_count (OrderSummaryOut)"),
+    cursor: str | None = Query(None, description="next_cursor de la página anterior (modo keyset; ignora `page`)"),
+    count: CountMode | None = Query(None, description="exact | estimated | none — por defecto exact con `page`, none con `cursor`"),
     db: AsyncSession = Depends(get_db),
     _: None = Depends(get_current_admin),
 ):
-    """Lista todos los pedidos (admin). Soporta filtro por status."""
-    query = select(Order).options(selectinload(Order.order_items))
+    """
+    Lista todos los pedidos (admin). Filtros: status, user_id y rango de created_at.
+    Con `cursor` pagina por keyset (created_at, id): O(size) en cualquier página,
+    útil para exportaciones del back-office que recorren todo el historial.
+    Cada filtro tiene su índice compuesto (…, created_at, id), así que filtro +
+    orden + keyset son un único recorrido de índice.
+
+    view=summary es el modo del grid del back-office: solo columnas de `orders`
+    (total e item_count ya guardados), sin tocar order_items; las líneas de un
+    pedido se piden al expandirlo con GET /admin/{id}/items.
+    """
+    after = decode_cursor(cursor, "created_at", _ADMIN_SORT_KEYS) if cursor else None
+
+    if view == "summary":
+        query = select(*_SUMMARY_COLUMNS)
+    else:
+        query = select(Order).options(selectinload(Order.order_items))
+    filters = []
     if status_filter:
+        filters.append(Order.status == status_filter)
+    if user_id:
+        filters.append(Order.user_id == user_id)
+    if since:
+        filters.append(Order.created_at >= since)
+    if until:
+        filters.append(Order.created_at < until)
+    query = query.where(*filters)
+
+    total, estimated = await count_rows(
+        db, query, count or ("none" if cursor else "exact"),
+        estimate_table="orders", filtered=bool(filters),
+    )
+
+    query = query.order_by(*order_by_keys(_ADMIN_SORT_KEYS))
+    if after is not None:
+        query = query.where(keyset_after(_ADMIN_SORT_KEYS, after))
+    else:
+        query = query.offset((page - 1) * size)
+    result = await db.execute(query.limit(size + 1))
+    orders = result.all() if view == "summary" else result.scalars().all()
+
+    next_cursor = None
+    if len(orders) > size:
+        last = orders[size - 1]
+        next_cursor = encode_cursor("created_at", [last.created_at, last.id])
+    orders = orders[:size]
+
+    pages = (total + size - 1) // size if total is not None else None
+    list_model = OrderSummaryListOut if view == "summary" else OrderListOut
+    return list_model(
+        items=orders, total=total, total_estimated=estimated,
+        page=page, size=size, pages=pages, next_cursor=next_cursor,
+    )
+
+
+@router.get("/admin/{order_id}/items", response_model=list[OrderItemOut])
+async def admin_order_items(
+    order_id: str,
+    db: AsyncSession = Depends(get_db),
+    _: None = Depends(get_current_admin),
+):
+    """Líneas de un pedido (expansión perezosa del listado admin en modo summary)."""
+    items = (await db.execute(
+        select(OrderItem).where(OrderItem.order_id == order_id).order_by(OrderItem.id)
+    )).scalars().all()
+    if not items and (await db.execute(select(Order.id).where(Order.id == order_id))).first() is None:
+        raise HTTPException(status_code=404, detail="Pedido no encontrado")
+    return items
+
+
+# Export: una fila por línea de pedido (CSV) o un pedido con sus líneas (NDJSON)
+_EXPORT_ORDER_COLUMNS = [
+    ("id", Order.id), ("user_id", Order.user_id), ("status", Order.status),
+    ("shipping_address", Order.shipping_address), ("total", Order.total),
+    ("created_at", Order.created_at), ("paid_at", Order.paid_at), ("updated_at", Order.updated_at),
+]
+_EXPORT_ITEM_COLUMNS = [
+    ("item_id", OrderItem.id), ("product_id", OrderItem.product_id),
+    ("product_name", OrderItem.product_name), ("product_brand", OrderItem.product_brand),
+    ("product_category", OrderItem.product_category), ("site", OrderItem.site),
+    ("quantity", OrderItem.quantity), ("unit_price", OrderItem.unit_price), ("subtotal", OrderItem.subtotal),
+]
+
+
+async def _nest_items(batches: AsyncIterator) -> AsyncIterator[list[dict]]:
+    """Agrupa las filas (pedido × línea, ya ordenadas por pedido) en un objeto por pedido."""
+    n_order = len(_EXPORT_ORDER_COLUMNS)
+    order_keys = [name for name, _ in _EXPORT_ORDER_COLUMNS]
+    item_keys = ["id", *(name for name, _ in _EXPORT_ITEM_COLUMNS[1:])]
+    current: dict | None = None
+    async for rows in batches:
+        done = []
+        for row in rows:
+            if current is None or current["id"] != row[0]:
+                if current is not None:
+                    done.append(current)
+                current = {**dict(zip(order_keys, row[:n_order])), "order_items": []}
+            if row[n_order] is not None:  # pedido sin líneas (outer join)
+                current["order_items"].append(dict(zip(item_keys, row[n_order:])))
+        if done:
+            yield done
+    if current is not None:
+        yield [current]
+
+
+@router.get("/admin/export")
+async def admin_export_orders(
+    format: ExportFormat = Query("csv"),
+    # Tipado: un status inválido da 422 ANTES de empezar el streaming
+    status_filter: OrderStatusEnum | None = Query(None, alias="status"),
+    since: datetime | None = Query(None, description="created_at >= since"),
+    until: datetime | None = Query(None, description="created_at < until"),
+    _: None = Depends(get_current_admin),
+):
+    """
+    Volcado de pedidos con sus líneas, en streaming y con memoria constante
+    (cursor del servidor). Orden: created_at, id.
+    """
+    columns = _EXPORT_ORDER_COLUMNS + _EXPORT_ITEM_COLUMNS
+    query = (
+        select(*(col for _, col in columns))
+        .outerjoin(OrderItem, (OrderItem.order_id == Order.id) & (OrderItem.order_created_at == Order.created_at))
+        .order_by(Order.created_at, Order.id, OrderItem.id)
+    )
+    if status_filter is not None:
         query = query.where(Order.status == status_filter)
+    if since:
+        query = query.where(Order.created_at >= since)
+    if until:
+        query = query.where(Order.created_at < until)
 
-    count_q = select(func.count()).select_from(query.subquery())
-    total = (await db.execute(count_q)).scalar_one()
+    if format == "ndjson":
+        return ndjson_response("lookaly-orders", _nest_items(stream_rows(query)))
+    header = ["order_id", *(name for name, _ in columns[1:])]
+    return export_response("csv", "lookaly-orders", header=header, batches=stream_rows(query))
 
-    query = query.order_by(Order.created_at.desc()).offset((page - 1) * size).limit(size)
-    result = await db.execute(query)
-    orders = result.scalars().all()
 
-    pages = (total + size - 1) // size
-    return OrderListOut(items=orders, total=total, page=page, size=size, pages=pages)
+# Rango máximo de /admin/stats (los rollups lo aguantan; acota respuestas enormes con group_by=day)
+_STATS_MAX_DAYS = 3 * 366
+
+
+@router.get("/admin/stats", response_model=SalesStatsOut)
+async def admin_order_stats(
+    since: date | None = Query(None, description="Primer día (inclusive); por defecto hace 30 días"),
+    until: date | None = Query(None, description="Último día (inclusive); por defecto hoy (UTC)"),
+    group_by: list[Dimension] = Query(["day"], description="day | brand | category | site | status (repetible)"),
+    status_filter: list[OrderStatusEnum] | None = Query(None, alias="status", description="Por defecto todos menos cancelled"),
+    brand: str | None = Query(None),
+    category: str | None = Query(None),
+    site: str | None = Query(None, description="Tienda; '' = precio propio de Lookaly"),
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(require_role("analista")),
+):
+    """
+    Ventas agregadas por día / marca / categoría / tienda / status para la
+    pestaña "resumen". Lee SOLO los rollups (app/core/sales_rollup.py), nunca
+    orders ni order_items: cualquier rango responde en milisegundos.
+    """
+    until = until or datetime.utcnow().date()
+    since = since or until - timedelta(days=29)
+    if since > until:
+        raise HTTPException(status_code=422, detail="`since` no puede ser posterior a `until`")
+    if (until - since).days >= _STATS_MAX_DAYS:
+        raise HTTPException(status_code=422, detail=f"Rango máximo: {_STATS_MAX_DAYS} días")
+
+    statuses = status_filter or [s for s in OrderStatusEnum if s != OrderStatusEnum.cancelled]
+    rows, totals = await sales_rollup.stats(
+        db, since, until, group_by,
+        StatsFilters(statuses=statuses, brand=brand, category=category, site=site),
+    )
+    return SalesStatsOut(
+        since=since, until=until, group_by=[d for d in sales_rollup.DIMENSIONS if d in group_by],
+        statuses=statuses, rows=rows, totals=totals,
+    )
+
+
+@router.get("/admin/events/metrics", response_model=OutboxMetricsOut)
+async def admin_outbox_metrics(
+    db: AsyncSession = Depends(get_db),
+    _: None = Depends(get_current_admin),
+):
+    """Estado del outbox de eventos de pedidos: pendientes, muertos y lag de entrega."""
+    return await outbox.outbox_metrics(db)
 
 
 @router.patch("/admin/{order_id}", response_model=OrderOut)
@@ -159,9 +337,33 @@ async def admin_update_order(
     _: None = Depends(get_current_admin),
 ):
     """Actualiza status, dirección o fecha de pago de un pedido. Solo admin."""
-    order = await _get_order_or_404(order_id, db)
+    order = await _get_order_or_404(order_id, db, lock=True)
+    if await order_partitions.is_archived(db, order.created_at):
+        raise HTTPException(status_code=409, detail="El pedido pertenece a un mes archivado y no se puede modificar")
 
     if data.status is not None:
+        # Cancelar devuelve el stock; reactivar lo vuelve a reservar (409 si ya no alcanza)
+        was_cancelled = order.status == OrderStatusEnum.cancelled
+        is_cancelled = data.status.value == OrderStatusEnum.cancelled.value
+        try:
+            if is_cancelled and not was_cancelled:
+                await checkout.release_stock(db, checkout.order_quantities(order))
+            elif was_cancelled and not is_cancelled:
+                await checkout.reserve_stock(db, checkout.order_quantities(order))
+        except CheckoutError as exc:
+            raise HTTPException(status_code=exc.status_code, detail=exc.detail)
+        new_status = OrderStatusEnum(data.status.value)
+        await sales_rollup.order_status_changed(
+            db, order.id, order.created_at, order.total, order.status, new_status,
+        )
+        if new_status != order.status:
+            # Efectos secundarios (emails, sync…) fuera de la request: outbox + dispatcher
+            outbox.emit(db, outbox.ORDER_STATUS_CHANGED, order.id, {
+                "user_id": order.user_id,
+                "previous_status": order.status.value,
+                "status": new_status.value,
+                "total": str(order.total),
+            })
         order.status = data.status
         # Auto-poner paid_at si cambia a 'paid' y no tiene fecha
         if data.status.value == "paid" and not order.paid_at:
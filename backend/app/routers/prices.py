@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
@@ -6,25 +6,43 @@ from app.database import get_db
 from app.models.price import Price
 from app.schemas.price import PriceCreate, PriceUpdate, PriceOut
 from app.core.security import require_role
+from app.core.price_summary import refresh_price_summary
+from app.core.response_cache import response_cache
 
 _can_manage = require_role('gestor_inventario', 'vendedor')
 
 router = APIRouter()
 
 
+async def _ensure_site_free(db: AsyncSession, product_id: str, site: str, exclude_id: str | None = None) -> None:
+    """Un precio por (producto, tienda) — lo garantiza uq_prices_product_site."""
+    query = select(Price.id).where(Price.product_id == product_id, Price.site == site)
+    if exclude_id:
+        query = query.where(Price.id != exclude_id)
+    if (await db.execute(query.limit(1))).first():
+        raise HTTPException(status_code=409, detail="Ya existe un precio para esa tienda")
+
+
 @router.get("/product/{product_id}", response_model=list[PriceOut])
-async def get_prices_for_product(product_id: str, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Price).where(Price.product_id == product_id).order_by(Price.price))
-    return result.scalars().all()
+async def get_prices_for_product(product_id: str, request: Request, db: AsyncSession = Depends(get_db)):
+    async def build():
+        result = await db.execute(select(Price).where(Price.product_id == product_id).order_by(Price.price))
+        return result.scalars().all()
+
+    return await response_cache.serve(
+        request, build, model=list[PriceOut], tags=(f"product:{product_id}",),
+    )
 
 
 @router.post("", response_model=PriceOut, status_code=status.HTTP_201_CREATED,
              dependencies=[Depends(_can_manage)])
 async def create_price(data: PriceCreate, db: AsyncSession = Depends(get_db)):
     import uuid as _uuid
+    await _ensure_site_free(db, data.product_id, data.site)
     price = Price(id=str(_uuid.uuid4()), **data.model_dump())
     db.add(price)
     await db.flush()
+    await refresh_price_summary(db, price.product_id)
     await db.refresh(price)
     return price
 
@@ -36,8 +54,13 @@ async def update_price(price_id: str, data: PriceUpdate, db: AsyncSession = Depe
     price = result.scalar_one_or_none()
     if not price:
         raise HTTPException(status_code=404, detail="Precio no encontrado")
-    for field, value in data.model_dump(exclude_unset=True).items():
+    changes = data.model_dump(exclude_unset=True)
+    if changes.get("site") and changes["site"] != price.site:
+        await _ensure_site_free(db, price.product_id, changes["site"], exclude_id=price.id)
+    for field, value in changes.items():
         setattr(price, field, value)
+    await db.flush()
+    await refresh_price_summary(db, price.product_id)
     return price
 
 
@@ -48,4 +71,7 @@ async def delete_price(price_id: str, db: AsyncSession = Depends(get_db)):
     price = result.scalar_one_or_none()
     if not price:
         raise HTTPException(status_code=404, detail="Precio no encontrado")
+    product_id = price.product_id
     await db.delete(price)
+    await db.flush()
+    await refresh_price_summary(db, product_id)
@@ -10,7 +10,7 @@ Admin endpoints:
 """
 import uuid as _uuid_mod
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Request, status, UploadFile, File
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
@@ -19,6 +19,7 @@ from app.models.product import Product
 from app.models.product_image import ProductImage
 from app.schemas.product_image import ProductImageCreate, ProductImageUpdate, ProductImageOut
 from app.core.security import get_current_admin, require_role
+from app.core.response_cache import response_cache
 
 _can_manage = require_role('gestor_inventario', 'vendedor')
 from app.core import storage
@@ -50,16 +51,22 @@ async def _get_image_or_404(image_id: str, product_id: str, db: AsyncSession) ->
 @router.get("", response_model=list[ProductImageOut])
 async def list_images(
     product_id: str,
+    request: Request,
     db: AsyncSession = Depends(get_db),
 ):
-    """Lista todas las imágenes de un producto (público)."""
-    await _get_product_or_404(product_id, db)
-    result = await db.execute(
-        select(ProductImage)
-        .where(ProductImage.product_id == product_id)
-        .order_by(ProductImage.sort_order)
+    """Lista todas las imágenes de un producto (público, cacheado con ETag)."""
+    async def build():
+        await _get_product_or_404(product_id, db)
+        result = await db.execute(
+            select(ProductImage)
+            .where(ProductImage.product_id == product_id)
+            .order_by(ProductImage.sort_order)
+        )
+        return result.scalars().all()
+
+    return await response_cache.serve(
+        request, build, model=list[ProductImageOut], tags=(f"product:{product_id}",),
     )
-    return result.scalars().all()
 
 
 @router.post("", response_model=ProductImageOut, status_code=status.HTTP_201_CREATED)
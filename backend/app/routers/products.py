@@ -5,10 +5,11 @@
 Todas las consultas usan el ORM de SQLAlchemy (Core + Expression Language).
 SQLAlchemy genera SIEMPRE consultas parametrizadas:
 
-    Código:  Product.name.ilike(f"%{search}%")
-    SQL generado:  WHERE name ILIKE $1   → parámetro: '%foo%'
+    Código:  Product.brand.ilike(f"%{brand}%")
+    SQL generado:  WHERE brand ILIKE $1   → parámetro: '%foo%'
 
-La variable `search` NUNCA se interpola directamente en SQL —
+El texto de búsqueda (app/core/search.py) también viaja como parámetro de
+plainto_tsquery / word_similarity. La variable `search` NUNCA se interpola directamente en SQL —
 el driver asyncpg envía el parámetro por separado (binding),
 imposibilitando un ataque de inyección SQL.
 
@@ -17,33 +18,66 @@ Se evita deliberadamente:
   • execute(f"SELECT ... WHERE name = '{user_input}'")
   • Cualquier consulta construida con formato directo de strings
 """
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status, UploadFile, File
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from sqlalchemy.orm import selectinload
-import re as _re
+import io
+from typing import Literal
 
 from app.database import get_db
 from app.models.product import Product, CategoryEnum
 from app.models.price import Price
-from app.schemas.product import ProductCreate, ProductUpdate, ProductOut, ProductListOut
+from app.models.price_summary import ProductPriceSummary
+from app.models.product_image import ProductImage
+from app.schemas.product import (
+    ProductCreate, ProductUpdate, ProductOut, ProductListOut, SuggestOut, SuggestionOut,
+    FacetsOut, FacetValueOut, PriceBucketOut, ProductCardOut, ProductCardListOut,
+    ProductBatchIn, ProductBatchOut, PRODUCT_BATCH_MAX,
+)
+from app.schemas.catalog import ImportReportOut
 from app.core.security import get_current_admin, require_role
+from app.core.search import search_filter, search_rank
+from app.core.sanitize import fold_text
+from app.core.suggest import suggest_index, MAX_SUGGESTIONS
+from app.core.facets import compute_facets, PRICE_BUCKETS, bucket_label
+from app.core.cache import TaggedCache
+from app.core.response_cache import response_cache
+from app.core.catalog_import import import_catalog, CatalogFormatError
+from app.core.export import ExportFormat, export_response, stream_rows
+from app.core.sku import allocate_skus, claim_skus, release_sku
+from app.config import settings
+from app.core.pagination import (
+    SortKey, CountMode, order_by_keys, keyset_after, encode_cursor, decode_cursor, count_rows,
+)
 
 router = APIRouter()
 
 
-@router.get("", response_model=ProductListOut)
-async def list_products(
-    page: int = Query(1, ge=1),
-    size: int = Query(20, ge=1, le=100),
+def _catalog_query(
+    *,
     category: CategoryEnum | None = None,
     brand: str | None = None,
     subcategory: str | None = None,
     search: str | None = None,
-    sort: str = Query("rating", enum=["rating", "price_asc", "price_desc", "name"]),
-    db: AsyncSession = Depends(get_db),
+    min_price: float | None = None,
+    max_price: float | None = None,
+    in_stock: bool = False,
+    store: str | None = None,
+    dialect: str = "postgresql",
 ):
-    query = select(Product).options(selectinload(Product.prices))
+    """
+    SELECT base del catálogo con todos los filtros aplicados.
+    Hace join con product_price_summaries (1:1, siempre presente) para que el rango
+    de precio, "solo en stock" y el orden por precio se resuelvan en SQL sobre
+    todo el catálogo usando sus índices.
+
+    `search` va por full-text + trigramas (PostgreSQL) o por el fallback de SQLite;
+    brand/subcategory ILIKE '%x%' los sirven los índices GIN de trigramas.
+    """
+    query = select(Product).join(
+        ProductPriceSummary, ProductPriceSummary.product_id == Product.id
+    )
 
     if category:
         query = query.where(Product.category == category)
@@ -52,51 +86,349 @@ async def list_products(
     if subcategory:
         query = query.where(Product.subcategory.ilike(f"%{subcategory}%"))
     if search:
-        query = query.where(
-            Product.name.ilike(f"%{search}%") | Product.brand.ilike(f"%{search}%")
+        query = query.where(search_filter(search, dialect))
+    # Rango sobre el precio más bajo entre tiendas
+    if min_price is not None:
+        query = query.where(ProductPriceSummary.min_price >= min_price)
+    if max_price is not None:
+        query = query.where(ProductPriceSummary.min_price <= max_price)
+    if in_stock:
+        query = query.where(ProductPriceSummary.in_stock_stores > 0)
+    if store:
+        query = query.where(Product.prices.any(Price.site == store))
+    return query
+
+
+# Claves de orden por `sort`; la última columna (id) desempata y hace el orden
+# total, requisito de la paginación keyset. Cada lista tiene su índice compuesto.
+_SORT_KEYS: dict[str, list[SortKey]] = {
+    "rating":     [SortKey(Product.rating, desc=True), SortKey(Product.id)],
+    "name":       [SortKey(Product.name), SortKey(Product.id)],
+    "newest":     [SortKey(Product.created_at, desc=True), SortKey(Product.id, desc=True)],
+    # Productos sin precios (min_price NULL) siempre al final
+    "price_asc":  [SortKey(ProductPriceSummary.min_price, nullable=True),
+                   SortKey(ProductPriceSummary.product_id)],
+    "price_desc": [SortKey(ProductPriceSummary.min_price, desc=True, nullable=True),
+                   SortKey(ProductPriceSummary.product_id, desc=True)],
+}
+
+
+_SORT_OPTIONS = [*_SORT_KEYS, "relevance"]
+
+
+def _sort_keys(sort: str, search: str | None, dialect: str) -> tuple[str, list[SortKey]]:
+    """
+    (etiqueta del cursor, claves de orden). sort=relevance necesita texto de
+    búsqueda; sin él cae a rating. La etiqueta incluye la búsqueda normalizada
+    para que un cursor de relevancia no se reutilice con otro texto.
+    """
+    if sort == "relevance":
+        folded = fold_text(search)
+        if not folded:
+            return "rating", _SORT_KEYS["rating"]
+        return f"relevance:{folded}", [
+            SortKey(search_rank(search, dialect), desc=True), SortKey(Product.id),
+        ]
+    return sort, _SORT_KEYS[sort]
+
+
+# ── view=card: columnas mínimas para las tarjetas del listado ───────────────
+# Imagen principal con la misma prioridad que Product.primary_image
+# (is_primary, luego sort_order, luego la columna legacy) y mejor precio desde
+# product_price_summaries: sin cargar las relaciones prices / images.
+_primary_image = (
+    select(ProductImage.url)
+    .where(ProductImage.product_id == Product.id)
+    .order_by(ProductImage.is_primary.desc(), ProductImage.sort_order)
+    .limit(1)
+    .correlate(Product)
+    .scalar_subquery()
+)
+_CARD_COLUMNS = [
+    Product.id, Product.name, Product.brand, Product.category, Product.subcategory,
+    Product.rating, Product.reviews,
+    func.coalesce(_primary_image, Product.image).label("primary_image"),
+    ProductPriceSummary.min_price, ProductPriceSummary.max_price,
+    ProductPriceSummary.cheapest_site, ProductPriceSummary.store_count,
+    (ProductPriceSummary.in_stock_stores > 0).label("in_stock"),
+]
+
+
+@router.get("", response_model=ProductListOut | ProductCardListOut)
+async def list_products(
+    request: Request,
+    page: int = Query(1, ge=1),
+    size: int = Query(20, ge=1, le=100),
+    category: CategoryEnum | None = None,
+    brand: str | None = None,
+    subcategory: str | None = None,
+    search: str | None = None,
+    min_price: float | None = Query(None, ge=0, description="Precio mínimo (sobre el más barato entre tiendas)"),
+    max_price: float | None = Query(None, ge=0, description="Precio máximo (sobre el más barato entre tiendas)"),
+    in_stock: bool = Query(False, description="Solo productos con al menos una tienda con stock"),
+    store: str | None = Query(None, description="Solo productos con precio en esta tienda"),
+    sort: str = Query("rating", enum=_SORT_OPTIONS, description="relevance requiere `search`"),
+    cursor: str | None = Query(None, description="next_cursor de la página anterior (modo keyset; ignora `page`)"),
+    count: CountMode | None = Query(None, description="exact | estimated | none — por defecto exact con `page`, none con `cursor`"),
+    view: Literal["full", "card"] = Query("full", description="card: proyección ligera para tarjetas (ProductCardOut)"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Listado del catálogo. Dos vistas:
+      • full  — ProductOut completo con prices e images (compatibilidad).
+      • card  — ProductCardOut: una sola consulta con columnas mínimas, imagen
+                principal y mejor precio; sin descripción ni relaciones.
+    Dos modos de paginación:
+      • page/size  — OFFSET clásico (compatibilidad).
+      • cursor     — keyset: O(size) a cualquier profundidad. La primera página se
+                     pide sin cursor y las siguientes con el `next_cursor` recibido.
+    Respuesta cacheada con ETag (app/core/response_cache.py), etiqueta "catalog".
+    """
+    async def build() -> ProductListOut | ProductCardListOut:
+        dialect = db.bind.dialect.name
+        sort_tag, keys = _sort_keys(sort, search, dialect)
+        after = decode_cursor(cursor, sort_tag, keys) if cursor else None
+
+        query = _catalog_query(
+            category=category, brand=brand, subcategory=subcategory, search=search,
+            min_price=min_price, max_price=max_price, in_stock=in_stock, store=store, dialect=dialect,
+        )
+        # `is not None` explícito: min_price=0 también filtra (descarta productos sin precios)
+        filtered = in_stock or any(
+            v is not None for v in (category, brand, subcategory, search, min_price, max_price, store)
+        )
+
+        total, estimated = await count_rows(
+            db, query, count or ("none" if cursor else "exact"),
+            estimate_table="products", filtered=filtered,
+        )
+
+        # Sort + paginación — todo en SQL, sobre el catálogo completo.
+        # Se piden size+1 filas para saber si hay página siguiente sin contar.
+        if view == "card":
+            query = query.with_only_columns(*_CARD_COLUMNS, *(k.column for k in keys))
+        else:
+            query = query.add_columns(*(k.column for k in keys)).options(selectinload(Product.prices))
+        query = query.order_by(*order_by_keys(keys))
+        if after is not None:
+            query = query.where(keyset_after(keys, after))
+        else:
+            query = query.offset((page - 1) * size)
+        rows = (await db.execute(query.limit(size + 1))).all()
+
+        # Las claves de orden van al final de cada fila
+        next_cursor = encode_cursor(sort_tag, list(rows[size - 1][-len(keys):])) if len(rows) > size else None
+        rows = rows[:size]
+
+        if view == "card":
+            page_model, items = ProductCardListOut, [ProductCardOut.model_validate(row._mapping) for row in rows]
+        else:
+            page_model, items = ProductListOut, [row[0] for row in rows]
+        return page_model(
+            items=items,
+            total=total,
+            total_estimated=estimated,
+            page=page,
+            size=size,
+            pages=max(1, -(-total // size)) if total is not None else None,  # ceil division
+            next_cursor=next_cursor,
         )
 
-    # Total count
-    count_q = select(func.count()).select_from(query.subquery())
-    total = (await db.execute(count_q)).scalar_one()
-
-    # Sort
-    if sort == "name":
-        query = query.order_by(Product.name)
-    elif sort == "rating":
-        query = query.order_by(Product.rating.desc())
-
-    # Paginación
-    query = query.offset((page - 1) * size).limit(size)
-    result = await db.execute(query)
-    products = result.scalars().all()
-
-    # Sort por precio mínimo si aplica (post-query)
-    if sort in ("price_asc", "price_desc"):
-        products = sorted(
-            products,
-            key=lambda p: min((pr.price for pr in p.prices), default=0),
-            reverse=(sort == "price_desc"),
+    model = ProductCardListOut if view == "card" else ProductListOut
+    return await response_cache.serve(request, build, model=model, tags=("catalog",))
+
+
+@router.get("/suggest", response_model=SuggestOut)
+async def suggest_products(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(8, ge=1, le=MAX_SUGGESTIONS),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Autocompletado: productos y marcas cuyo nombre (o alguna de sus palabras)
+    empieza por `q`, ordenados por popularidad. Se sirve del índice en memoria
+    (app/core/suggest.py), sin consultar la BD.
+    """
+    if not suggest_index.loaded:  # p. ej. app montada sin lifespan (tests)
+        await suggest_index.load(db)
+    prefix = fold_text(q)
+    if not prefix:
+        return SuggestOut(products=[], brands=[])
+    return SuggestOut(
+        products=[SuggestionOut(id=s.key, label=s.label) for s in suggest_index.products.top(prefix, limit)],
+        brands=[SuggestionOut(label=s.label) for s in suggest_index.brands.top(prefix, limit)],
+    )
+
+
+# Facetas por conjunto de filtros normalizado; "catalog" se invalida en cualquier
+# escritura de productos, precios, imágenes o marcas (app/core/cache.py).
+facet_cache = TaggedCache(maxsize=settings.FACETS_CACHE_SIZE, ttl=settings.FACETS_CACHE_TTL)
+
+
+def _normalized_filters(**filters) -> dict:
+    """Filtros con la forma en que se consultan: dos peticiones equivalentes dan la misma clave."""
+    for name in ("brand", "subcategory"):  # ILIKE: mayúsculas y espacios no cambian el resultado
+        if filters.get(name):
+            filters[name] = filters[name].strip().lower()
+    if filters.get("store"):
+        filters["store"] = filters["store"].strip()
+    if filters.get("search"):
+        filters["search"] = fold_text(filters["search"])
+    return {k: v for k, v in filters.items() if v not in (None, False, "")}
+
+
+def _facets_out(counts: dict) -> FacetsOut:
+    def values(facet: str) -> list[FacetValueOut]:
+        ranked = sorted(counts[facet].items(), key=lambda kv: (-kv[1], kv[0]))
+        return [FacetValueOut(value=value, count=n) for value, n in ranked]
+
+    return FacetsOut(
+        total=counts["total"],
+        category=values("category"),
+        brand=values("brand"),
+        subcategory=values("subcategory"),
+        store=values("store"),
+        price=[
+            PriceBucketOut(label=label, min=low, max=high, count=counts["price"][label])
+            for low, high in PRICE_BUCKETS
+            if (label := bucket_label(low, high)) in counts["price"]
+        ],
+    )
+
+
+@router.get("/facets", response_model=FacetsOut)
+async def product_facets(
+    category: CategoryEnum | None = None,
+    brand: str | None = None,
+    subcategory: str | None = None,
+    search: str | None = None,
+    min_price: float | None = Query(None, ge=0),
+    max_price: float | None = Query(None, ge=0),
+    in_stock: bool = False,
+    store: str | None = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Conteos del sidebar de filtros (categoría, marca, subcategoría, tienda y
+    rango de precio) para los mismos filtros que GET /api/products, en una sola
+    consulta agrupada y cacheada por conjunto de filtros.
+    """
+    filters = _normalized_filters(
+        category=category, brand=brand, subcategory=subcategory, search=search,
+        min_price=min_price, max_price=max_price, in_stock=in_stock, store=store,
+    )
+    key = tuple(sorted(filters.items()))
+    facets = facet_cache.get(key)
+    if facets is None:
+        generation = facet_cache.generation
+        dialect = db.bind.dialect.name
+        counts = await compute_facets(db, _catalog_query(**filters, dialect=dialect), dialect)
+        facets = _facets_out(counts)
+        facet_cache.set(key, facets, tags=("catalog",), generation=generation)
+    return facets
+
+
+def _batch_ids(raw: list[str]) -> list[str]:
+    """ids en el orden pedido, sin vacíos ni duplicados; acepta "a,b,c" y ids repetidos."""
+    ids = list(dict.fromkeys(
+        part.strip() for value in raw for part in value.split(",") if part.strip()
+    ))
+    if not ids:
+        raise HTTPException(status_code=400, detail="Indica al menos un id de producto")
+    if len(ids) > PRODUCT_BATCH_MAX:
+        raise HTTPException(
+            status_code=400, detail=f"Máximo {PRODUCT_BATCH_MAX} productos por llamada",
         )
+    return ids
 
-    return ProductListOut(
-        items=products,
-        total=total,
-        page=page,
-        size=size,
-        pages=max(1, -(-total // size)),  # ceil division
+
+async def _fetch_batch(ids: list[str], db: AsyncSession) -> ProductBatchOut:
+    """
+    Un SELECT … WHERE id IN (…) + los selectin de prices e images: número de
+    consultas constante sin importar cuántos ids se pidan.
+    """
+    result = await db.execute(select(Product).where(Product.id.in_(ids)))
+    found = {p.id: p for p in result.scalars().all()}
+    return ProductBatchOut(
+        items=[found[pid] for pid in ids if pid in found],
+        missing=[pid for pid in ids if pid not in found],
+    )
+
+
+@router.get("/batch", response_model=ProductBatchOut)
+async def get_products_batch(
+    request: Request,
+    ids: list[str] = Query(..., description="ids separados por coma o repetidos (?ids=a&ids=b)"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Varios productos en una llamada (comparador, vistos recientemente, carrito).
+    Respeta el orden pedido; los ids inexistentes se reportan en `missing`.
+    """
+    ids = _batch_ids(ids)
+    return await response_cache.serve(
+        request, lambda: _fetch_batch(ids, db), model=ProductBatchOut,
+        tags=[f"product:{pid}" for pid in ids],
+    )
+
+
+@router.post("/batch", response_model=ProductBatchOut)
+async def post_products_batch(data: ProductBatchIn, db: AsyncSession = Depends(get_db)):
+    """Igual que GET /batch, para listas largas que no caben en la URL."""
+    return await _fetch_batch(_batch_ids(data.ids), db)
+
+
+# ── Exportación (CSV / NDJSON en streaming) ──────────────────────────────────
+# Mismo layout que backend/catalog/*.csv (el archivo se puede reimportar tal cual);
+# las columnas opcionales del importador van al final.
+_EXPORT_PRODUCT_COLUMNS = [
+    ("id", Product.id), ("name", Product.name), ("brand", Product.brand),
+    ("category", Product.category), ("description", Product.description), ("image", Product.image),
+    ("rating", Product.rating), ("reviews", Product.reviews),
+    ("subcategory", Product.subcategory), ("unit_price", Product.unit_price), ("stock", Product.stock),
+    ("sku", Product.sku), ("weight_g", Product.weight_g), ("is_active", Product.is_active),
+]
+_EXPORT_PRICE_COLUMNS = [
+    ("product_id", Price.product_id), ("store", Price.site), ("price_mxn", Price.price),
+    ("shipping_mxn", Price.shipping), ("availability", Price.availability), ("url", Price.url),
+    ("currency", Price.currency),
+]
+
+
+@router.get("/export", dependencies=[Depends(require_role('gestor_inventario', 'analista'))])
+async def export_catalog(
+    dataset: Literal["products", "prices"] = Query("products"),
+    format: ExportFormat = Query("csv"),
+):
+    """
+    Volcado completo de productos (incluye inactivos) o precios, en streaming.
+    Memoria constante: se lee con un cursor del servidor por bloques.
+    """
+    if dataset == "products":
+        columns, order = _EXPORT_PRODUCT_COLUMNS, (Product.id,)
+    else:
+        columns, order = _EXPORT_PRICE_COLUMNS, (Price.product_id, Price.site)
+    query = select(*(col for _, col in columns)).order_by(*order)
+    return export_response(
+        format, f"lookaly-{dataset}",
+        header=[name for name, _ in columns], batches=stream_rows(query),
     )
 
 
 @router.get("/{product_id}", response_model=ProductOut)
-async def get_product(product_id: str, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(
-        select(Product).options(selectinload(Product.prices)).where(Product.id == product_id)
+async def get_product(product_id: str, request: Request, db: AsyncSession = Depends(get_db)):
+    async def build() -> Product:
+        result = await db.execute(
+            select(Product).options(selectinload(Product.prices)).where(Product.id == product_id)
+        )
+        product = result.scalar_one_or_none()
+        if not product:
+            raise HTTPException(status_code=404, detail="Producto no encontrado")
+        return product
+
+    return await response_cache.serve(
+        request, build, model=ProductOut, tags=(f"product:{product_id}",),
     )
-    product = result.scalar_one_or_none()
-    if not product:
-        raise HTTPException(status_code=404, detail="Producto no encontrado")
-    return product
 
 
 # gestor_inventario puede crear/editar/eliminar; vendedor puede crear (tab ventas)
@@ -112,19 +444,9 @@ async def create_product(data: ProductCreate, db: AsyncSession = Depends(get_db)
     # ── SKU auto-generado si no se envía ─────────────────────────────────
     # Formato: LOOK-0001, LOOK-0002, ... reutiliza huecos de productos eliminados
     if not payload.get('sku'):
-        existing = (await db.execute(
-            select(Product.sku).where(Product.sku.ilike('LOOK-%'))
-        )).scalars().all()
-        used = set()
-        for s in existing:
-            m = _re.match(r'^LOOK-(\d+)$', s or '')
-            if m:
-                used.add(int(m.group(1)))
-        # Primer entero positivo no usado
-        n = 1
-        while n in used:
-            n += 1
-        payload['sku'] = f'LOOK-{n:04d}'
+        payload['sku'] = (await allocate_skus(db))[0]
+    else:
+        await claim_skus(db, [payload['sku']])
 
     product = Product(**payload)
     db.add(product)
@@ -140,7 +462,11 @@ async def _do_update(product_id: str, data: ProductUpdate, db: AsyncSession):
     product = result.scalar_one_or_none()
     if not product:
         raise HTTPException(status_code=404, detail="Producto no encontrado")
-    for field, value in data.model_dump(exclude_unset=True).items():
+    changes = data.model_dump(exclude_unset=True)
+    if "sku" in changes and changes["sku"] != product.sku:
+        await claim_skus(db, [changes["sku"]])
+        await release_sku(db, product.sku)
+    for field, value in changes.items():
         setattr(product, field, value)
     return product
 
@@ -164,4 +490,40 @@ async def delete_product(product_id: str, db: AsyncSession = Depends(get_db)):
     product = result.scalar_one_or_none()
     if not product:
         raise HTTPException(status_code=404, detail="Producto no encontrado")
+    await release_sku(db, product.sku)
     await db.delete(product)
+
+
+# ── Importación masiva (CSV) ─────────────────────────────────────────────────
+@router.post("/import", response_model=ImportReportOut,
+             dependencies=[Depends(_can_manage)])
+async def import_products(
+    products: UploadFile | None = File(None, description="products.csv"),
+    prices: UploadFile | None = File(None, description="prices.csv"),
+    dry_run: bool = Query(False, description="Solo calcular el diff (inserted/changed/unchanged/removed)"),
+    prune: bool = Query(False, description="Aplicar los removed: desactivar productos, borrar precios"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Sincroniza el catálogo con products.csv y/o prices.csv (mismo formato que
+    backend/catalog). Solo escribe las filas nuevas o cuyo contenido cambió; las
+    inválidas se reportan en `errors` sin detener la carga. Confirma por lotes:
+    lo importado antes de un fallo queda.
+    """
+    if products is None and prices is None:
+        raise HTTPException(status_code=400, detail="Envía products y/o prices (CSV)")
+
+    def text(upload: UploadFile | None):
+        return None if upload is None else io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+
+    try:
+        report = await import_catalog(
+            db, products=text(products), prices=text(prices), dry_run=dry_run, prune=prune,
+        )
+    except CatalogFormatError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="El archivo debe estar en UTF-8")
+    if suggest_index.loaded and (report.products.upserted or (report.prune and report.products.removed)) and not dry_run:
+        await suggest_index.load(db)
+    return report
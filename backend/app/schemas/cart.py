@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from typing import Annotated, Literal, Optional
+
+from pydantic import BaseModel, Field
 from .product import ProductOut
 
 
@@ -31,3 +33,115 @@ class CartOut(BaseModel):
     subtotal: float
     shipping: float
     total: float
+
+
+class CartLineOut(BaseModel):
+    """
+    Línea ligera del carrito (view=slim): solo lo que pinta la fila, con el
+    precio ya resuelto en SQL (app/core/pricing.py). Sin ProductOut embebido.
+    """
+    id: str
+    product_id: str
+    selected_site: str
+    quantity: int
+    name: str
+    brand: str
+    sku: Optional[str] = None
+    primary_image: str
+    is_active: bool
+    site: Optional[str] = None              # tienda del precio (≠ selected_site si ya no la vende)
+    unit_price: Optional[float] = None      # None: el producto no tiene precios
+    availability: Optional[str] = None
+    store_shipping: Optional[float] = None  # envío publicado por la tienda
+    line_total: float
+
+    model_config = {"from_attributes": True}
+
+
+class CartStoreOut(BaseModel):
+    site: str
+    items: int
+    subtotal: float
+    shipping: Optional[float] = None        # envío publicado por la tienda
+    shipping_charged: float = 0.0           # lo que cobra (0 desde el umbral de envío gratis)
+    free_shipping_remaining: float = 0.0    # lo que falta en ESTA tienda para el envío gratis
+
+    model_config = {"from_attributes": True}
+
+
+class CartSlimOut(BaseModel):
+    items: list[CartLineOut]
+    stores: list[CartStoreOut]              # subtotal por tienda
+    total_items: int
+    subtotal: float
+    shipping: float
+    total: float
+    free_shipping_remaining: float          # suma de lo que falta en cada tienda que cobra envío
+
+
+class CartOptimizeIn(BaseModel):
+    max_stores: Optional[int] = Field(default=None, ge=1, description="Máximo de tiendas distintas (None = sin límite)")
+
+
+class CartPlanLineOut(BaseModel):
+    id: str                          # id de la línea del carrito
+    product_id: str
+    quantity: int
+    selected_site: str               # tienda elegida hoy por el usuario
+    site: str                        # tienda propuesta
+    unit_price: float
+    line_total: float
+    changed: bool                    # site ≠ selected_site
+
+
+class CartPlanStoreOut(BaseModel):
+    site: str
+    items: int
+    subtotal: float
+    shipping: float                  # envío cobrado por la tienda (0 desde el umbral)
+
+    model_config = {"from_attributes": True}
+
+
+class CartPlanOut(BaseModel):
+    """Reparto más barato del carrito entre tiendas (POST /api/cart/optimize)."""
+    lines: list[CartPlanLineOut]
+    stores: list[CartPlanStoreOut]
+    items_total: float
+    shipping: float
+    total: float
+    current_total: Optional[float] = None   # mismo cálculo con las tiendas elegidas hoy (None: alguna ya no vende el producto)
+    savings: Optional[float] = None
+    optimal: bool                           # False: heurística o se agotó el presupuesto de tiempo
+    method: Literal["exact", "heuristic"]
+    unavailable: list[str] = []             # líneas sin ninguna tienda con stock (fuera del total)
+    elapsed_ms: float
+
+
+# Máximo de operaciones por llamada a POST /api/cart/batch
+CART_BATCH_MAX = 200
+
+
+class CartAddOp(BaseModel):
+    op: Literal["add"]
+    product_id: str
+    selected_site: str
+    quantity: int = Field(default=1, ge=1)   # se suma si la línea ya existe
+
+
+class CartUpdateOp(BaseModel):
+    op: Literal["update"]
+    id: str
+    quantity: Optional[int] = Field(default=None, ge=1)
+    selected_site: Optional[str] = None
+
+
+class CartRemoveOp(BaseModel):
+    op: Literal["remove"]
+    id: str
+
+
+class CartBatchIn(BaseModel):
+    operations: list[Annotated[CartAddOp | CartUpdateOp | CartRemoveOp, Field(discriminator="op")]] = Field(
+        min_length=1, max_length=CART_BATCH_MAX,
+    )
@@ -0,0 +1,37 @@
+from typing import Literal
+
+from pydantic import BaseModel
+
+
+class ImportRowError(BaseModel):
+    file: str            # "products" | "prices"
+    line: int            # línea del CSV (1 = primera línea del archivo)
+    error: str
+
+
+class ImportChange(BaseModel):
+    file: str            # "products" | "prices"
+    key: str             # id del producto | "product_id/tienda"
+    action: Literal["inserted", "changed", "removed"]
+
+
+class ImportSectionOut(BaseModel):
+    rows: int = 0        # filas de datos leídas (sin comentarios ni vacías)
+    upserted: int = 0    # filas insertadas o actualizadas (inserted + changed)
+    inserted: int = 0
+    changed: int = 0
+    unchanged: int = 0   # mismo hash de contenido: no se escriben
+    removed: int = 0     # en la BD (de una sincronización previa) pero no en el archivo
+    errors: int = 0      # filas rechazadas (ver ImportReportOut.errors)
+
+
+class ImportReportOut(BaseModel):
+    products: ImportSectionOut = ImportSectionOut()
+    prices: ImportSectionOut = ImportSectionOut()
+    errors: list[ImportRowError] = []   # primeras N filas con error
+    errors_truncated: bool = False      # hubo más errores de los listados
+    dry_run: bool = False               # True: solo se calculó el diff, no se escribió nada
+    prune: bool = False                 # True: los `removed` se aplicaron (ver import_catalog)
+    changes: list[ImportChange] = []    # diff fila a fila (solo en dry_run, primeras N)
+    changes_truncated: bool = False
+    seconds: float = 0.0
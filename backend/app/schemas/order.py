@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from typing import Optional
-from datetime import datetime
+from datetime import date, datetime
 import enum
 
 
@@ -12,10 +12,15 @@ class OrderStatusEnum(str, enum.Enum):
     cancelled = "cancelled"
 
 
+# Máximo de líneas por pedido
+ORDER_ITEMS_MAX = 200
+
+
 class OrderItemCreate(BaseModel):
     product_id: str
     quantity: int = Field(ge=1, le=100)
-    unit_price: float = Field(ge=0)
+    selected_site: Optional[str] = None           # tienda del precio; None = precio Lookaly / el más barato
+    unit_price: Optional[float] = Field(default=None, ge=0)   # ignorado: el precio lo resuelve el servidor
 
 
 class OrderItemOut(BaseModel):
@@ -23,6 +28,8 @@ class OrderItemOut(BaseModel):
     product_id: Optional[str]
     product_name: Optional[str]
     product_brand: Optional[str]
+    product_category: Optional[str] = None
+    site: Optional[str] = None
     quantity: int
     unit_price: float
     subtotal: float
@@ -32,7 +39,7 @@ class OrderItemOut(BaseModel):
 
 class OrderCreate(BaseModel):
     shipping_address: Optional[str] = None
-    items: list[OrderItemCreate] = Field(min_length=1)
+    items: list[OrderItemCreate] = Field(min_length=1, max_length=ORDER_ITEMS_MAX)
 
 
 class OrderUpdate(BaseModel):
@@ -47,6 +54,7 @@ class OrderOut(BaseModel):
     status: OrderStatusEnum
     shipping_address: Optional[str]
     total: float
+    item_count: int = 0
     order_items: list[OrderItemOut] = []
     created_at: datetime
     paid_at: Optional[datetime]
@@ -55,9 +63,90 @@ class OrderOut(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class OrderSummaryOut(BaseModel):
+    """Fila del listado admin (view=summary): sin líneas; se piden aparte con /admin/{id}/items."""
+    id: str
+    user_id: Optional[str]
+    status: OrderStatusEnum
+    shipping_address: Optional[str]
+    total: float
+    item_count: int
+    created_at: datetime
+    paid_at: Optional[datetime]
+    updated_at: datetime
+
+    model_config = {"from_attributes": True}
+
+
 class OrderListOut(BaseModel):
     items: list[OrderOut]
-    total: int
+    total: Optional[int] = None          # None con count=none
+    total_estimated: bool = False
     page: int
     size: int
-    pages: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None    # None en la última página
+
+
+class OrderSummaryListOut(BaseModel):
+    items: list[OrderSummaryOut]
+    total: Optional[int] = None
+    total_estimated: bool = False
+    page: int
+    size: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None
+
+
+# ── Resumen de ventas (rollups) ───────────────────────────────────────────────
+
+class SalesStatsRow(BaseModel):
+    # Dimensiones: solo vienen las de group_by
+    day: Optional[date] = None
+    brand: Optional[str] = None
+    category: Optional[str] = None
+    site: Optional[str] = None
+    status: Optional[OrderStatusEnum] = None
+    orders: Optional[int] = None         # solo agrupando/filtrando por día y status
+    lines: int
+    units: int
+    revenue: float
+
+
+class SalesStatsTotals(BaseModel):
+    orders: Optional[int] = None
+    lines: int
+    units: int
+    revenue: float
+
+
+class SalesStatsOut(BaseModel):
+    since: date
+    until: date
+    group_by: list[str]
+    statuses: list[OrderStatusEnum]
+    rows: list[SalesStatsRow]
+    totals: SalesStatsTotals
+
+
+# ── Outbox de eventos ─────────────────────────────────────────────────────────
+
+class DispatcherStatsOut(BaseModel):
+    running: bool                        # False: este proceso no despacha (worker aparte)
+    processed: int
+    retried: int
+    dead: int
+    last_run_at: Optional[datetime] = None
+    last_run_ms: Optional[float] = None
+    errors: list[str] = []
+
+    model_config = {"from_attributes": True}
+
+
+class OutboxMetricsOut(BaseModel):
+    pending: int
+    due: int                             # pendientes cuyo próximo intento ya venció
+    dead: int
+    oldest_pending_at: Optional[datetime] = None
+    lag_seconds: float
+    dispatcher: DispatcherStatsOut
@@ -71,7 +71,85 @@ class ProductOut(ProductBase):
 
 class ProductListOut(BaseModel):
     items: list[ProductOut]
-    total: int
+    total: Optional[int] = None          # None con count=none
+    total_estimated: bool = False        # True si total es una estimación (count=estimated)
+    page: int
+    size: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None    # None en la última página
+
+
+class ProductCardOut(BaseModel):
+    """
+    Proyección ligera para tarjetas de listado (view=card): sin descripción ni
+    filas de prices / images; imagen principal y mejor precio ya resueltos en SQL.
+    """
+    id: str
+    name: str
+    brand: str
+    category: CategoryEnum
+    subcategory: Optional[str] = None
+    rating: float
+    reviews: int
+    primary_image: str
+    min_price: Optional[float] = None       # precio más bajo entre tiendas
+    max_price: Optional[float] = None
+    cheapest_site: Optional[str] = None
+    store_count: int = 0
+    in_stock: bool = False                  # alguna tienda con disponibilidad
+
+    model_config = {"from_attributes": True}
+
+
+class ProductCardListOut(BaseModel):
+    items: list[ProductCardOut]
+    total: Optional[int] = None
+    total_estimated: bool = False
     page: int
     size: int
-    pages: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None
+
+
+# Máximo de ids por llamada a /api/products/batch
+PRODUCT_BATCH_MAX = 300
+
+
+class ProductBatchIn(BaseModel):
+    ids: list[str] = Field(min_length=1, max_length=PRODUCT_BATCH_MAX)
+
+
+class ProductBatchOut(BaseModel):
+    items: list[ProductOut]     # en el orden pedido (sin duplicados)
+    missing: list[str] = []     # ids que no existen
+
+
+class SuggestionOut(BaseModel):
+    id: Optional[str] = None   # id del producto; None en marcas
+    label: str
+
+
+class SuggestOut(BaseModel):
+    products: list[SuggestionOut]
+    brands: list[SuggestionOut]
+
+
+class FacetValueOut(BaseModel):
+    value: str
+    count: int
+
+
+class PriceBucketOut(BaseModel):
+    label: str                 # "200-500", "2000+"
+    min: float
+    max: Optional[float] = None
+    count: int
+
+
+class FacetsOut(BaseModel):
+    total: int
+    category: list[FacetValueOut]
+    brand: list[FacetValueOut]
+    subcategory: list[FacetValueOut]
+    store: list[FacetValueOut]
+    price: list[PriceBucketOut]
@@ -108,3 +108,16 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     user_id: Optional[str] = None
+
+
+class PasswordHasherMetricsOut(BaseModel):
+    workers: int                          # 0 = bcrypt en el event loop (sin pool)
+    running: bool
+    queue_max: int
+    in_flight: int
+    queued: int                           # esperando un proceso libre
+    peak_queued: int
+    completed: int
+    rejected: int                         # 503 por cola llena
+    latency_p50_ms: Optional[float] = None  # espera en cola + cómputo
+    latency_p99_ms: Optional[float] = None
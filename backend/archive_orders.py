@@ -0,0 +1,48 @@
+"""
+Mantenimiento de las particiones mensuales de pedidos (ver app/core/order_partitions.py).
+
+Crea las particiones de los próximos ORDER_PARTITIONS_AHEAD meses y archiva
+los meses con más de ORDER_ARCHIVE_AFTER_DAYS días cuyos pedidos están todos
+delivered o cancelled: tablespace frío (ORDER_ARCHIVE_TABLESPACE) + VACUUM FREEZE.
+Los pedidos archivados se siguen leyendo igual desde la API. Pensado para cron
+(p. ej. una vez al día).
+
+    cd backend
+    python archive_orders.py
+    python archive_orders.py --days 180 --tablespace cold
+    python archive_orders.py --partitions-only           # solo crear particiones
+"""
+import argparse
+import asyncio
+
+from app.config import settings
+from app.database import engine
+from app.core.order_partitions import archive_partitions, ensure_partitions, is_partitioned
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Particiones y archivado de pedidos")
+    parser.add_argument("--days", type=int, default=settings.ORDER_ARCHIVE_AFTER_DAYS, help="Antigüedad mínima (días)")
+    parser.add_argument("--tablespace", default=settings.ORDER_ARCHIVE_TABLESPACE, help="Tablespace frío (vacío = no mover)")
+    parser.add_argument("--partitions-only", action="store_true", help="Solo crear las particiones que falten")
+    args = parser.parse_args()
+
+    async with engine.begin() as conn:
+        if not await is_partitioned(conn):
+            print("⚠️  orders no está particionada (¿SQLite o falta migrate-v3.sql sección 12?)")
+            return
+        if args.partitions_only:
+            created = await ensure_partitions(conn)
+            print(f"✅ {len(created)} particiones creadas {', '.join(created)}")
+            return
+
+    report = await archive_partitions(engine, older_than_days=args.days, tablespace=args.tablespace)
+    if report.created:
+        print(f"   🧱 particiones creadas: {', '.join(report.created)}")
+    for month, open_orders in report.blocked.items():
+        print(f"   ⏸️  {month}: {open_orders:,} pedidos sin cerrar (no se archiva)")
+    print(f"✅ {len(report.archived)} meses archivados {', '.join(report.archived)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
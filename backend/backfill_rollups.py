@@ -0,0 +1,35 @@
+"""
+Backfill de los rollups de ventas (ver app/core/sales_rollup.py).
+
+Recalcula sales_daily / orders_daily desde orders + order_items. Se corre una
+vez tras migrate-v3 (sección 10) y, si hace falta, para reparar un rango.
+Antes rellena order_items.product_category de las líneas antiguas.
+
+    cd backend
+    python backfill_rollups.py                                   # todo el histórico
+    python backfill_rollups.py --since 2026-01-01 --until 2026-03-31
+"""
+import argparse
+import asyncio
+from datetime import date
+
+from app.database import AsyncSessionLocal
+from app.core.sales_rollup import backfill_item_categories, rebuild_rollups
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Reconstruye los rollups de ventas")
+    parser.add_argument("--since", type=date.fromisoformat, default=None, help="Primer día (YYYY-MM-DD, inclusive)")
+    parser.add_argument("--until", type=date.fromisoformat, default=None, help="Último día (YYYY-MM-DD, inclusive)")
+    args = parser.parse_args()
+
+    async with AsyncSessionLocal() as db:
+        categories = await backfill_item_categories(db)
+        report = await rebuild_rollups(db, since=args.since, until=args.until)
+        await db.commit()
+    print(f"✅ {categories:,} líneas con categoría rellenada")
+    print(f"✅ sales_daily: {report.sales_rows:,} filas · orders_daily: {report.orders_rows:,} filas")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
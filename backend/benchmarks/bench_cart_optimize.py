@@ -0,0 +1,86 @@
+"""
+Benchmark — optimizador de reparto del carrito (app/core/cart_optimizer.py).
+
+Carritos sintéticos de 5 a 200 líneas, cada producto con precio en 2–6 de 8
+tiendas (envío publicado 0 / 49 / 99 / 150 o sin publicar). Por tamaño mide
+latencia (p50 / p99 frente a BUDGET_MS), método usado, cuántas respuestas son
+óptimas probadas y el ahorro frente a comprar cada línea donde está más barata
+sin pensar en el envío (la línea base "ingenua"). Con --max-stores, los carritos que no caben en
+ese número de tiendas cuentan como no resueltos.
+
+Módulo puro: no usa BD.
+
+    cd backend
+    python -m benchmarks.bench_cart_optimize [--carts 30] [--max-stores 0]
+"""
+import asyncio
+import random
+import statistics
+
+from benchmarks._common import bootstrap, measure, report
+
+args = bootstrap(
+    __doc__.splitlines()[1],
+    carts=(int, 30, "Carritos distintos por tamaño"),
+    max_stores=(int, 0, "Límite de tiendas (0 = sin límite)"),
+)
+
+from app.core.cart_optimizer import (  # noqa: E402
+    BUDGET_MS, CartLine, InfeasibleCart, Offer, evaluate, optimize_cart,
+)
+
+STORES = ["Amazon MX", "Sephora MX", "Walmart", "Lookaly.mx", "Liverpool",
+          "El Palacio de Hierro", "Coppel", "Mercado Libre"]
+SIZES = [5, 10, 16, 25, 50, 100, 200]
+
+
+def synthetic_cart(rng: random.Random, n: int) -> list[CartLine]:
+    lines = []
+    for i in range(n):
+        base = rng.uniform(60, 1800)
+        offers = [
+            Offer(site, round(base * rng.uniform(0.85, 1.25), 2), rng.choice([None, 0, 49, 99, 150]))
+            for site in rng.sample(STORES, rng.randint(2, 6))
+        ]
+        lines.append(CartLine(f"l{i}", rng.choice([1, 1, 1, 2, 3]), offers))
+    return lines
+
+
+def try_optimize(lines: list[CartLine], max_stores: int | None):
+    try:
+        return optimize_cart(lines, max_stores=max_stores)
+    except InfeasibleCart:
+        return None
+
+
+def naive_total(lines: list[CartLine]) -> float:
+    """Cada línea en su tienda más barata, sin mirar el envío."""
+    return evaluate(lines, {line.id: min(line.offers, key=lambda o: o.unit_price) for line in lines})[0]
+
+
+async def main() -> None:
+    max_stores = args.max_stores or None
+    print(f"{args.carts} carritos por tamaño, presupuesto {BUDGET_MS:.0f} ms, max_stores={max_stores}")
+    rng = random.Random(7)
+    for size in SIZES:
+        carts = [synthetic_cart(rng, size) for _ in range(args.carts)]
+        solved = [(cart, plan) for cart in carts if (plan := try_optimize(cart, max_stores))]
+        plans = [plan for _, plan in solved]
+        if not plans:
+            print(f"  {size:>3} líneas: ningún carrito cabe en {max_stores} tiendas")
+            continue
+        savings = [(naive_total(cart) - plan.total) / naive_total(cart) * 100 for cart, plan in solved]
+        cycle = iter(carts * (args.repeat + 2))
+
+        async def run() -> None:
+            try_optimize(next(cycle), max_stores)
+
+        samples = await measure(run, args.repeat)
+        report(f"{size:>3} líneas ({plans[0].method})", samples)
+        print(f"      resueltos {len(plans)}/{len(carts)}   óptimos probados {sum(p.optimal for p in plans)}   "
+              f"ahorro vs. ingenuo: medio {statistics.mean(savings):5.1f} %   máx {max(savings):5.1f} %   "
+              f"tiendas usadas (media) {statistics.mean(len(p.stores) for p in plans):.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,121 @@
+"""
+Benchmark / prueba de carga — checkout concurrente sobre un SKU "caliente".
+
+Lanza N compras simultáneas (POST /api/orders, por defecto 200) del mismo
+producto con stock S (por defecto 50) y comprueba que NO hay sobreventa:
+
+    pedidos creados × cantidad  ==  stock inicial − stock final  ≤  stock inicial
+    pedidos creados + 409 de stock insuficiente == N
+
+Además mide el throughput (checkouts/s) y la latencia p50 / p99.
+Con PostgreSQL (--url) es la prueba real de concurrencia: las filas se
+bloquean y `stock >= qty` se re-evalúa; SQLite serializa las escrituras.
+
+    cd backend
+    python -m benchmarks.bench_checkout [--checkouts 200] [--stock 50] [--quantity 1] [--url ...]
+"""
+import asyncio
+import statistics
+import time
+import uuid
+
+from benchmarks._common import bootstrap, reset_schema, percentile
+
+args = bootstrap(
+    __doc__.splitlines()[1],
+    checkouts=(int, 200, "Compras concurrentes"),
+    stock=(int, 50, "Stock inicial del producto"),
+    quantity=(int, 1, "Unidades por compra"),
+)
+
+import httpx  # noqa: E402
+from fastapi import Request  # noqa: E402
+from sqlalchemy import func, select  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.database import engine, AsyncSessionLocal  # noqa: E402
+from app.core.price_summary import rebuild_price_summaries  # noqa: E402
+from app.core.security import get_current_user  # noqa: E402
+from app.models.order import Order, OrderItem  # noqa: E402
+from app.models.price import Price  # noqa: E402
+from app.models.product import Product, CategoryEnum  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+PRODUCT_ID = "hot-sku"
+SITE = "Lookaly.mx"
+
+
+async def seed() -> list[User]:
+    await reset_schema(engine)
+    users = [
+        User(id=str(uuid.uuid4()), email=f"buyer{i}@bench.example", name=f"Buyer {i}", hashed_password="x", is_active=True)
+        for i in range(args.checkouts)
+    ]
+    async with AsyncSessionLocal() as db:
+        db.add_all(users)
+        db.add(Product(
+            id=PRODUCT_ID, name="Sérum edición limitada", brand="Lookaly", category=CategoryEnum.piel,
+            description="Producto caliente para la prueba de carga", stock=args.stock,
+        ))
+        await db.flush()
+        db.add(Price(product_id=PRODUCT_ID, site=SITE, price=499, url="#"))
+        await db.flush()
+        await rebuild_price_summaries(db)
+        await db.commit()
+    return users
+
+
+async def main() -> None:
+    users = await seed()
+    print(f"{args.checkouts} checkouts concurrentes × {args.quantity} ud. sobre stock {args.stock} en {args.url}")
+
+    # Cada request se autentica como un comprador distinto (sin JWT: medimos el checkout)
+    by_id = {u.id: u for u in users}
+
+    def bench_user(request: Request) -> User:
+        return by_id[request.headers["X-Bench-User"]]
+
+    app.dependency_overrides[get_current_user] = bench_user
+    latencies: list[float] = []
+    body = {"items": [{"product_id": PRODUCT_ID, "quantity": args.quantity, "selected_site": SITE}]}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        async def checkout(user: User) -> int:
+            t0 = time.perf_counter()
+            response = await client.post("/api/orders", json=body, headers={"X-Bench-User": user.id})
+            latencies.append((time.perf_counter() - t0) * 1000)
+            return response.status_code
+
+        started = time.perf_counter()
+        codes = await asyncio.gather(*(checkout(u) for u in users))
+        elapsed = time.perf_counter() - started
+    app.dependency_overrides.clear()
+
+    async with AsyncSessionLocal() as db:
+        final_stock = (await db.execute(select(Product.stock).where(Product.id == PRODUCT_ID))).scalar_one()
+        orders = (await db.execute(select(func.count()).select_from(Order))).scalar_one()
+        sold = (await db.execute(select(func.coalesce(func.sum(OrderItem.quantity), 0)))).scalar_one()
+    await engine.dispose()
+
+    created, rejected = codes.count(201), codes.count(409)
+    others = {code: codes.count(code) for code in set(codes) - {201, 409}}
+    print(f"  201 creados={created}   409 sin stock={rejected}   otros={others or '-'}")
+    print(f"  pedidos en BD={orders}   unidades vendidas={sold}   stock final={final_stock}")
+    print(f"  {elapsed:.2f} s → {len(codes) / elapsed:,.0f} checkouts/s   "
+          f"p50={statistics.median(latencies):.1f} ms   p99={percentile(latencies, 99):.1f} ms")
+
+    expected = min(args.checkouts, args.stock // args.quantity)
+    ok = (
+        sold == args.stock - final_stock
+        and final_stock >= 0
+        and orders == created == expected
+        and created + rejected == args.checkouts
+    )
+    print("  ✅ sin sobreventa" if ok else "  ❌ INCONSISTENCIA: revisar la reserva de stock")
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
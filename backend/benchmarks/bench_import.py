@@ -0,0 +1,81 @@
+"""
+Benchmark — importación del catálogo desde CSV (app/core/catalog_import.py).
+
+Genera products.csv con N productos y prices.csv con S tiendas por producto
+(formato de backend/catalog) y mide:
+  • carga inicial (todo INSERT)
+  • reimportación de los mismos archivos (diff por hash: nada que escribir)
+
+    cd backend
+    python -m benchmarks.bench_import [--products 100000] [--stores 3] [--batch-size 1000] [--url ...]
+"""
+import asyncio
+import csv
+import random
+import tempfile
+from pathlib import Path
+
+from benchmarks._common import bootstrap, reset_schema
+
+args = bootstrap(
+    __doc__.splitlines()[1],
+    products=(int, 100_000, "Número de productos"),
+    stores=(int, 3, "Precios (tiendas) por producto"),
+    batch_size=(int, 1000, "Filas por lote"),
+)
+
+from sqlalchemy import select, func  # noqa: E402
+
+from app.database import engine, AsyncSessionLocal  # noqa: E402
+from app.models.price import Price  # noqa: E402
+from app.models.product import Product  # noqa: E402
+from app.core.catalog_import import import_catalog  # noqa: E402
+
+STORES = ["Amazon MX", "Sephora MX", "Walmart", "Lookaly.mx", "Liverpool", "El Palacio de Hierro"]
+CATEGORIES = ["maquillaje", "piel", "cuerpo"]
+
+
+def write_csvs(folder: Path) -> tuple[Path, Path]:
+    rng = random.Random(11)
+    products, prices = folder / "products.csv", folder / "prices.csv"
+    with open(products, "w", newline="", encoding="utf-8") as fp, open(prices, "w", newline="", encoding="utf-8") as fq:
+        fp.write("# Catálogo sintético\n")
+        pw, qw = csv.writer(fp), csv.writer(fq)
+        pw.writerow(["id", "name", "brand", "category", "description", "image", "rating", "reviews"])
+        qw.writerow(["product_id", "store", "price_mxn", "shipping_mxn"])
+        for i in range(args.products):
+            pid = f"b{i:07d}"
+            pw.writerow([
+                pid, f"Producto {i}", f"Marca {i % 500}", rng.choice(CATEGORIES),
+                f"Descripción del producto {i}, fórmula ligera de larga duración", f"products/{pid}.jpg",
+                round(rng.uniform(3, 5), 1), rng.randint(0, 20000),
+            ])
+            base = rng.uniform(80, 3000)
+            for site in rng.sample(STORES, min(args.stores, len(STORES))):
+                qw.writerow([pid, site, round(base * rng.uniform(0.85, 1.2), 2), rng.choice([0, 99])])
+    return products, prices
+
+
+async def run(products: Path, prices: Path, label: str) -> None:
+    async with AsyncSessionLocal() as db:
+        with open(products, encoding="utf-8", newline="") as fp, open(prices, encoding="utf-8", newline="") as fq:
+            report = await import_catalog(db, products=fp, prices=fq, batch_size=args.batch_size)
+        n_products = (await db.execute(select(func.count()).select_from(Product))).scalar_one()
+        n_prices = (await db.execute(select(func.count()).select_from(Price))).scalar_one()
+    rows = report.products.rows + report.prices.rows
+    print(f"  {label:<14} {report.seconds:7.2f} s  ({rows / report.seconds:,.0f} filas/s)  "
+          f"errores={len(report.errors)}  → BD: {n_products:,} productos, {n_prices:,} precios")
+
+
+async def main() -> None:
+    folder = Path(tempfile.mkdtemp(prefix="lookaly-import-"))
+    products, prices = write_csvs(folder)
+    print(f"{args.products:,} productos + {args.products * args.stores:,} precios en {args.url} (lotes de {args.batch_size})")
+    await reset_schema(engine)
+    await run(products, prices, "carga inicial")
+    await run(products, prices, "reimportación")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
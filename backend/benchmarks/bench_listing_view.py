@@ -0,0 +1,106 @@
+"""
+Benchmark — GET /api/products con view=full vs view=card.
+
+Catálogo sintético: N productos (por defecto 20 000) con descripción larga
+(~1 500 caracteres), S tiendas y 3 imágenes cada uno.
+
+Se mide la request completa a través de la app ASGI (consultas + serialización
+Pydantic + JSON), con la caché de respuestas desactivada para medir el trabajo
+real de cada vista:
+  • bytes del payload por página
+  • latencia p50 / p99 por página (size=20 y size=100)
+
+    cd backend
+    python -m benchmarks.bench_listing_view [--products 20000] [--stores 6] [--url ...]
+"""
+import asyncio
+import os
+import random
+import uuid
+
+from benchmarks._common import bootstrap, reset_schema, insert_chunks, measure, report
+
+args = bootstrap(
+    __doc__.splitlines()[1],
+    products=(int, 20_000, "Número de productos"),
+    stores=(int, 6, "Tiendas por producto"),
+)
+os.environ["RESPONSE_CACHE_ENABLED"] = "false"
+
+import httpx  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.database import engine, AsyncSessionLocal  # noqa: E402
+from app.models.product import Product, CategoryEnum, build_search_document  # noqa: E402
+from app.models.price import Price, AvailabilityEnum  # noqa: E402
+from app.models.product_image import ProductImage  # noqa: E402
+from app.core.price_summary import rebuild_price_summaries  # noqa: E402
+
+STORES = ["Amazon MX", "Sephora MX", "Walmart", "Lookaly.mx", "Liverpool", "El Palacio de Hierro"]
+WORDS = ("hidratación piel suave fórmula ligera textura acabado natural larga duración "
+         "vitamina ácido hialurónico dermatológicamente probado uso diario").split()
+
+
+async def seed() -> None:
+    rng = random.Random(7)
+    products, prices, images = [], [], []
+    for i in range(args.products):
+        pid = f"v{i:07d}"
+        name, brand = f"Producto {i}", f"Marca {i % 300}"
+        description = " ".join(rng.choice(WORDS) for _ in range(180))[:1500]
+        products.append(dict(
+            id=pid, name=name, brand=brand, category=rng.choice(list(CategoryEnum)),
+            description=description, image="", stock=rng.randint(0, 50), is_active=True,
+            rating=round(rng.uniform(3, 5), 1), reviews=rng.randint(0, 20000),
+            search_document=build_search_document(name, brand, None, description),
+        ))
+        base = rng.uniform(80, 3000)
+        for site in (STORES * (args.stores // len(STORES) + 1))[:args.stores]:
+            prices.append(dict(
+                id=str(uuid.uuid4()), product_id=pid, site=site,
+                price=round(base * rng.uniform(0.85, 1.2), 2), currency="MXN",
+                availability=rng.choice(list(AvailabilityEnum)),
+                url=f"https://tienda.example/{pid}", shipping=rng.choice([0, 99, 150]),
+            ))
+        for n in range(3):
+            images.append(dict(
+                id=str(uuid.uuid4()), product_id=pid, url=f"/media/products/{pid}-{n}.jpg",
+                is_primary=n == 0, sort_order=n,
+            ))
+
+    await reset_schema(engine)
+    async with engine.begin() as conn:
+        await insert_chunks(conn, Product.__table__, products)
+        await insert_chunks(conn, Price.__table__, prices)
+        await insert_chunks(conn, ProductImage.__table__, images)
+    async with AsyncSessionLocal() as db:
+        await rebuild_price_summaries(db)
+        await db.commit()
+
+
+async def main() -> None:
+    print(f"Sembrando {args.products:,} productos × {args.stores} tiendas × 3 imágenes en {args.url} …")
+    await seed()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for size in (20, 100):
+            print(f"\nsize={size}, sort=rating, página 5")
+            results = {}
+            for view in ("full", "card"):
+                params = {"size": size, "page": 5, "view": view}
+                body = (await client.get("/api/products", params=params)).content
+
+                async def fetch(params=params):
+                    response = await client.get("/api/products", params=params)
+                    response.raise_for_status()
+
+                median = report(f"view={view}  ({len(body) / 1024:,.1f} KiB)", await measure(fetch, args.repeat))
+                results[view] = (median, len(body))
+            (full_ms, full_bytes), (card_ms, card_bytes) = results["full"], results["card"]
+            print(f"  → payload {full_bytes / card_bytes:.1f}× menor, latencia {full_ms / card_ms:.1f}× menor")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,149 @@
+"""
+Benchmark — latencia del catálogo durante una ráfaga de logins (bcrypt).
+
+Mientras R lectores piden GET /api/products sin parar, se lanzan logins a
+L por segundo (por defecto 50/s durante 5 s). Cada login verifica bcrypt con
+12 rounds (~250 ms de CPU). Escenarios:
+
+  • sin ráfaga           — referencia: solo catálogo
+  • en línea (antes)     — PASSWORD_HASH_WORKERS=0: bcrypt bloquea el event loop
+  • pool (después)       — ProcessPoolExecutor de W procesos + cola acotada
+
+Se mide la latencia p50 / p99 del catálogo y cuántos logins terminan en 200
+o en 503 (cola llena: backpressure). Con pocos núcleos la ráfaga supera la
+capacidad de bcrypt: los 503 son el comportamiento esperado, y el catálogo
+sigue respondiendo.
+
+    cd backend
+    python -m benchmarks.bench_login_burst [--rate 50] [--seconds 5] [--readers 4] [--workers N] [--url ...]
+"""
+import asyncio
+import os
+import time
+import uuid
+
+from benchmarks._common import bootstrap, reset_schema, insert_chunks, report
+
+args = bootstrap(
+    __doc__.splitlines()[1],
+    rate=(float, 50.0, "Logins por segundo"),
+    seconds=(float, 5.0, "Duración de la ráfaga"),
+    readers=(int, 4, "Lectores concurrentes del catálogo"),
+    workers=(int, os.cpu_count() or 1, "Procesos del pool de bcrypt"),
+    products=(int, 2000, "Productos del catálogo"),
+)
+os.environ["RESPONSE_CACHE_ENABLED"] = "false"
+
+import httpx  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.database import engine, AsyncSessionLocal  # noqa: E402
+from app.core.limiter import limiter  # noqa: E402
+from app.core.password_hasher import password_hasher  # noqa: E402
+from app.core.price_summary import rebuild_price_summaries  # noqa: E402
+from app.core.security import hash_password  # noqa: E402
+from app.models.price import Price  # noqa: E402
+from app.models.product import Product, CategoryEnum, build_search_document  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+USERS = 50
+PASSWORD = "Bench-password-1"
+
+
+async def seed() -> None:
+    hashed = hash_password(PASSWORD)  # un solo hash (~250 ms) compartido por todos
+    products, prices = [], []
+    for i in range(args.products):
+        pid = f"b{i:07d}"
+        name, brand = f"Producto {i}", f"Marca {i % 100}"
+        products.append(dict(
+            id=pid, name=name, brand=brand, category=list(CategoryEnum)[i % len(CategoryEnum)],
+            description="", image="", stock=10, is_active=True,
+            search_document=build_search_document(name, brand, None, ""),
+        ))
+        prices.append(dict(
+            id=str(uuid.uuid4()), product_id=pid, site="Lookaly.mx", price=100 + i % 900,
+            currency="MXN", url=f"https://tienda.example/{pid}",
+        ))
+    users = [
+        dict(id=str(uuid.uuid4()), email=f"login{i}@bench.example", name=f"Login {i}",
+             hashed_password=hashed, is_active=True)
+        for i in range(USERS)
+    ]
+
+    await reset_schema(engine)
+    async with engine.begin() as conn:
+        await insert_chunks(conn, Product.__table__, products)
+        await insert_chunks(conn, Price.__table__, prices)
+        await insert_chunks(conn, User.__table__, users)
+    async with AsyncSessionLocal() as db:
+        await rebuild_price_summaries(db)
+        await db.commit()
+
+
+async def scenario(client: httpx.AsyncClient, name: str, rate: float) -> None:
+    stop = asyncio.Event()
+    catalog: list[float] = []
+    codes: list[int] = []
+
+    async def reader() -> None:
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            response = await client.get("/api/products", params={"size": 20, "view": "card"})
+            catalog.append((time.perf_counter() - t0) * 1000)
+            response.raise_for_status()
+
+    async def login(i: int) -> None:
+        response = await client.post("/api/auth/login", data={
+            "username": f"login{i % USERS}@bench.example", "password": PASSWORD,
+        })
+        codes.append(response.status_code)
+
+    readers = [asyncio.create_task(reader()) for _ in range(args.readers)]
+    logins = []
+    started = time.perf_counter()
+    if rate > 0:
+        # Ritmo fijo: el login n sale en started + n/rate aunque el loop vaya con retraso
+        for n in range(int(rate * args.seconds)):
+            await asyncio.sleep(max(0.0, started + n / rate - time.perf_counter()))
+            logins.append(asyncio.create_task(login(n)))
+        await asyncio.gather(*logins)
+    else:
+        await asyncio.sleep(args.seconds)
+    stop.set()
+    await asyncio.gather(*readers)
+    elapsed = time.perf_counter() - started
+
+    report(f"{name} — catálogo ({len(catalog)} req)", catalog)
+    if codes:
+        other = len(codes) - codes.count(200) - codes.count(503)
+        metrics = password_hasher.metrics()
+        print(f"  {'':<44} logins 200={codes.count(200)}  503={codes.count(503)}  otros={other}  "
+              f"en {elapsed:.1f} s   bcrypt p99={metrics['latency_p99_ms']} ms  "
+              f"cola máx={metrics['peak_queued']}")
+
+
+async def main() -> None:
+    await seed()
+    limiter.enabled = False  # 10/minuto por IP: la ráfaga sale toda de la misma IP
+    print(f"{args.products} productos, {args.readers} lectores, ráfaga de {args.rate:g} logins/s "
+          f"× {args.seconds:g} s en {args.url}")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        await client.get("/api/products", params={"size": 20, "view": "card"})  # calentar
+
+        await scenario(client, "sin ráfaga", rate=0)
+
+        password_hasher.configure(workers=0)
+        await scenario(client, "en línea (antes)", rate=args.rate)
+
+        password_hasher.configure(workers=args.workers)
+        await password_hasher.start()
+        await scenario(client, f"pool ×{args.workers} (después)", rate=args.rate)
+        await password_hasher.shutdown()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,125 @@
+"""
+Benchmark — orden por precio y filtros de rango en /api/products.
+
+Catálogo sintético: N productos × S tiendas (por defecto 100 000 × 6 = 600 000 precios).
+
+Escenarios (página 1 y página profunda, 20 items):
+  • legacy_page_sort   — código anterior: OFFSET/LIMIT sin ORDER BY y orden en Python
+                          sobre la página (¡incorrecto!: no ordena el catálogo).
+  • legacy_group_by    — orden correcto sin agregado: MIN(price) GROUP BY sobre
+                          toda la tabla prices en cada request.
+  • summary            — product_price_summaries indexada (implementación actual).
+
+    cd backend
+    python -m benchmarks.bench_price_sort [--products 100000] [--stores 6] [--url ...]
+"""
+import asyncio
+import random
+import uuid
+
+from benchmarks._common import bootstrap, reset_schema, insert_chunks, measure, report
+
+args = bootstrap(
+    __doc__.splitlines()[1],
+    products=(int, 100_000, "Número de productos"),
+    stores=(int, 6, "Tiendas por producto"),
+)
+
+from sqlalchemy import select, func  # noqa: E402
+from sqlalchemy.orm import selectinload  # noqa: E402
+
+from app.database import engine, AsyncSessionLocal  # noqa: E402
+from app.models.product import Product, CategoryEnum  # noqa: E402
+from app.models.price import Price, AvailabilityEnum  # noqa: E402
+from app.core.price_summary import rebuild_price_summaries  # noqa: E402
+from app.core.pagination import order_by_keys  # noqa: E402
+from app.routers.products import _catalog_query, _SORT_KEYS  # noqa: E402
+
+STORES = ["Amazon MX", "Sephora MX", "Walmart", "Lookaly.mx", "Liverpool", "El Palacio de Hierro"]
+PAGE_SIZE = 20
+
+
+async def seed() -> None:
+    rng = random.Random(42)
+    categories = list(CategoryEnum)
+    availabilities = [AvailabilityEnum.in_stock] * 6 + [AvailabilityEnum.low_stock, AvailabilityEnum.out_of_stock]
+    products, prices = [], []
+    for i in range(args.products):
+        pid = f"b{i:07d}"
+        products.append(dict(
+            id=pid, name=f"Producto {i}", brand=f"Marca {i % 400}",
+            category=rng.choice(categories), description="Producto sintético de benchmark.",
+            image="", stock=rng.randint(0, 50), is_active=True,
+            rating=round(rng.uniform(3, 5), 1), reviews=rng.randint(0, 20000),
+        ))
+        base = rng.uniform(80, 3000)
+        for site in (STORES * (args.stores // len(STORES) + 1))[:args.stores]:
+            prices.append(dict(
+                id=str(uuid.uuid4()), product_id=pid, site=site,
+                price=round(base * rng.uniform(0.85, 1.2), 2), currency="MXN",
+                availability=rng.choice(availabilities), url="#", shipping=rng.choice([0, 99, 150]),
+            ))
+
+    await reset_schema(engine)
+    async with engine.begin() as conn:
+        await insert_chunks(conn, Product.__table__, products)
+        await insert_chunks(conn, Price.__table__, prices)
+    async with AsyncSessionLocal() as db:
+        await rebuild_price_summaries(db)
+        await db.commit()
+
+
+async def legacy_page_sort(page: int) -> None:
+    async with AsyncSessionLocal() as db:
+        q = select(Product).options(selectinload(Product.prices))
+        q = q.offset((page - 1) * PAGE_SIZE).limit(PAGE_SIZE)
+        rows = (await db.execute(q)).scalars().all()
+        sorted(rows, key=lambda p: min((pr.price for pr in p.prices), default=0))
+
+
+async def legacy_group_by(page: int, min_price=None, max_price=None) -> None:
+    async with AsyncSessionLocal() as db:
+        agg = (
+            select(Price.product_id, func.min(Price.price).label("min_price"))
+            .group_by(Price.product_id)
+        )
+        if min_price is not None:
+            agg = agg.having(func.min(Price.price).between(min_price, max_price))
+        agg = agg.subquery()
+        q = (
+            select(Product)
+            .join(agg, agg.c.product_id == Product.id)
+            .order_by(agg.c.min_price, Product.id)
+            .offset((page - 1) * PAGE_SIZE).limit(PAGE_SIZE)
+        )
+        (await db.execute(q)).scalars().all()
+
+
+async def summary(page: int, **filters) -> None:
+    async with AsyncSessionLocal() as db:
+        q = _catalog_query(**filters).order_by(*order_by_keys(_SORT_KEYS["price_asc"]))
+        q = q.offset((page - 1) * PAGE_SIZE).limit(PAGE_SIZE)
+        (await db.execute(q)).scalars().all()
+
+
+async def main() -> None:
+    print(f"Sembrando {args.products:,} productos × {args.stores} tiendas en {args.url} …")
+    await seed()
+
+    for page in (1, 50):
+        print(f"\nsort=price_asc, página {page}")
+        report("legacy_page_sort (orden incorrecto)", await measure(lambda: legacy_page_sort(page), args.repeat))
+        old = report("legacy_group_by", await measure(lambda: legacy_group_by(page), args.repeat))
+        new = report("summary (indexado)", await measure(lambda: summary(page), args.repeat))
+        print(f"  → speedup vs group_by: {old / new:.1f}×")
+
+    print("\nsort=price_asc, min_price=200, max_price=400, in_stock=true")
+    old = report("legacy_group_by + HAVING", await measure(lambda: legacy_group_by(1, 200, 400), args.repeat))
+    new = report("summary (indexado)", await measure(
+        lambda: summary(1, min_price=200, max_price=400, in_stock=True), args.repeat))
+    print(f"  → speedup: {old / new:.1f}×")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,137 @@
+"""
+Benchmark — búsqueda de productos (search=… en /api/products).
+
+Catálogo sintético en español: N productos (por defecto 50 000) combinando
+tipo de producto, atributo y marca, con acentos y eñes como en el catálogo real.
+
+Escenarios (primera página, 20 items, por consulta):
+  • legacy_ilike  — código anterior: name ILIKE '%q%' OR brand ILIKE '%q%'
+                    (seq scan; sin acentos ni tolerancia a errores).
+  • search        — app/core/search.py ordenado por relevancia (implementación actual).
+
+Para cada consulta se reporta latencia (p50/p99) y aciertos: cuántos productos
+encuentra cada uno y si el tipo buscado aparece en la primera página.
+Las consultas incluyen errores de tecleo y palabras sin acento.
+
+    cd backend
+    python -m benchmarks.bench_search [--products 50000] [--url ...]
+"""
+import asyncio
+import random
+
+from benchmarks._common import bootstrap, reset_schema, insert_chunks, measure, report
+
+args = bootstrap(
+    __doc__.splitlines()[1],
+    products=(int, 50_000, "Número de productos"),
+)
+
+from sqlalchemy import select, func  # noqa: E402
+
+from app.database import engine, AsyncSessionLocal  # noqa: E402
+from app.models.product import Product, CategoryEnum, build_search_document  # noqa: E402
+from app.core.price_summary import rebuild_price_summaries  # noqa: E402
+from app.routers.products import _catalog_query, _sort_keys  # noqa: E402
+from app.core.pagination import order_by_keys  # noqa: E402
+
+PAGE_SIZE = 20
+
+KINDS = [
+    ("Máscara de Pestañas", CategoryEnum.maquillaje),
+    ("Protector Solar", CategoryEnum.piel),
+    ("Crema Hidratante", CategoryEnum.piel),
+    ("Labial Líquido", CategoryEnum.maquillaje),
+    ("Base de Maquillaje", CategoryEnum.maquillaje),
+    ("Sérum Facial", CategoryEnum.piel),
+    ("Exfoliante Corporal", CategoryEnum.cuerpo),
+    ("Delineador de Ojos", CategoryEnum.maquillaje),
+    ("Loción Corporal", CategoryEnum.cuerpo),
+    ("Agua Micelar", CategoryEnum.piel),
+]
+ATTRIBUTES = ["Volumen Extremo", "FPS 50", "Ácido Hialurónico", "Mate", "Larga Duración",
+              "Vitamina C", "Piel Sensible", "A Prueba de Agua", "Con Color", "Nutritiva"]
+BRANDS = ["L'Oréal", "Maybelline", "La Roche-Posay", "Nivea", "Neutrogena", "Garnier",
+          "Vichy", "Clinique", "MAC", "Bioderma", "Eucerin", "Lancôme"]
+
+# (consulta, tipo esperado en la primera página)
+QUERIES = [
+    ("mascara pestanas", "Máscara de Pestañas"),
+    ("protectr solar", "Protector Solar"),
+    ("crema hidratnte", "Crema Hidratante"),
+    ("serum facial", "Sérum Facial"),
+    ("delinador ojos", "Delineador de Ojos"),
+    ("Protector Solar", "Protector Solar"),
+]
+
+
+async def seed() -> None:
+    rng = random.Random(42)
+    products = []
+    for i in range(args.products):
+        kind, category = rng.choice(KINDS)
+        name = f"{kind} {rng.choice(ATTRIBUTES)} {i}"
+        brand = rng.choice(BRANDS)
+        description = f"{kind} de {brand}. Fórmula {rng.choice(ATTRIBUTES).lower()} para uso diario."
+        products.append(dict(
+            id=f"s{i:07d}", name=name, brand=brand, category=category, subcategory=None,
+            description=description, image="", stock=10, is_active=True,
+            rating=round(rng.uniform(3, 5), 1), reviews=rng.randint(0, 5000),
+            search_document=build_search_document(name, brand, None, description),
+        ))
+
+    await reset_schema(engine)
+    async with engine.begin() as conn:
+        await insert_chunks(conn, Product.__table__, products)
+    async with AsyncSessionLocal() as db:
+        await rebuild_price_summaries(db)
+        await db.commit()
+    if engine.dialect.name == "postgresql":
+        async with engine.begin() as conn:
+            await conn.exec_driver_sql("ANALYZE products")
+
+
+def _legacy_query(q: str):
+    return (
+        select(Product)
+        .where(Product.name.ilike(f"%{q}%") | Product.brand.ilike(f"%{q}%"))
+        .order_by(Product.rating.desc(), Product.id)
+    )
+
+
+def _search_query(q: str):
+    dialect = engine.dialect.name
+    _, keys = _sort_keys("relevance", q, dialect)
+    return _catalog_query(search=q, dialect=dialect).order_by(*order_by_keys(keys))
+
+
+async def run_page(query) -> list[Product]:
+    async with AsyncSessionLocal() as db:
+        return list((await db.execute(query.limit(PAGE_SIZE))).scalars().all())
+
+
+async def hits(query) -> int:
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(select(func.count()).select_from(query.subquery()))).scalar_one()
+
+
+async def main() -> None:
+    print(f"Sembrando {args.products:,} productos en {args.url} …")
+    await seed()
+
+    for q, expected in QUERIES:
+        print(f"\nsearch={q!r}")
+        legacy, new = _legacy_query(q), _search_query(q)
+        old_t = report("legacy_ilike", await measure(lambda: run_page(legacy), args.repeat))
+        new_t = report("search (relevancia)", await measure(lambda: run_page(new), args.repeat))
+
+        old_page, new_page = await run_page(legacy), await run_page(new)
+        for label, query, page in (("legacy_ilike", legacy, old_page), ("search", new, new_page)):
+            relevant = sum(p.name.startswith(expected) for p in page)
+            print(f"  {label:<22} aciertos={await hits(query):>7,}  "
+                  f"'{expected}' en pág. 1: {relevant}/{len(page)}")
+        print(f"  → latencia search / legacy: {new_t / old_t:.2f}×")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
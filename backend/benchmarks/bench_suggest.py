@@ -0,0 +1,105 @@
+"""
+Benchmark — autocompletado (GET /api/products/suggest).
+
+Simula una sesión de tecleo ("p", "pr", "pro", … "protector solar") sobre un
+catálogo sintético de N productos (por defecto 50 000).
+
+Escenarios (por pulsación):
+  • legacy_ilike   — lo que hacía el frontend: /api/products?search=<texto>
+                     (name/brand ILIKE '%texto%', 8 resultados) en cada tecla.
+  • suggest        — índice de prefijos en memoria (app/core/suggest.py).
+  • suggest (frío) — primera consulta de cada prefijo (sin caché).
+
+    cd backend
+    python -m benchmarks.bench_suggest [--products 50000] [--url ...]
+"""
+import asyncio
+import random
+import time
+
+from benchmarks._common import bootstrap, reset_schema, insert_chunks, measure, report
+
+args = bootstrap(
+    __doc__.splitlines()[1],
+    products=(int, 50_000, "Número de productos"),
+)
+
+from sqlalchemy import select  # noqa: E402
+
+from app.database import engine, AsyncSessionLocal  # noqa: E402
+from app.models.product import Product, CategoryEnum  # noqa: E402
+from app.core.sanitize import fold_text  # noqa: E402
+from app.core.suggest import SuggestIndex  # noqa: E402
+
+KINDS = ["Máscara de Pestañas", "Protector Solar", "Crema Hidratante", "Labial Líquido",
+         "Base de Maquillaje", "Sérum Facial", "Exfoliante Corporal", "Delineador de Ojos"]
+BRANDS = ["L'Oréal", "Maybelline", "La Roche-Posay", "Nivea", "Neutrogena", "Garnier", "Vichy", "Lancôme"]
+TYPED = "protector solar"
+LIMIT = 8
+
+
+async def seed() -> None:
+    rng = random.Random(42)
+    products = [
+        dict(
+            id=f"t{i:07d}", name=f"{rng.choice(KINDS)} {i}", brand=rng.choice(BRANDS),
+            category=rng.choice(list(CategoryEnum)), description="Producto sintético de benchmark.",
+            image="", stock=1, is_active=True, rating=round(rng.uniform(3, 5), 1),
+            reviews=rng.randint(0, 20000),
+        )
+        for i in range(args.products)
+    ]
+    await reset_schema(engine)
+    async with engine.begin() as conn:
+        await insert_chunks(conn, Product.__table__, products)
+
+
+async def legacy_ilike(text: str) -> None:
+    async with AsyncSessionLocal() as db:
+        (await db.execute(
+            select(Product.id, Product.name)
+            .where(Product.name.ilike(f"%{text}%") | Product.brand.ilike(f"%{text}%"))
+            .order_by(Product.rating.desc())
+            .limit(LIMIT)
+        )).all()
+
+
+async def main() -> None:
+    print(f"Sembrando {args.products:,} productos en {args.url} …")
+    await seed()
+
+    index = SuggestIndex()
+    async with AsyncSessionLocal() as db:
+        started = time.perf_counter()
+        await index.load(db)
+        print(f"Índice construido en {(time.perf_counter() - started) * 1000:.0f} ms "
+              f"({len(index.products):,} productos, {len(index.brands)} marcas)")
+
+    keystrokes = [TYPED[:i] for i in range(1, len(TYPED) + 1)]
+
+    async def typing_legacy():
+        for text in keystrokes:
+            await legacy_ilike(text)
+
+    async def typing_suggest():
+        for text in keystrokes:
+            prefix = fold_text(text)
+            index.products.top(prefix, LIMIT)
+            index.brands.top(prefix, LIMIT)
+
+    async def typing_cold():
+        index.products._cache.clear()
+        index.brands._cache.clear()
+        await typing_suggest()
+
+    print(f"\nSesión de {len(keystrokes)} pulsaciones ('{TYPED}')")
+    old = report("legacy_ilike", await measure(typing_legacy, args.repeat))
+    report("suggest (frío)", await measure(typing_cold, args.repeat))
+    new = report("suggest", await measure(typing_suggest, args.repeat))
+    print(f"  → por pulsación: legacy {old / len(keystrokes):.2f} ms, suggest {new / len(keystrokes) * 1000:.1f} µs "
+          f"({old / new:.0f}×)")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,54 @@
+"""
+Worker del outbox de eventos de pedidos (ver app/core/outbox.py).
+
+Entrega los eventos pendientes (order.created, order.status_changed) a sus
+handlers en lotes con SKIP LOCKED, con reintentos y backoff. Alternativa a
+correrlo dentro de la app (OUTBOX_DISPATCH_INTERVAL=0 en la API y este worker
+aparte); pueden correr varios a la vez.
+
+    cd backend
+    python dispatch_outbox.py                    # bucle cada OUTBOX_DISPATCH_INTERVAL s (mín. 1)
+    python dispatch_outbox.py --once             # una pasada y sale
+    python dispatch_outbox.py --interval 0.5 --batch 500
+    python dispatch_outbox.py --metrics          # estado de la cola y sale
+"""
+import argparse
+import asyncio
+import logging
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.core.outbox import close_http, dispatch_once, outbox_metrics, run_dispatcher
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Entrega los eventos del outbox de pedidos")
+    parser.add_argument("--once", action="store_true", help="Una sola pasada")
+    parser.add_argument("--metrics", action="store_true", help="Mostrar el estado de la cola y salir")
+    parser.add_argument("--interval", type=float, default=max(settings.OUTBOX_DISPATCH_INTERVAL, 1.0), help="Segundos entre sondeos")
+    parser.add_argument("--batch", type=int, default=settings.OUTBOX_BATCH, help="Eventos por transacción")
+    args = parser.parse_args()
+
+    try:
+        if args.metrics:
+            async with AsyncSessionLocal() as db:
+                m = await outbox_metrics(db)
+            print(f"pendientes {m['pending']:,} · vencidos {m['due']:,} · muertos {m['dead']:,} · lag {m['lag_seconds']:.1f} s")
+            return
+        if args.once:
+            report = await dispatch_once(AsyncSessionLocal, batch=args.batch)
+            print(f"✅ {report.processed:,} entregados, {report.retried:,} a reintentar, "
+                  f"{report.dead:,} muertos, {report.purged:,} purgados")
+            return
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+        print(f"Despachando eventos cada {args.interval} s (Ctrl+C para salir)")
+        await run_dispatcher(AsyncSessionLocal, args.interval, batch=args.batch)
+    finally:
+        await close_http()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,43 @@
+"""
+Exporta snapshots Parquet para analítica / BI (ver app/core/analytics_export.py).
+
+Lee con el rol de solo lectura lookaly_ro (ANALYTICS_DATABASE_URL) y escribe en
+ANALYTICS_EXPORT_DIR. Incremental: solo reescribe los meses de pedidos y las
+tablas que cambiaron desde la corrida anterior. Pensado para cron (p. ej. cada hora).
+
+    cd backend
+    python export_analytics.py                       # incremental
+    python export_analytics.py --full                # reescribe todo
+    python export_analytics.py --out /data/lookaly --url postgresql+asyncpg://lookaly_ro:...@db/lookaly_db
+
+Leer un año de ventas (DuckDB):
+    SELECT date_trunc('day', created_at), sum(total)
+    FROM read_parquet('exports/analytics/orders/*/*.parquet', hive_partitioning = true)
+    WHERE month BETWEEN '2025-01' AND '2025-12' GROUP BY 1;
+"""
+import argparse
+import asyncio
+import time
+
+from app.config import settings
+from app.core.analytics_export import export_analytics
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Snapshots Parquet (orders por mes, order_items, products, prices)")
+    parser.add_argument("--url", default=settings.ANALYTICS_DATABASE_URL, help="URL de la conexión de solo lectura")
+    parser.add_argument("--out", default=settings.ANALYTICS_EXPORT_DIR, help="Directorio de salida")
+    parser.add_argument("--full", action="store_true", help="Ignorar la exportación anterior y reescribir todo")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    report = await export_analytics(args.url, args.out, full=args.full)
+    for path, rows in report.files:
+        print(f"   📦 {path:<45} {rows:>10,} filas")
+    if report.skipped:
+        print(f"   ⏭️  sin cambios: {', '.join(report.skipped)}")
+    print(f"\n✅ Exportación analítica en {args.out} ({time.perf_counter() - started:.2f} s)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,85 @@
+"""
+Sincroniza el catálogo (products.csv / prices.csv) con la base de datos.
+
+Diff por hash de contenido: crea lo nuevo, actualiza solo lo que cambió y no
+toca lo demás. Es seguro correrlo cuantas veces quieras (idempotente).
+
+    cd backend
+    python import_catalog.py                                   # catalog/products.csv + catalog/prices.csv
+    python import_catalog.py --dry-run                         # solo muestra el diff
+    python import_catalog.py --prices feed.csv --no-products --prune
+    python import_catalog.py --batch-size 2000
+
+--prune aplica los "removed" (filas de una sincronización previa que ya no
+vienen en el archivo): desactiva esos productos y borra esos precios.
+
+Código de salida 1 si alguna fila fue rechazada (el resto sí se importa).
+"""
+import argparse
+import asyncio
+import sys
+from contextlib import ExitStack
+from pathlib import Path
+
+from app.database import AsyncSessionLocal, create_tables
+from app.core.catalog_import import import_catalog, CatalogFormatError, BATCH_SIZE
+
+CATALOG_DIR = Path(__file__).parent / "catalog"
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Importa products.csv / prices.csv (upsert por lotes)")
+    parser.add_argument("--products", type=Path, default=CATALOG_DIR / "products.csv")
+    parser.add_argument("--prices", type=Path, default=CATALOG_DIR / "prices.csv")
+    parser.add_argument("--no-products", action="store_true", help="No importar products.csv")
+    parser.add_argument("--no-prices", action="store_true", help="No importar prices.csv")
+    parser.add_argument("--dry-run", action="store_true", help="Solo calcular y mostrar el diff; no escribe")
+    parser.add_argument("--prune", action="store_true", help="Desactivar productos / borrar precios que ya no vienen")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Filas por lote (un COMMIT por lote)")
+    return parser.parse_args()
+
+
+async def main() -> int:
+    args = _parse_args()
+    await create_tables()
+
+    with ExitStack() as files:
+        def open_csv(path: Path, skip: bool):
+            if skip:
+                return None
+            return files.enter_context(open(path, encoding="utf-8-sig", newline=""))
+
+        async with AsyncSessionLocal() as session:
+            try:
+                report = await import_catalog(
+                    session,
+                    products=open_csv(args.products, args.no_products),
+                    prices=open_csv(args.prices, args.no_prices),
+                    batch_size=args.batch_size,
+                    dry_run=args.dry_run,
+                    prune=args.prune,
+                )
+            except CatalogFormatError as exc:
+                print(f"❌ {exc}")
+                return 1
+
+    symbols = {"inserted": "+", "changed": "~", "removed": "-"}
+    for change in report.changes:
+        print(f"   {symbols[change.action]} {change.file:<9} {change.key}")
+    if report.changes_truncated:
+        print("   … (más cambios omitidos)")
+    removed = "desactivados/borrados" if report.prune else "sobran"
+    for label, section in (("Productos", report.products), ("Precios", report.prices)):
+        print(f"   {label:<10} {section.rows:>8,} filas   +{section.inserted:,} nuevos   ~{section.changed:,} cambiados   "
+              f"={section.unchanged:,} iguales   -{section.removed:,} {removed}   {section.errors:,} con error")
+    for error in report.errors:
+        print(f"   ⚠️  {error.file}.csv línea {error.line}: {error.error}")
+    if report.errors_truncated:
+        print("   … (más errores omitidos)")
+    done = "Diff calculado (dry-run, no se escribió nada)" if report.dry_run else "Sincronización terminada"
+    print(f"\n{'✅' if not report.errors else '⚠️ '} {done} en {report.seconds:.2f} s")
+    return 1 if report.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,42 @@
+"""
+Worker del barrido de carritos (ver app/core/cart_sweeper.py).
+
+Expira los Cart abiertos vencidos y purga las líneas de carritos sin actividad,
+en lotes cortos con SKIP LOCKED. Alternativa a correrlo dentro de la app
+(CART_SWEEP_INTERVAL=0 en la API y este worker aparte, o por cron con --once).
+
+    cd backend
+    python sweep_carts.py --once                 # una pasada y sale (cron)
+    python sweep_carts.py                        # bucle cada CART_SWEEP_INTERVAL s (mín. 60)
+    python sweep_carts.py --interval 300 --batch 1000
+"""
+import argparse
+import asyncio
+import logging
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.core.cart_sweeper import run_sweeper, sweep_carts
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Expira carritos y purga líneas abandonadas")
+    parser.add_argument("--once", action="store_true", help="Una sola pasada")
+    parser.add_argument("--interval", type=int, default=max(settings.CART_SWEEP_INTERVAL, 60), help="Segundos entre pasadas")
+    parser.add_argument("--batch", type=int, default=settings.CART_SWEEP_BATCH, help="Filas por transacción")
+    args = parser.parse_args()
+
+    if args.once:
+        report = await sweep_carts(AsyncSessionLocal, batch=args.batch)
+        print(f"✅ {report.expired_carts:,} carritos expirados, {report.purged_items:,} líneas purgadas")
+        return
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    print(f"Barriendo carritos cada {args.interval} s (Ctrl+C para salir)")
+    await run_sweeper(AsyncSessionLocal, args.interval, batch=args.batch)
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
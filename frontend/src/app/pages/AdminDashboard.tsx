@@ -44,7 +44,7 @@ interface OrderItem {
 interface OrderRow {
   id: string; user_id?: string; status: string;
   shipping_address?: string; total: number;
-  order_items: OrderItem[]; created_at: string; paid_at?: string;
+  item_count: number; created_at: string; paid_at?: string;
 }
 
 type Tab = 'resumen' | 'productos' | 'pedidos' | 'usuarios' | 'seguridad' | 'ventas';
@@ -136,6 +136,9 @@ export default function AdminDashboard() {
   const [orders, setOrders] = useState<OrderRow[]>([]);
   const [ordersLoading, setOrdersLoading] = useState(false);
   const [expandedOrder, setExpandedOrder] = useState<string | null>(null);
+  const [orderItems, setOrderItems] = useState<Record<string, OrderItem[]>>({});
+  const [ordersCursor, setOrdersCursor] = useState<string | null>(null);
+  const [ordersLoadingMore, setOrdersLoadingMore] = useState(false);
   const [updatingOrderId, setUpdatingOrderId] = useState<string | null>(null);
 
   // Ventas (tab for vendedor role) — simplified product form
@@ -203,11 +206,36 @@ export default function AdminDashboard() {
 
   const fetchOrders = useCallback(async () => {
     setOrdersLoading(true); setError(null);
-    try { const data = await api('/api/orders/admin/all?size=100'); setOrders(data.items ?? []); }
+    try {
+      // Resumen sin líneas + cursor: las líneas se cargan al expandir cada pedido
+      const data = await api('/api/orders/admin/all?size=100&view=summary&count=none');
+      setOrders(data.items ?? []); setOrdersCursor(data.next_cursor ?? null); setOrderItems({});
+    }
     catch (e) { setError((e as Error).message); }
     finally { setOrdersLoading(false); }
   }, [api]);
 
+  const fetchMoreOrders = useCallback(async () => {
+    if (!ordersCursor) return;
+    setOrdersLoadingMore(true);
+    try {
+      const data = await api(`/api/orders/admin/all?size=100&view=summary&cursor=${encodeURIComponent(ordersCursor)}`);
+      setOrders(prev => [...prev, ...(data.items ?? [])]); setOrdersCursor(data.next_cursor ?? null);
+    }
+    catch (e) { setError((e as Error).message); }
+    finally { setOrdersLoadingMore(false); }
+  }, [api, ordersCursor]);
+
+  const toggleOrder = useCallback(async (orderId: string) => {
+    if (expandedOrder === orderId) { setExpandedOrder(null); return; }
+    setExpandedOrder(orderId);
+    if (orderItems[orderId]) return;
+    try {
+      const items = await api(`/api/orders/admin/${orderId}/items`);
+      setOrderItems(prev => ({ ...prev, [orderId]: items }));
+    } catch (e) { setError((e as Error).message); }
+  }, [api, expandedOrder, orderItems]);
+
   const fetchBrands = useCallback(async () => {
     setBrandsLoading(true);
     try { setBrands(await api('/api/brands')); }
@@ -473,6 +501,7 @@ export default function AdminDashboard() {
         body: JSON.stringify({ status: newStatus }),
       });
       setOrders(prev => prev.map(o => o.id === updated.id ? updated : o));
+      setOrderItems(prev => ({ ...prev, [updated.id]: updated.order_items }));
     } catch (e) { alert((e as Error).message); }
     finally { setUpdatingOrderId(null); }
   };
@@ -758,6 +787,7 @@ export default function AdminDashboard() {
                       <div className="text-right">
                         <p className="text-[11px] text-[#7D3150]/40">Total</p>
                         <p className="text-base font-semibold text-[#3a1a28]">${Number(order.total).toLocaleString('es-MX')}</p>
+                        <p className="text-[10px] text-[#7D3150]/40">{order.item_count} {order.item_count === 1 ? 'artículo' : 'artículos'}</p>
                       </div>
                       <div>
                         <p className="text-[11px] text-[#7D3150]/40 mb-1">Status</p>
@@ -776,7 +806,7 @@ export default function AdminDashboard() {
                         {new Date(order.created_at).toLocaleDateString('es-MX', { day: '2-digit', month: 'short', year: 'numeric' })}
                       </div>
                       <button
-                        onClick={() => setExpandedOrder(expandedOrder === order.id ? null : order.id)}
+                        onClick={() => toggleOrder(order.id)}
                         className="p-1.5 rounded-full hover:bg-[#E5B6C3]/20 text-[#7D3150]/50 transition-colors"
                       >
                         <ChevronDown size={16} className={`transition-transform ${expandedOrder === order.id ? 'rotate-180' : ''}`} />
@@ -788,8 +818,8 @@ export default function AdminDashboard() {
                         {order.shipping_address && (
                           <p className="text-[11px] text-[#7D3150]/50 mb-3">📦 {order.shipping_address}</p>
                         )}
-                        <div className="space-y-2">
-                          {order.order_items.map(item => (
+                        {!orderItems[order.id] ? <Spinner /> : <div className="space-y-2">
+                          {orderItems[order.id].map(item => (
                             <div key={item.id} className="flex items-center justify-between text-[12px]">
                               <div>
                                 <span className="text-[#3a1a28] font-medium">{item.product_name ?? 'Producto eliminado'}</span>
@@ -799,11 +829,18 @@ export default function AdminDashboard() {
                               <span className="text-[#3a1a28]">${Number(item.subtotal).toLocaleString('es-MX')}</span>
                             </div>
                           ))}
-                        </div>
+                        </div>}
                       </div>
                     )}
                   </div>
                 ))}
+                {ordersCursor && (
+                  <div className="flex justify-center pt-2">
+                    <button onClick={fetchMoreOrders} disabled={ordersLoadingMore}
+                      className="px-4 py-1.5 rounded-full text-[11px] text-[#7D3150] border border-[#E5B6C3]/50 hover:bg-[#E5B6C3]/20 transition-colors disabled:opacity-50"
+                    >{ordersLoadingMore ? 'Cargando…' : 'Cargar más'}</button>
+                  </div>
+                )}
               </div>
             )}
           </div>